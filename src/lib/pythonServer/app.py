@@ -1,40 +1,220 @@
+"""
+Flask API for Vedic birth charts, chat, matching, transits, muhurta and panchang.
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+create_app() builds the app. Importing this module loads only Flask and the
+instrumentation: the chart, ephemeris and NumPy-backed modules are imported
+inside the functions that use them, and the services (chart cache,
+gazetteer, chart backend and pool, sessions, insight service, panchang store)
+are created on first use. warm_up() loads all of them at once; call it in a
+pre-fork master (e.g. gunicorn --preload "app:create_app(warm=True)") so the
+workers share the loaded modules, tables and ephemeris data copy-on-write,
+or before serving so the first request does not pay for them.
+"""
+from flask import Blueprint, Flask, request, jsonify, Response, stream_with_context, g
+from functools import cached_property
 import json
+import logging
 import os
-import swisseph as swe
+import secrets
+import time
 import datetime
-import pytz
-from jyotishyam import Chart
-import random
-
-app = Flask(__name__)
-CORS(app)
-
-# Initialize swisseph with ephemeris path
-# You need to download ephemeris files from https://www.astro.com/ftp/swisseph/ephe/
-# and place them in the ephemeris directory
-swe.set_ephe_path(os.path.join(os.path.dirname(__file__), 'ephemeris'))
-
-# Planet and signs mappings
-PLANETS = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
-SIGNS = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
-         'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
-
-PLANET_DICT = {
-    'Sun': swe.SUN,
-    'Moon': swe.MOON,
-    'Mercury': swe.MERCURY,
-    'Venus': swe.VENUS,
-    'Mars': swe.MARS,
-    'Jupiter': swe.JUPITER,
-    'Saturn': swe.SATURN,
-    'Rahu': swe.MEAN_NODE,  # North Node
-    'Ketu': -1  # South Node, calculated from Rahu
-}
-
-@app.route('/vedic_astrology_project/script/generate-birth-chart', methods=['POST'])
+import zlib
+from instrumentation import (REGISTRY, SamplingProfiler, configure_logging, finish_trace,
+                             server_timing, span, start_trace)
+
+logger = logging.getLogger(__name__)
+
+# Profiles of requests sent with ?profile=1 go here; profiling is off when unset
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# Routes are registered on the app by create_app()
+routes = Blueprint('astrology', __name__)
+
+
+class Services:
+    """The app's services, each created on first use."""
+
+    @cached_property
+    def chart_cache(self):
+        """Repeat requests for the same birth details are served from here."""
+        from chart_cache import ChartCache
+        return ChartCache.from_env()
+
+    @cached_property
+    def gazetteer(self):
+        """Offline place lookup; the index is compiled from the TSV on first start."""
+        from geocoder import load_gazetteer
+        return load_gazetteer(
+            os.environ.get('GAZETTEER_TSV', os.path.join(DATA_DIR, 'gazetteer.tsv')),
+            os.environ.get('GAZETTEER_INDEX', os.path.join(DATA_DIR, 'gazetteer.idx')),
+        )
+
+    @cached_property
+    def birth_instant_resolver(self):
+        from birth_instant import BirthInstantResolver
+        return BirthInstantResolver(self.gazetteer)
+
+    @cached_property
+    def chart_backend(self):
+        """The configured chart backend (CHART_BACKEND)."""
+        from chart_backends import get_backend
+        return get_backend()
+
+    @cached_property
+    def chart_pool(self):
+        """
+        Chart computation is offloaded to worker processes when configured
+        (CHART_POOL_WORKERS, or server.py --chart-workers); None computes in-process.
+        """
+        from chart_pool import ChartPool
+        return ChartPool.from_env()
+
+    @cached_property
+    def interpretations(self):
+        """Chat answers are rendered from the compiled interpretation tables."""
+        from interpretations import load_interpretations
+        return load_interpretations()
+
+    @cached_property
+    def chat_sessions(self):
+        """Charts kept server-side so chat requests only need to send the chart ID."""
+        from chat_sessions import ChatSessionStore
+        return ChatSessionStore.from_env(os.path.join(DATA_DIR, 'chat_sessions.db'))
+
+    @cached_property
+    def insight_service(self):
+        """
+        Streamed chat answers from the configured insight backend
+        (INSIGHT_BACKEND), with the rule-based responder as the fallback.
+        """
+        from insight_backends import InsightService
+        return InsightService.from_env(generate_astrology_insight)
+
+    @cached_property
+    def chat_responses(self):
+        """Rule-based chat answers, cached per routed intent and chart."""
+        from response_cache import ResponseCache
+        return ResponseCache.from_env()
+
+    @cached_property
+    def chart_strength(self):
+        """Ashtakavarga and Shadbala per chart, for remedies and topic answers."""
+        from strength import StrengthCache
+        return StrengthCache.from_env()
+
+    @cached_property
+    def panchang_store(self):
+        """
+        Daily almanacs precomputed per location cell (panchang.py build), with
+        exact computation for cells and dates the file does not cover.
+        """
+        from panchang import PanchangStore
+        return PanchangStore.from_env(os.path.join(DATA_DIR, 'panchang.bin'))
+
+    def created(self):
+        """Names of the services created so far."""
+        return [name for name in SERVICE_NAMES if name in self.__dict__]
+
+
+SERVICE_NAMES = [name for name, value in vars(Services).items() if isinstance(value, cached_property)]
+
+services = Services()
+
+# Modules that routes import on first use, loaded ahead by warm_up()
+LAZY_MODULES = ['chart_model', 'chart_pool', 'geocoder', 'birth_instant', 'transits', 'muhurta', 'panchang',
+                'vargas', 'matching', 'strength', 'intent_router', 'response_cache', 'synthetic', 'numpy']
+
+
+def warm_up():
+    """
+    Load what first requests would: the lazily imported modules, every
+    service, the ephemeris files (by computing one chart) and the time zones
+    of the gazetteer's places. Returns the seconds taken.
+    """
+    import importlib
+    started = time.perf_counter()
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    for name in SERVICE_NAMES:
+        getattr(services, name)
+    from birth_instant import zone_transitions
+    from chart_backends import compute_chart
+    # J2000 at Greenwich; swisseph reads the ephemeris files on first use
+    compute_chart(2451545.0, 51.48, 0.0)
+    # The tz database is read per zone on first use; load the gazetteer's zones
+    for timezone_id in services.gazetteer.timezones:
+        zone_transitions(timezone_id)
+    elapsed = time.perf_counter() - started
+    logger.info("Warmed up", extra={"fields": {"seconds": round(elapsed, 3), "services": len(SERVICE_NAMES)}})
+    return elapsed
+
+
+def create_app(warm=False):
+    """
+    Build the Flask app. Services load on first use, or now with warm=True
+    (see warm_up).
+    """
+    from flask_cors import CORS
+    configure_logging()
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(routes)
+    if warm:
+        warm_up()
+    return app
+
+@routes.before_app_request
+def begin_request_trace():
+    """Start collecting stage spans, and the profiler when asked for."""
+    g.trace_token = start_trace()
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if PROFILE_DIR and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+        g.profiler = SamplingProfiler().start()
+
+@routes.after_app_request
+def finish_request_trace(response):
+    """Record the request latency and report the stages in Server-Timing."""
+    elapsed = time.perf_counter() - g.request_start
+    trace = finish_trace(g.trace_token)
+    # Route names without the blueprint prefix, as metric labels
+    endpoint = (request.endpoint or 'unmatched').rpartition('.')[2]
+    REGISTRY.histogram('astrology_request_seconds', "Request latency by endpoint",
+                       endpoint=endpoint, status=response.status_code).observe(elapsed)
+    response.headers['Server-Timing'] = server_timing(trace + [("total", elapsed)])
+    if g.profiler is not None:
+        profile_id = f"{endpoint}-{secrets.token_hex(4)}"
+        path = g.profiler.stop().save(PROFILE_DIR, profile_id)
+        response.headers['X-Profile-Id'] = profile_id
+        logger.info("Saved request profile", extra={"fields": {"path": path, "samples": sum(g.profiler.samples.values())}})
+    return response
+
+def collect_gauges():
+    """Counters of the services created so far, for /metrics."""
+    created = services.created()
+    if 'chart_cache' in created:
+        cache = services.chart_cache.stats()
+        for name in ('hits', 'sharedHits', 'misses', 'evictions', 'size'):
+            yield 'astrology_chart_cache', "Chart cache counters", {"stat": name}, cache[name]
+    if 'chart_pool' in created and services.chart_pool is not None:
+        for name, value in services.chart_pool.stats().items():
+            yield 'astrology_chart_pool', "Chart pool counters", {"stat": name}, value
+    for service, metric, help_text in (('chat_sessions', 'astrology_chat_sessions', "Chat session counters"),
+                                       ('insight_service', 'astrology_insight', "Insight backend counters"),
+                                       ('panchang_store', 'astrology_panchang', "Panchang store counters"),
+                                       ('chart_strength', 'astrology_strength_cache', "Chart strength cache counters"),
+                                       ('chat_responses', 'astrology_chat_response_cache',
+                                        "Chat response cache counters")):
+        if service in created:
+            for name, value in getattr(services, service).stats().items():
+                if isinstance(value, (int, float)):
+                    yield metric, help_text, {"stat": name}, value
+
+REGISTRY.register_collector(collect_gauges)
+
+@routes.route('/vedic_astrology_project/script/generate-birth-chart', methods=['POST'])
 def generate_birth_chart():
     """
     Generate Vedic astrology birth chart based on birth details.
@@ -44,39 +224,89 @@ def generate_birth_chart():
         "name": "John Doe",
         "date": "2000-03-15T12:30:00.000Z",
         "time": "12:30",
-        "location": "New York, USA"
+        "location": "New York, USA",
+        "vargas": ["D9", "D10"],     # optional divisional charts
+        "format": "compact"          # optional, see below
     }
+    
+    The response includes a "chartId" to send with chat messages, and the
+    requested divisional charts under "vargas". Vargas can also be given as
+    a query parameter, e.g. ?vargas=D9,D10.
+    
+    With "format": "compact" (or ?format=compact) each house lists indices
+    into "planets" instead of repeating the planet objects.
     """
+    from chart_model import parse_chart_format
+    from chart_pool import PoolSaturatedError
+    from geocoder import LocationNotFoundError
+    from vargas import parse_vargas, varga_charts
     try:
-        data = request.json
-        print(f"Received data: {data}")
+        with span("request.parse"):
+            data = request.json
+        # Birth details are personal data: log their shape, not their values
+        logger.debug("Received birth details", extra={"fields": {"keys": sorted(data)}})
         
-        # Extract birth details
-        name = data.get('name')
-        birth_date_str = data.get('date')
-        birth_time = data.get('time')
-        location = data.get('location')
+        try:
+            vargas = parse_vargas(data.get('vargas') or request.args.get('vargas') or [])
+        except ValueError as e:
+            return jsonify({
+                "error": str(e),
+                "message": "Unsupported divisional chart requested"
+            }), 400
         
-        # Parse birth date and time
-        birth_datetime = datetime.datetime.fromisoformat(birth_date_str.replace('Z', '+00:00'))
+        try:
+            compact = parse_chart_format(data.get('format') or request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                "error": str(e),
+                "message": "Unsupported chart format requested"
+            }), 400
         
-        # TODO: Use a geocoding API to get latitude and longitude from location
-        # For now, using simple mock coordinates
-        lat, lon = get_mock_coordinates(location)
+        # Parse birth date and time, and resolve the location offline
+        try:
+            birth_datetime, lat, lon = parse_birth_record(data)
+        except LocationNotFoundError:
+            raise
+        except (KeyError, ValueError) as e:
+            return jsonify({
+                "error": str(e),
+                "message": "Invalid birth details"
+            }), 400
         
         # Calculate birth chart
         birth_chart = calculate_vedic_birth_chart(birth_datetime, lat, lon)
         
-        return jsonify(birth_chart)
+        extra = {}
+        if vargas:
+            with span("chart.vargas"):
+                extra["vargas"] = varga_charts(birth_chart, vargas)
+        
+        # Keep it server-side for chat; the cached chart itself stays untouched
+        with span("session.create"):
+            session = services.chat_sessions.create(birth_chart)
+        if session is not None:
+            extra["chartId"] = session.chart_id
+        
+        with span("response.encode"):
+            return chart_response(birth_chart, compact, extra)
+    
+    except LocationNotFoundError as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Could not find the birth location"
+        }), 400
+    
+    except PoolSaturatedError as e:
+        return busy_response(e)
     
     except Exception as e:
-        print(f"Error generating birth chart: {str(e)}")
+        logger.exception("Error generating birth chart: %s", e)
         return jsonify({
             "error": str(e),
             "message": "Failed to generate birth chart"
         }), 500
 
-@app.route('/vedic_astrology_project/script/chat', methods=['POST'])
+@routes.route('/vedic_astrology_project/script/chat', methods=['POST'])
 def chat():
     """
     Process user messages and generate astrology insights.
@@ -84,512 +314,761 @@ def chat():
     Expected JSON input:
     {
         "message": "What does my Sun in the 1st house mean?",
-        "birthDetails": {...},
-        "birthChart": {...}
+        "chartId": "..."            # from generate-birth-chart
     }
+    
+    Clients without a chart ID may still send "birthDetails" and
+    "birthChart" in place of "chartId".
     """
     try:
-        data = request.json
+        with span("request.parse"):
+            data = request.json
         message = data.get('message')
-        birth_details = data.get('birthDetails')
-        birth_chart = data.get('birthChart')
+        
+        session = chat_session(data)
+        if session is None:
+            return unknown_chart_response()
         
         # Generate response based on message and birth chart
-        response = generate_astrology_insight(message, birth_details, birth_chart)
+        response = generate_astrology_insight(message, session)
         
-        return jsonify(response)
+        with span("response.encode"):
+            return jsonify(response)
     
     except Exception as e:
-        print(f"Error processing chat: {str(e)}")
+        logger.exception("Error processing chat: %s", e)
         return jsonify({
             "error": str(e),
             "message": "Failed to process your message"
         }), 500
 
-def get_mock_coordinates(location):
-    """
-    Mock function to return latitude and longitude for a location.
-    In a production app, this would use a geocoding API.
-    """
-    # Dictionary of some common locations
-    locations = {
-        "new york": (40.7128, -74.0060),
-        "london": (51.5074, -0.1278),
-        "tokyo": (35.6762, 139.6503),
-        "delhi": (28.6139, 77.2090),
-        "mumbai": (19.0760, 72.8777),
-        "bangalore": (12.9716, 77.5946),
-        "chennai": (13.0827, 80.2707),
-        "hyderabad": (17.3850, 78.4867),
-        "kolkata": (22.5726, 88.3639),
-        "pune": (18.5204, 73.8567),
-    }
+@routes.route('/vedic_astrology_project/script/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Stream the answer to a chat message token by token.
+    
+    Takes the same JSON input as /chat. Answers come from the configured
+    insight backend (INSIGHT_BACKEND, see insight_backends.py), as
+    server-sent events when the client accepts text/event-stream, otherwise
+    as NDJSON. The first event is "meta" (with the message "id" and
+    "timestamp"), then "token" events, then "done" with the whole content.
+    """
+    try:
+        data = request.json
+        session = chat_session(data)
+        if session is None:
+            return unknown_chart_response()
+        message = data.get('message') or ''
+    except Exception as e:
+        logger.warning("Error reading chat stream request: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to process your message"
+        }), 400
+    
+    sse = request.accept_mimetypes.best_match(['application/x-ndjson', 'text/event-stream']) == 'text/event-stream'
     
-    # Check if location is in our dictionary
-    location_lower = location.lower()
-    for key, coords in locations.items():
-        if key in location_lower:
-            return coords
+    def generate():
+        started = time.perf_counter()
+        backend = None
+        try:
+            for event in services.insight_service.stream(message, session):
+                if event["type"] == "meta":
+                    now = datetime.datetime.now()
+                    event = dict(event, id=now.timestamp(), timestamp=now.isoformat())
+                    backend = event["backend"]
+                elif event["type"] == "token" and started is not None:
+                    REGISTRY.histogram('astrology_chat_first_token_seconds', "Time to the first streamed chat token",
+                                       backend=backend).observe(time.perf_counter() - started)
+                    started = None
+                yield format_event(event, sse)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-stream
+            logger.exception("Error streaming chat: %s", e)
+            yield format_event({"type": "error", "error": str(e)}, sse)
     
-    # Default to Delhi coordinates if location not found
-    return (28.6139, 77.2090)
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-def calculate_vedic_birth_chart(birth_datetime, lat, lon):
+def format_event(event, sse):
+    """One stream event as an SSE message or an NDJSON line."""
+    if sse:
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+@routes.route('/vedic_astrology_project/script/generate-birth-charts', methods=['POST'])
+def generate_birth_charts():
     """
-    Calculate Vedic birth chart using swisseph and jyotishyam.
+    Generate Vedic astrology birth charts for many people in one request.
+    
+    Accepts either a JSON array of birth details (same shape as the
+    generate-birth-chart body, optionally with "lat"/"lon" instead of a
+    "location") or NDJSON with one record per line. Results come back in
+    input order, in the same format as the request; records that fail are
+    returned as {"error": ...} without failing the whole batch.
+    ?format=compact returns charts in the compact shape.
     """
+    from chart_model import encode_value, parse_chart_format
+    from chart_pool import PoolSaturatedError
     try:
-        # Initialize jyotishyam chart
-        chart = Chart(birth_datetime, lat, lon, 'Lahiri')
+        compact = parse_chart_format(request.args.get('format'))
+        ndjson = not request.is_json
+        if ndjson:
+            records = []
+            for line in request.get_data(as_text=True).splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    records.append(ValueError(f"Invalid JSON line: {e}"))
+        else:
+            records = request.json
+            if not isinstance(records, list):
+                records = records.get('records', [])
         
-        # Set Julian day
-        year, month, day = birth_datetime.year, birth_datetime.month, birth_datetime.day
-        hour, minute, second = birth_datetime.hour, birth_datetime.minute, birth_datetime.second
-        julian_day = swe.julday(year, month, day, hour + minute/60.0 + second/3600.0)
+        charts = calculate_vedic_birth_charts(records)
         
-        # Calculate ayanamsa (precession)
-        ayanamsa = swe.get_ayanamsa(julian_day)
+        encoded = [encode_value(chart, compact) for chart in charts]
+        if ndjson:
+            return Response("\n".join(encoded) + "\n", mimetype='application/x-ndjson')
+        return Response("[" + ",".join(encoded) + "]\n", mimetype='application/json')
+    
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    
+    except Exception as e:
+        logger.exception("Error generating birth charts: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to generate birth charts"
+        }), 500
+
+@routes.route('/vedic_astrology_project/script/match', methods=['POST'])
+def match():
+    """
+    Rank candidates by Ashtakoota guna milan against one person's chart.
+    
+    Expected JSON input:
+    {
+        "chartId": "...",            # or "profile": {birth details}
+        "role": "groom",             # the profile's role, "groom" or "bride"
+        "candidates": [{"id": "c1", "date": ..., "time": ..., "location": ...}, ...],
+        "k": 10,                     # matches returned, best first
+        "minScore": 18,              # optional, out of 36
+        "aspects": true              # synastry aspects for the matches
+    }
+    
+    Candidates take the generate-birth-chart fields (or "lat"/"lon"); their
+    "id" is echoed back. Every candidate is scored; only the top k are
+    returned, with the koota breakdown. Candidates that cannot be parsed are
+    listed under "errors" instead of failing the request.
+    """
+    import numpy as np
+    from chart_model import as_record
+    from chart_pool import PoolSaturatedError
+    from ephemeris import PLANETS
+    from geocoder import LocationNotFoundError
+    from matching import ROLES, match_candidates, planet_longitudes
+    try:
+        data = request.json
+        role = data.get('role', 'groom')
+        if role not in ROLES:
+            return jsonify({
+                "error": f"Unknown role: {role}",
+                "message": "Role must be groom or bride"
+            }), 400
         
-        # Get ascendant (lagna)
-        ascendant_lon = swe.houses(julian_day, lat, lon)[0]  # First house cusp
-        ascendant_sign = int((ascendant_lon - ayanamsa) / 30) % 12
+        if 'chartId' in data:
+            session = services.chat_sessions.get(data['chartId'])
+            if session is None:
+                return unknown_chart_response()
+            profile_chart = as_record(session.chart)
+        else:
+            profile_chart = calculate_vedic_birth_chart(*parse_birth_record(data.get('profile') or {}))
+        query_longitudes = [profile_chart.longitude(i) for i in range(len(PLANETS))]
         
-        # Calculate houses and planets
-        houses = []
-        planet_positions = []
+        candidates = data.get('candidates') or []
+        with span("match.parse"):
+            errors, indices, julian_days, _, _ = parse_birth_records(candidates)
+        with span("match.positions"):
+            if services.chart_pool is not None and len(indices) > services.chart_pool.chunk_size:
+                longitudes = np.array(services.chart_pool.map_chunks(planet_longitudes, julian_days))
+            else:
+                longitudes = np.array(planet_longitudes(julian_days)).reshape(-1, len(PLANETS))
+        with span("match.score"):
+            matches = match_candidates(query_longitudes, longitudes, int(data.get('k', 10)), role,
+                                       data.get('minScore'), bool(data.get('aspects', True)))
         
-        # Create houses
-        for i in range(1, 13):
-            house_sign_index = (ascendant_sign + i - 1) % 12
-            houses.append({
-                "number": i,
-                "sign": SIGNS[house_sign_index],
-                "planets": []
-            })
+        for match in matches:
+            match["index"] = indices[match["index"]]
+            candidate_id = candidates[match["index"]].get('id')
+            if candidate_id is not None:
+                match["id"] = candidate_id
         
-        # Calculate planet positions
-        for planet_name, planet_id in PLANET_DICT.items():
-            if planet_id == -1:  # Ketu (South Node)
-                # Ketu is always 180 degrees from Rahu
-                rahu_lon = None
-                for p in planet_positions:
-                    if p['planet'] == 'Rahu':
-                        rahu_lon = p['degrees']
-                        break
-                
-                if rahu_lon is not None:
-                    ketu_lon = (rahu_lon + 180) % 360
-                    ketu_sign = int((ketu_lon - ayanamsa) / 30) % 12
-                    ketu_house = ((ketu_sign - ascendant_sign) % 12) + 1
-                    
-                    planet_pos = {
-                        "planet": "Ketu",
-                        "house": ketu_house,
-                        "sign": SIGNS[ketu_sign],
-                        "degrees": ketu_lon % 30
-                    }
-                    
-                    planet_positions.append(planet_pos)
-                    
-                    # Add planet to its house
-                    for house in houses:
-                        if house["number"] == ketu_house:
-                            house["planets"].append(planet_pos)
-            else:
-                # Calculate position for other planets
-                lon, lat, dist = swe.calc_ut(julian_day, planet_id)[0:3]
-                
-                # Adjust longitude to sidereal (Vedic)
-                lon_sidereal = (lon - ayanamsa) % 360
-                sign = int(lon_sidereal / 30)
-                house = ((sign - ascendant_sign) % 12) + 1
-                
-                planet_pos = {
-                    "planet": planet_name,
-                    "house": house,
-                    "sign": SIGNS[sign],
-                    "degrees": lon_sidereal % 30
-                }
-                
-                planet_positions.append(planet_pos)
-                
-                # Add planet to its house
-                for h in houses:
-                    if h["number"] == house:
-                        h["planets"].append(planet_pos)
+        return jsonify({
+            "role": role,
+            "candidates": len(candidates),
+            "matches": matches,
+            "errors": [dict(error, index=i) for i, error in enumerate(errors) if error is not None]
+        })
+    
+    except LocationNotFoundError as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Could not find the birth location"
+        }), 400
+    
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    
+    except Exception as e:
+        logger.exception("Error matching charts: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to match charts"
+        }), 500
+
+@routes.route('/vedic_astrology_project/script/transits', methods=['POST'])
+def transits():
+    """
+    Stream transits over a date range as NDJSON, plus Vimshottari dashas.
+    
+    Expected JSON input: the generate-birth-chart fields plus
+    {
+        "start": "2025-01-01",
+        "end": "2025-12-31",
+        "step": "1d",          # number of days, or "6h", "30m", ...
+        "dasha": true,         # include dasha periods overlapping the range
+        "dashaLevels": 2       # 1 = mahadashas, 2 = with antardashas, 3 at most
+    }
+    
+    The first line describes the stream; then come "position" records per
+    step with "ingress" and "station" events at their exact times, and
+    finally "dasha" records.
+    """
+    from birth_instant import julian_day_ut
+    from chart_pool import PoolSaturatedError
+    from ephemeris import PLANETS
+    from geocoder import LocationNotFoundError
+    from transits import parse_dasha_levels, parse_step, transit_series, vimshottari_dasha
+    try:
+        data = request.json
+        birth_datetime, lat, lon = parse_birth_record(data)
+        natal_chart = calculate_vedic_birth_chart(birth_datetime, lat, lon)
+        ascendant_sign = natal_chart.ascendant_sign
+        moon_lon = natal_chart.longitude('Moon')
         
-        return {
-            "ascendant": SIGNS[ascendant_sign],
-            "houses": houses,
-            "planets": planet_positions
-        }
+        start_jd = julian_day_ut(datetime.datetime.fromisoformat(data['start'].replace('Z', '+00:00')))
+        end_jd = julian_day_ut(datetime.datetime.fromisoformat(data['end'].replace('Z', '+00:00')))
+        step_days = parse_step(data.get('step', '1d'))
+        dasha_levels = parse_dasha_levels(data.get('dashaLevels', 2))
+        if end_jd < start_jd:
+            raise ValueError("end must not be before start")
+        series = transit_series(start_jd, end_jd, step_days, ascendant_sign)
+    
+    except LocationNotFoundError as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Could not find the birth location"
+        }), 400
+    
+    except PoolSaturatedError as e:
+        return busy_response(e)
     
     except Exception as e:
-        print(f"Error in calculate_vedic_birth_chart: {str(e)}")
-        # If calculation fails, fall back to mock data
-        return generate_mock_birth_chart()
+        logger.warning("Error preparing transits: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to generate transits"
+        }), 400
+    
+    def generate():
+        yield json.dumps({
+            "type": "meta",
+            "planets": PLANETS,
+            "ascendant": natal_chart.ascendant,
+            "start": data['start'],
+            "end": data['end'],
+            "stepDays": step_days
+        }) + "\n"
+        try:
+            for record in series:
+                yield json.dumps(record) + "\n"
+            if data.get('dasha', True):
+                for period in vimshottari_dasha(moon_lon, julian_day_ut(birth_datetime),
+                                                dasha_levels, start_jd, end_jd):
+                    yield json.dumps(dict(period, type="dasha")) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-stream
+            logger.exception("Error streaming transits: %s", e)
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-def generate_mock_birth_chart(birth_details=None):
+@routes.route('/vedic_astrology_project/script/muhurta', methods=['POST'])
+def muhurta():
     """
-    Generate mock birth chart data when real calculation fails or for testing.
+    Find the intervals in a date range when planetary conditions hold.
+    
+    Expected JSON input:
+    {
+        "condition": "Moon in Rohini and Jupiter in kendra from lagna",
+        "start": "2026-01-01",
+        "end": "2026-06-30",
+        "location": "Pune, India",  # or "lat"/"lon"; needed for the lagna
+        "chartId": "...",           # optional, for "from natal lagna"
+        "step": "10m"               # optional sampling step
+    }
+    
+    See muhurta.py for the condition language.
     """
-    # Determine a random ascendant
-    ascendant_index = random.randint(0, 11)
-    ascendant = SIGNS[ascendant_index]
-    
-    # Generate houses
-    houses = []
-    for i in range(1, 13):
-        sign_index = (ascendant_index + i - 1) % 12
-        houses.append({
-            "number": i,
-            "sign": SIGNS[sign_index],
-            "planets": []
+    from birth_instant import julian_day_ut
+    from chart_model import as_record
+    from chart_pool import PoolSaturatedError
+    from geocoder import LocationNotFoundError
+    from muhurta import parse_condition, search as search_muhurta
+    from transits import parse_step
+    try:
+        data = request.json
+        condition = parse_condition(data.get('condition') or '')
+        start_jd = julian_day_ut(datetime.datetime.fromisoformat(data['start'].replace('Z', '+00:00')))
+        end_jd = julian_day_ut(datetime.datetime.fromisoformat(data['end'].replace('Z', '+00:00')))
+        if end_jd < start_jd:
+            raise ValueError("end must not be before start")
+        step_days = parse_step(data['step']) if data.get('step') else None
+        
+        location = None
+        if data.get('lat') is not None and data.get('lon') is not None:
+            location = (float(data['lat']), float(data['lon']))
+        elif data.get('location'):
+            with span("location.geocode"):
+                place = resolve_location(data['location'])
+            location = (place['lat'], place['lon'])
+        
+        natal_ascendant = None
+        if 'chartId' in data:
+            session = services.chat_sessions.get(data['chartId'])
+            if session is None:
+                return unknown_chart_response()
+            natal_ascendant = as_record(session.chart).ascendant_sign
+        
+        with span("muhurta.search"):
+            intervals = search_muhurta(condition, start_jd, end_jd, step_days, location, natal_ascendant,
+                                       services.chart_pool)
+        return jsonify({
+            "condition": data['condition'],
+            "start": data['start'],
+            "end": data['end'],
+            "intervals": intervals
         })
     
-    # Generate planet positions
-    planets = []
-    for planet in PLANETS:
-        # Random house and sign
-        house_num = random.randint(1, 12)
-        sign_index = (ascendant_index + house_num - 1) % 12
-        sign = SIGNS[sign_index]
-        degrees = random.uniform(0, 30)
+    except LocationNotFoundError as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Could not find the search location"
+        }), 400
+    
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    
+    except (KeyError, ValueError) as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Invalid muhurta search"
+        }), 400
+    
+    except Exception as e:
+        logger.exception("Error searching muhurta: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to search muhurta"
+        }), 500
+
+@routes.route('/vedic_astrology_project/script/panchang', methods=['GET'])
+def panchang():
+    """
+    The daily almanac for a place and local date: sunrise and sunset, tithi,
+    nakshatra, yoga and karana at sunrise with the times they end, and Rahu
+    kalam.
+    
+    Query parameters: location (a place name) or lat and lon, timezone
+    (optional IANA zone, for coordinates), date (YYYY-MM-DD, default today
+    at the place)
+    
+    Places are snapped to a 0.25 degree grid, and "location" in the response
+    is the cell centre the almanac was computed for.
+    """
+    from birth_instant import UNIX_EPOCH, offset_at_utc
+    from geocoder import LocationNotFoundError
+    try:
+        lat, lon = request.args.get('lat', type=float), request.args.get('lon', type=float)
+        if lat is not None and lon is not None:
+            timezone_id = request.args.get('timezone') or services.birth_instant_resolver.timezone_at(lat, lon)
+        else:
+            with span("location.geocode"):
+                place = resolve_location(request.args.get('location'))
+            lat, lon, timezone_id = place['lat'], place['lon'], place['timezone']
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("lat and lon are out of range")
+        
+        if request.args.get('date'):
+            day = datetime.date.fromisoformat(request.args['date'])
+        else:
+            now = time.time()
+            day = (UNIX_EPOCH + datetime.timedelta(seconds=now + offset_at_utc(timezone_id, now))).date()
         
-        planet_data = {
-            "planet": planet,
-            "house": house_num,
-            "sign": sign,
-            "degrees": degrees
-        }
+        with span("panchang.lookup"):
+            return jsonify(services.panchang_store.get(lat, lon, day, timezone_id))
+    
+    except LocationNotFoundError as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Could not find the location"
+        }), 400
+    
+    except (KeyError, ValueError) as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Invalid panchang request"
+        }), 400
+    
+    except Exception as e:
+        logger.exception("Error computing panchang: %s", e)
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to compute panchang"
+        }), 500
+
+@routes.route('/vedic_astrology_project/script/locations', methods=['GET'])
+def autocomplete_locations():
+    """
+    Suggest places for a partially typed location, most populous first.
+    
+    Query parameters: q (the text typed so far), limit (default 10, max 50)
+    """
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify(services.gazetteer.autocomplete(query, limit))
+
+@routes.route('/vedic_astrology_project/script/cache-stats', methods=['GET'])
+def cache_stats():
+    """
+    Report chart cache hit/miss/eviction counters, chart pool load, and
+    session, insight, chat response cache, panchang and strength stats.
+    """
+    stats = services.chart_cache.stats()
+    stats["pool"] = services.chart_pool.stats() if services.chart_pool is not None else None
+    stats["sessions"] = services.chat_sessions.stats()
+    stats["backend"] = services.chart_backend.name
+    stats["insight"] = services.insight_service.stats()
+    stats["chatResponses"] = services.chat_responses.stats()
+    stats["panchang"] = services.panchang_store.stats()
+    stats["strength"] = services.chart_strength.stats()
+    return jsonify(stats)
+
+@routes.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: request and stage latency histograms, and cache/pool/session counters."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def chart_response(chart, compact=False, extra=None):
+    """JSON response for a ChartRecord, plus extra fields, in the requested shape."""
+    from chart_model import encode_chart
+    return Response(encode_chart(chart, compact, extra) + "\n", mimetype='application/json')
+
+def busy_response(error):
+    """503 for requests rejected by chart pool backpressure."""
+    response = jsonify({
+        "error": str(error),
+        "message": "Server is busy, please retry"
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def chat_session(data):
+    """
+    The ChartSession a chat request is about: the stored session for
+    "chartId" (None when unknown or expired), or one built from the
+    "birthChart" sent along.
+    """
+    from chat_sessions import ChartSession
+    if 'chartId' in data:
+        with span("session.lookup"):
+            return services.chat_sessions.get(data['chartId'])
+    return ChartSession(None, data.get('birthChart') or {})
+
+def unknown_chart_response():
+    """404 for a chat request with an unknown or expired chart ID."""
+    return jsonify({
+        "error": "Unknown or expired chart ID",
+        "message": "Please generate your birth chart again"
+    }), 404
+
+def resolve_location(location):
+    """
+    Look up a location name in the offline gazetteer.
+    Raises LocationNotFoundError instead of guessing when nothing matches.
+    """
+    from geocoder import LocationNotFoundError
+    match = services.gazetteer.lookup(location or '')
+    if match is None:
+        raise LocationNotFoundError(f"Unknown location: {location}")
+    return match
+
+def parse_birth_record(record):
+    """
+    Parse a birth details record into (birth_datetime, lat, lon), where
+    birth_datetime is the UTC birth instant.
+    Explicit "lat"/"lon" fields take precedence over the "location" name, and
+    an explicit "timezone" over the zone found for the place.
+    """
+    timezone_id = record.get('timezone')
+    if record.get('lat') is not None and record.get('lon') is not None:
+        lat, lon = float(record['lat']), float(record['lon'])
+    else:
+        with span("location.geocode"):
+            place = resolve_location(record.get('location'))
+        lat, lon = place['lat'], place['lon']
+        timezone_id = timezone_id or place['timezone']
+    with span("location.birth_instant"):
+        birth_datetime = services.birth_instant_resolver.resolve(record['date'], record.get('time'), lat, lon, timezone_id)
+    return birth_datetime, lat, lon
+
+def calculate_vedic_birth_chart(birth_datetime, lat, lon):
+    """
+    Calculate Vedic birth chart with the configured chart backend.
+    Returns a ChartRecord, memoized in the chart cache; treat it as read-only.
+    Raises PoolSaturatedError when the chart pool is at its queue limit.
+    """
+    from birth_instant import julian_day_ut
+    from chart_backends import compute_chart
+    from chart_cache import make_chart_key
+    from chart_pool import PoolSaturatedError
+    from ephemeris import AYANAMSA
+    with span("chart.cache_lookup"):
+        cache_key = make_chart_key(birth_datetime, lat, lon, AYANAMSA)
+        cached_chart = services.chart_cache.get(cache_key)
+    if cached_chart is not None:
+        return cached_chart
+    
+    try:
+        # Set Julian day
+        with span("chart.julday"):
+            julian_day = julian_day_ut(birth_datetime)
         
-        planets.append(planet_data)
+        if services.chart_pool is not None:
+            # Queue wait plus the worker's compute time
+            with span("chart.pool"):
+                birth_chart = services.chart_pool.run(compute_chart, julian_day, lat, lon)
+        else:
+            birth_chart = compute_chart(julian_day, lat, lon)
         
-        # Add planet to its house
-        for house in houses:
-            if house["number"] == house_num:
-                house["planets"].append(planet_data)
+        with span("chart.cache_store"):
+            services.chart_cache.set(cache_key, birth_chart)
+        return birth_chart
     
-    return {
-        "ascendant": ascendant,
-        "houses": houses,
-        "planets": planets
-    }
+    except PoolSaturatedError:
+        raise
+    
+    except Exception as e:
+        logger.exception("Error in calculate_vedic_birth_chart: %s", e)
+        # If calculation fails, fall back to mock data
+        return generate_mock_birth_chart({"date": birth_datetime.isoformat(), "lat": lat, "lon": lon})
 
-def generate_astrology_insight(message, birth_details, birth_chart):
+def parse_birth_records(records):
     """
-    Generate astrology insights based on the message and birth chart.
-    This is a simple rule-based system. In production, you would use a 
-    more sophisticated AI model trained on Vedic astrology.
+    Parse many birth records at once. Returns (results, indices, julian_days,
+    lats, lons): results has {"error": ...} for each record that failed and
+    None elsewhere, and the other four describe the records that parsed,
+    julian_days as a NumPy array.
     """
-    message_lower = message.lower()
-    
-    # Check if planetary data is requested
-    if any(word in message_lower for word in ['planet', 'position', 'where']):
-        return {
-            "id": datetime.datetime.now().timestamp(),
-            "content": f"Here are your planetary positions based on Vedic astrology:",
-            "sender": "ai",
-            "timestamp": datetime.datetime.now().isoformat(),
-            "type": "planetary",
-            "planetaryData": birth_chart.get('planets', [])
-        }
-    
-    # Check if this is about specific planets
-    for planet in PLANETS:
-        if planet.lower() in message_lower:
-            # Find the planet in the birth chart
-            planet_info = None
-            for p in birth_chart.get('planets', []):
-                if p['planet'].lower() == planet.lower():
-                    planet_info = p
-                    break
-            
-            if planet_info:
-                return generate_planet_insight(planet_info)
-    
-    # Check if this is about houses
-    for i in range(1, 13):
-        house_patterns = [f"{i}th house", f"{i} house", f"house {i}"]
-        if any(pattern in message_lower for pattern in house_patterns):
-            # Find the house in the birth chart
-            house_info = None
-            for h in birth_chart.get('houses', []):
-                if h['number'] == i:
-                    house_info = h
-                    break
-            
-            if house_info:
-                return generate_house_insight(house_info)
+    import numpy as np
+    results = [None] * len(records)
+    
+    indices, datetimes, lats, lons = [], [], [], []
+    for i, record in enumerate(records):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            birth_datetime, lat, lon = parse_birth_record(record)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+            continue
+        indices.append(i)
+        if birth_datetime.tzinfo is not None:
+            birth_datetime = birth_datetime.astimezone(datetime.timezone.utc)
+        datetimes.append(birth_datetime.replace(tzinfo=None))
+        lats.append(lat)
+        lons.append(lon)
+    
+    # Julian day (UT) straight from the epoch offset: JD 2440587.5 is 1970-01-01T00:00
+    stamps = np.array(datetimes, dtype='datetime64[us]').astype(np.int64)
+    julian_days = stamps / 86400e6 + 2440587.5
+    return results, indices, julian_days, lats, lons
+
+def calculate_vedic_birth_charts(records):
+    """
+    Calculate Vedic birth charts for a list of birth records in one pass.
     
-    # Check for remedies
-    if any(word in message_lower for word in ['remedy', 'solution', 'fix', 'improve']):
-        return generate_remedies(birth_chart)
+    Julian days, ascendants and planet longitudes are gathered
+    into NumPy arrays so sign and house assignment is vectorized across the
+    whole batch. Returns one entry per record in input order: the ChartRecord,
+    or {"error": ...} for records that could not be parsed or computed.
+    """
+    from chart_backends import compute_charts
+    results, indices, julian_days, lats, lons = parse_birth_records(records)
+    if not indices:
+        return results
+    
+    if services.chart_pool is not None and len(indices) > services.chart_pool.chunk_size:
+        charts = services.chart_pool.map_chunks(compute_charts, julian_days, lats, lons)
+    else:
+        charts = compute_charts(julian_days, lats, lons)
+    
+    for i, chart in zip(indices, charts):
+        results[i] = chart
+    
+    return results
+
+def generate_mock_birth_chart(birth_details=None):
+    """
+    Generate mock birth chart data when real calculation fails or for testing.
+    The chart is chart-consistent and seeded from the birth details, so the
+    same details always get the same mock chart.
+    """
+    from synthetic import SyntheticWorkload
+    seed = zlib.crc32(json.dumps(birth_details, sort_keys=True, default=str).encode())
+    return SyntheticWorkload(seed).mock_chart()
+
+def generate_astrology_insight(message, session):
+    """
+    Generate astrology insights based on the message and a ChartSession.
+    This is a simple rule-based system. In production, you would use a 
+    more sophisticated AI model trained on Vedic astrology.
     
-    # Check for general chart analysis or career
-    if any(word in message_lower for word in ['career', 'profession', 'job', 'work']):
-        return generate_career_insight(birth_chart)
+    Answers are cached per routed intent and chart (response_cache.py);
+    the id and timestamp are stamped on each response after the lookup.
+    """
+    from intent_router import route_message
+    from response_cache import response_key
+    with span("insight.route"):
+        match = route_message(message)
+        key = response_key(match, session)
     
-    if any(word in message_lower for word in ['relationship', 'marriage', 'love', 'partner']):
-        return generate_relationship_insight(birth_chart)
+    def render():
+        with span("insight.render"):
+            return render_insight(match, session)
     
-    if any(word in message_lower for word in ['health', 'medical', 'wellbeing']):
-        return generate_health_insight(birth_chart)
+    body = services.chat_responses.get(key, render)
+    now = datetime.datetime.now()
+    return dict(body, id=now.timestamp(), timestamp=now.isoformat())
+
+def render_insight(match, session):
+    """Answer a routed message from the session's chart."""
+    birth_chart = session.chart
     
-    if any(word in message_lower for word in ['finance', 'money', 'wealth', 'financial']):
-        return generate_finance_insight(birth_chart)
+    # Intents come ranked; fall through when the chart lacks the entity asked about
+    for intent in match.intents:
+        if intent == 'planetary':
+            return {
+                "content": services.interpretations.planetary,
+                "sender": "ai",
+                "type": "planetary",
+                "planetaryData": birth_chart.get('planets', [])
+            }
+        
+        if intent == 'planet':
+            planet = next((p for p in match.planets if p in session.planets), None)
+            if planet:
+                return generate_planet_insight(session.planets[planet])
+        
+        elif intent == 'house':
+            house_info = session.houses.get(match.house)
+            if house_info:
+                return generate_house_insight(house_info)
+        
+        elif intent == 'remedy':
+            return generate_remedies(birth_chart, chart_strength(session))
+        
+        else:
+            return generate_topic_insight(intent, chart_strength(session))
     
     # Default general analysis
     return generate_general_chart_analysis(birth_chart)
 
+def chart_strength(session):
+    """The session chart's Ashtakavarga and Shadbala, or None for a chart without planets."""
+    if len(session.planets) < 9 or session.ascendant is None:
+        return None
+    with span("insight.strength"):
+        return services.chart_strength.get(session.chart)
+
 def generate_planet_insight(planet_info):
     """Generate insight for a specific planet."""
+    from intent_router import ordinal
     planet = planet_info['planet']
     house = planet_info['house']
     sign = planet_info['sign']
     
-    insights = {
-        "Sun": f"Your Sun in {sign} in the {house}th house indicates {get_sun_insight(sign, house)}",
-        "Moon": f"Your Moon in {sign} in the {house}th house suggests {get_moon_insight(sign, house)}",
-        "Mercury": f"Mercury in {sign} in the {house}th house shows {get_mercury_insight(sign, house)}",
-        "Venus": f"Venus in {sign} in the {house}th house indicates {get_venus_insight(sign, house)}",
-        "Mars": f"Mars in {sign} in the {house}th house suggests {get_mars_insight(sign, house)}",
-        "Jupiter": f"Jupiter in {sign} in the {house}th house shows {get_jupiter_insight(sign, house)}",
-        "Saturn": f"Saturn in {sign} in the {house}th house indicates {get_saturn_insight(sign, house)}",
-        "Rahu": f"Rahu (North Node) in {sign} in the {house}th house suggests {get_rahu_insight(sign, house)}",
-        "Ketu": f"Ketu (South Node) in {sign} in the {house}th house shows {get_ketu_insight(sign, house)}"
-    }
-    
-    content = insights.get(planet, f"{planet} in {sign} in the {house}th house influences your life in various ways.")
+    content = services.interpretations.planet_text(planet, sign, house) or \
+        f"{planet} in {sign} in the {ordinal(house)} house influences your life in various ways."
     
     return {
-        "id": datetime.datetime.now().timestamp(),
         "content": content,
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
-
-# Helper functions to generate insights
-def get_sun_insight(sign, house):
-    insights = {
-        1: "strong leadership qualities and self-confidence.",
-        2: "material security is important to your identity.",
-        3: "strong communication skills and intellectual curiosity.",
-        4: "a strong connection to home and family matters.",
-        5: "creative self-expression and possibly children are central to your identity.",
-        6: "service to others and health matters are important to you.",
-        7: "relationships and partnerships are central to your sense of self.",
-        8: "transformation and deep psychological understanding.",
-        9: "a philosophical nature and interest in higher learning or spirituality.",
-        10: "career ambitions and public recognition are important to you.",
-        11: "social connections and humanitarian ideals shape your identity.",
-        12: "spiritual growth and working behind the scenes."
+        "sender": "ai"
     }
-    return insights.get(house, "various influences on your personality and life path.")
-
-# Add similar functions for other planets
-def get_moon_insight(sign, house):
-    insights = {
-        1: "emotional sensitivity and your feelings are openly expressed.",
-        2: "emotional security is tied to material possessions.",
-        3: "your emotions are intellectualized and you communicate your feelings well.",
-        4: "deep emotional connection to home and family.",
-        5: "emotional fulfillment through creativity and children.",
-        6: "emotional satisfaction through service and helping others.",
-        7: "emotional fulfillment through relationships and partnerships.",
-        8: "deep emotional transformations and psychological insights.",
-        9: "emotional connection to philosophy, higher learning or spirituality.",
-        10: "emotional fulfillment through career achievements.",
-        11: "emotional connection to friends and social groups.",
-        12: "rich inner emotional life and spiritual sensitivity."
-    }
-    return insights.get(house, "various emotional patterns in your life.")
-
-# Add similar functions for other planets and for houses
-
-def get_mercury_insight(sign, house):
-    # Simple placeholder
-    return "particular communication and thinking patterns."
-
-def get_venus_insight(sign, house):
-    # Simple placeholder
-    return "specific patterns in relationships and what you value."
-
-def get_mars_insight(sign, house):
-    # Simple placeholder
-    return "how you assert yourself and your energy patterns."
-
-def get_jupiter_insight(sign, house):
-    # Simple placeholder
-    return "areas of growth, expansion and wisdom in your life."
-
-def get_saturn_insight(sign, house):
-    # Simple placeholder
-    return "areas of limitation, responsibility and life lessons."
-
-def get_rahu_insight(sign, house):
-    # Simple placeholder
-    return "desires and obsessions that drive your soul's growth."
-
-def get_ketu_insight(sign, house):
-    # Simple placeholder
-    return "areas of detachment and spiritual evolution."
 
 def generate_house_insight(house_info):
-    # Simple placeholder
+    """Generate insight for a house and the planets in it."""
+    from intent_router import ordinal
     house_num = house_info['number']
     sign = house_info['sign']
-    planets = house_info['planets']
-    
-    planet_names = [p['planet'] for p in planets]
-    planets_text = ", ".join(planet_names) if planet_names else "no planets"
-    
-    house_meanings = {
-        1: "physical appearance, personality, and how others see you",
-        2: "possessions, values, and financial matters",
-        3: "communication, siblings, and short journeys",
-        4: "home, family, and emotional foundation",
-        5: "creativity, children, romance, and pleasure",
-        6: "health, daily routine, and service to others",
-        7: "partnerships, marriage, and open enemies",
-        8: "transformation, joint resources, and the occult",
-        9: "higher education, long journeys, and philosophy",
-        10: "career, public standing, and authority",
-        11: "friends, groups, and hopes and wishes",
-        12: "spiritual growth, hidden matters, and self-undoing"
-    }
-    
-    house_meaning = house_meanings.get(house_num, "various aspects of your life")
-    
-    content = f"Your {house_num}th house is in {sign} with {planets_text}. This house represents {house_meaning}."
+    planet_names = [p['planet'] for p in house_info['planets']]
     
-    if planets:
-        content += f" The presence of {', '.join(planet_names)} here emphasizes and influences these areas of your life."
+    content = services.interpretations.house_text(house_num, sign, planet_names) or \
+        f"Your {ordinal(house_num)} house is in {sign}."
     
     return {
-        "id": datetime.datetime.now().timestamp(),
         "content": content,
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
+        "sender": "ai"
     }
 
-def generate_remedies(birth_chart):
-    # Simple placeholder for remedies
-    planets = birth_chart.get('planets', [])
-    
-    # Check for challenging placements (very simplified)
-    challenging_planets = []
-    for planet in planets:
-        # In real astrology, this would be much more sophisticated
-        if planet['planet'] in ['Saturn', 'Mars', 'Rahu', 'Ketu']:
-            challenging_planets.append(planet['planet'])
-    
-    remedies = []
-    if 'Saturn' in challenging_planets:
-        remedies.append("For Saturn: Wear a blue sapphire (neelam) on your middle finger on Saturday during Shani hora. Recite Shani mantras and donate black items on Saturdays.")
-    
-    if 'Mars' in challenging_planets:
-        remedies.append("For Mars: Wear a red coral (moonga) on your ring finger on Tuesday morning. Recite Hanuman Chalisa and Mars mantras. Donate red lentils on Tuesdays.")
-    
-    if 'Rahu' in challenging_planets:
-        remedies.append("For Rahu: Wear a hessonite (gomed) on your middle finger. Feed crows and donate dark blue or black items. Recite Durga mantras for protection.")
-    
-    if 'Ketu' in challenging_planets:
-        remedies.append("For Ketu: Wear a cat's eye (lehsunia) gemstone. Donate mixed grains to birds. Practice meditation and spiritual disciplines.")
-    
-    # General remedies
-    general_remedies = [
-        "Regular meditation and yoga practice helps balance planetary energies.",
-        "Recite the Gayatri mantra daily for overall spiritual protection.",
-        "Perform charity or seva (selfless service) to mitigate challenging planetary influences."
-    ]
-    
-    if not remedies:
-        remedies = general_remedies
-    else:
-        remedies.extend(general_remedies)
+def generate_remedies(birth_chart, strength=None):
+    """Recommend remedies from the rules matching the chart's placements and weak planets."""
+    placements = [(p['planet'], p['sign'], p['house']) for p in birth_chart.get('planets', [])]
+    weak = strength.weak if strength is not None else ()
     
     return {
-        "id": datetime.datetime.now().timestamp(),
-        "content": "Based on your Vedic birth chart, I recommend the following remedies:\n\n• " + "\n\n• ".join(remedies),
+        "content": services.interpretations.remedies_text(placements, weak),
         "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat(),
         "type": "remedy"
     }
 
 def generate_general_chart_analysis(birth_chart):
-    # Placeholder for general analysis
+    """Overview from the ascendant and the Sun and Moon placements."""
     ascendant = birth_chart.get('ascendant', 'unknown sign')
     
-    response = f"Your Vedic astrology chart has {ascendant} rising, which indicates "
-    
-    ascendant_traits = {
-        "Aries": "a dynamic and assertive personality with leadership qualities.",
-        "Taurus": "a grounded, practical and patient approach to life with an appreciation for beauty and comfort.",
-        "Gemini": "an intellectually curious and communicative nature with versatile interests.",
-        "Cancer": "an emotionally sensitive nature with strong nurturing instincts and attachment to home and family.",
-        "Leo": "a confident, creative and dignified personality with a need for recognition.",
-        "Virgo": "an analytical, detail-oriented and service-minded approach to life.",
-        "Libra": "a diplomatic and partnership-oriented nature with an appreciation for harmony and beauty.",
-        "Scorpio": "an intense, passionate and transformative personality with deep psychological insight.",
-        "Sagittarius": "an optimistic, philosophical and freedom-loving nature with interest in expanding horizons.",
-        "Capricorn": "an ambitious, disciplined and responsible personality focused on achievement.",
-        "Aquarius": "an innovative, independent and humanitarian nature with unique thinking patterns.",
-        "Pisces": "a compassionate, imaginative and spiritually sensitive personality with intuitive gifts."
-    }
-    
-    response += ascendant_traits.get(ascendant, "unique personality traits and life patterns.")
+    response = services.interpretations.ascendant_text(ascendant) or \
+        f"Your Vedic astrology chart has {ascendant} rising, which indicates unique personality traits and life patterns."
     
-    # Add a few more insights
-    planets = birth_chart.get('planets', [])
-    for planet in planets:
-        if planet['planet'] == 'Moon':
-            response += f"\n\nYour Moon is in {planet['sign']} in the {planet['house']}th house, indicating your emotional nature and mind."
-        elif planet['planet'] == 'Sun':
-            response += f"\n\nYour Sun is in {planet['sign']} in the {planet['house']}th house, showing your core identity and vitality."
+    for planet in birth_chart.get('planets', []):
+        response += services.interpretations.general_line(planet['planet'], planet['sign'], planet['house']) or ""
     
     return {
-        "id": datetime.datetime.now().timestamp(),
         "content": response,
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
-
-def generate_career_insight(birth_chart):
-    # Simple placeholder for career insights
-    return {
-        "id": datetime.datetime.now().timestamp(),
-        "content": "Your career path is influenced by multiple factors in your Vedic chart, particularly the 10th house, its ruler, and planets like Sun, Saturn and Jupiter. Based on your chart pattern, you may excel in fields that require analytical thinking, problem-solving abilities, and helping others.",
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
+        "sender": "ai"
     }
 
-def generate_relationship_insight(birth_chart):
-    # Simple placeholder for relationship insights
+def generate_topic_insight(topic, strength=None):
+    """Answer a topic intent (career, relationship, health, finance), from chart strength where it applies."""
     return {
-        "id": datetime.datetime.now().timestamp(),
-        "content": "Your relationship patterns are primarily shown by Venus, the 7th house, and the Moon in your Vedic chart. Your chart indicates you value intellectual connection and communication in relationships, and you seek a partner who can engage with you on multiple levels.",
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
-
-def generate_health_insight(birth_chart):
-    # Simple placeholder for health insights
-    return {
-        "id": datetime.datetime.now().timestamp(),
-        "content": "Health in Vedic astrology is seen through the 1st, 6th, and 8th houses, along with planets like Sun and Saturn. Your chart suggests paying attention to digestive health and stress management. Regular physical activity and mindfulness practices would be beneficial for your constitution.",
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
+        "content": services.interpretations.topic_text(topic, strength),
+        "sender": "ai"
     }
 
-def generate_finance_insight(birth_chart):
-    # Simple placeholder for financial insights
-    return {
-        "id": datetime.datetime.now().timestamp(),
-        "content": "Financial matters in your chart are governed by the 2nd, 11th houses and planets like Venus and Jupiter. Your chart indicates potential for steady income through multiple sources, with periods of financial growth especially during Jupiter's favorable transits.",
-        "sender": "ai",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
+app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,63 @@
+"""
+Throughput benchmark: per-record calculate_vedic_birth_chart vs the
+vectorized calculate_vedic_birth_charts batch path.
+
+Usage:
+    python benchmarks/bench_batch_charts.py [--records 10000] [--seed 42]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import calculate_vedic_birth_chart, calculate_vedic_birth_charts, parse_birth_record
+
+
+def make_records(count, seed):
+    rng = random.Random(seed)
+    start = datetime.datetime(1950, 1, 1)
+    records = []
+    for _ in range(count):
+        birth = start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 365 * 60))
+        records.append({
+            "date": birth.isoformat() + "Z",
+            "lat": rng.uniform(-60, 60),
+            "lon": rng.uniform(-180, 180),
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    records = make_records(args.records, args.seed)
+
+    start = time.perf_counter()
+    single = [calculate_vedic_birth_chart(*parse_birth_record(r)) for r in records]
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = calculate_vedic_birth_charts(records)
+    batch_elapsed = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for a, b in zip(single, batch)
+        if (a.ascendant_sign, a.signs, a.houses) != (b.ascendant_sign, b.signs, b.houses)
+    )
+
+    print(f"records:     {args.records}")
+    print(f"per-record:  {single_elapsed:.3f}s  {args.records / single_elapsed:,.0f} charts/s")
+    print(f"batch:       {batch_elapsed:.3f}s  {args.records / batch_elapsed:,.0f} charts/s")
+    print(f"speedup:     {single_elapsed / batch_elapsed:.2f}x")
+    print(f"mismatches:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
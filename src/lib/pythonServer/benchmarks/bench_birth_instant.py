@@ -0,0 +1,83 @@
+"""
+Microbenchmark for birth instant resolution (date + time + place -> UTC).
+
+Compares the memoized BirthInstantResolver against a naive per-request
+pytz.timezone(...).localize(...) path, for both geocoded places (zone known)
+and raw coordinates (zone from the nearest-place grid).
+
+Usage:
+    python benchmarks/bench_birth_instant.py [--records 50000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from birth_instant import BirthInstantResolver
+from geocoder import load_gazetteer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def make_records(gazetteer, count, rng):
+    records = []
+    for _ in range(count):
+        place = gazetteer.place(rng.randrange(len(gazetteer)))
+        day = datetime.date(1930, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 90))
+        records.append({
+            "date": day.isoformat(),
+            "time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            # Jitter so coordinate lookups are not all cache hits
+            "lat": place["lat"] + rng.uniform(-0.5, 0.5),
+            "lon": place["lon"] + rng.uniform(-0.5, 0.5),
+            "timezone": place["timezone"],
+        })
+    return records
+
+
+def naive_resolve(record):
+    zone = pytz.timezone(record["timezone"])
+    local = datetime.datetime.fromisoformat(f"{record['date']}T{record['time']}")
+    return zone.localize(local).astimezone(pytz.utc)
+
+
+def run(label, fn, records):
+    samples = []
+    for record in records:
+        start = time.perf_counter()
+        fn(record)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    print(f"{label:<28} p50 {samples[len(samples) // 2] * 1e6:6.1f} us   "
+          f"p99 {samples[int(len(samples) * 0.99)] * 1e6:6.1f} us   "
+          f"{len(records) / total:,.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    gazetteer = load_gazetteer(os.path.join(DATA_DIR, 'gazetteer.tsv'), os.path.join(DATA_DIR, 'gazetteer.idx'))
+    resolver = BirthInstantResolver(gazetteer)
+    records = make_records(gazetteer, args.records, random.Random(args.seed))
+
+    run("pytz localize (naive)", naive_resolve, records)
+    run("resolver, known zone", lambda r: resolver.resolve(
+        r["date"], r["time"], r["lat"], r["lon"], r["timezone"]), records)
+    run("resolver, coords (cold)", lambda r: resolver.resolve(
+        r["date"], r["time"], r["lat"], r["lon"]), records)
+    run("resolver, coords (warm)", lambda r: resolver.resolve(
+        r["date"], r["time"], r["lat"], r["lon"]), records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Chart backend benchmark: cold start, per-chart latency and batch throughput
+of each chart backend (see chart_backends.py), checking that single and
+batch charts agree, then how far each backend's positions are from
+swisseph's: the largest planet and ascendant differences and the number of
+charts with a planet or the ascendant in a different sign.
+
+Backends whose library is not installed (jyotishyam is optional) are
+reported and skipped.
+
+Also reports how far swisseph's sidereal mode (FLG_SIDEREAL, used by the
+backends) is from the old tropical-minus-ayanamsa arithmetic. The two
+differ by nutation in longitude, up to about 19 arcsec.
+
+Usage:
+    python benchmarks/bench_chart_backends.py [--charts 2000] [--seed 42]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import swisseph as swe
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from chart_backends import BACKENDS, create_backend
+from ephemeris import GRAHA_IDS, PLANETS, SIDEREAL_FLAGS, sidereal_ascendant
+
+
+def cold_start(name, statement):
+    """Seconds for a fresh interpreter to run statement with the backend configured."""
+    env = dict(os.environ, CHART_BACKEND=name)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', statement], cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - started
+    return elapsed if result.returncode == 0 else None
+
+
+def arcsec(a, b):
+    return abs((a - b + 180) % 360 - 180) * 3600
+
+
+def compare(reference, charts):
+    """(max planet difference, max ascendant difference in arcsec, charts with a sign differing, failures)."""
+    planets, ascendants, differing, failed = 0.0, 0.0, 0, 0
+    for expected, chart in zip(reference, charts):
+        if isinstance(chart, dict) or isinstance(expected, dict):
+            failed += 1
+            continue
+        planets = max(planets, max(arcsec(chart.longitude(i), expected.longitude(i)) for i in range(len(PLANETS))))
+        ascendants = max(ascendants, arcsec(chart.ascendant_sign * 30 + chart.ascendant_degrees,
+                                            expected.ascendant_sign * 30 + expected.ascendant_degrees))
+        differing += (chart.ascendant_sign != expected.ascendant_sign or list(chart.signs) != list(expected.signs))
+    return planets, ascendants, differing, failed
+
+
+def legacy_difference(julian_days, lats, lons):
+    """Max |FLG_SIDEREAL - (tropical - ayanamsa)| in arcsec, for planets and ascendant."""
+    planets, ascendants = 0.0, 0.0
+    for jd, lat, lon in zip(julian_days.tolist(), lats, lons):
+        ayanamsa = swe.get_ayanamsa(jd)
+        for planet_id in GRAHA_IDS:
+            old = swe.calc_ut(jd, planet_id)[0][0] - ayanamsa
+            new = swe.calc_ut(jd, planet_id, SIDEREAL_FLAGS)[0][0]
+            planets = max(planets, arcsec(new, old))
+        old = swe.houses(jd, lat, lon)[0][0] - ayanamsa
+        ascendants = max(ascendants, arcsec(sidereal_ascendant(jd, lat, lon), old))
+    return planets, ascendants
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--charts', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    julian_days = rng.uniform(2415020.5, 2469807.5, args.charts)  # 1900-2050
+    lats = rng.uniform(-60, 60, args.charts).tolist()
+    lons = rng.uniform(-180, 180, args.charts).tolist()
+
+    print(f"{'backend':<12} {'cold start':>11} {'app import':>11} {'per chart':>10} {'batch':>12}")
+    results = {}
+    for name in BACKENDS:
+        try:
+            backend = create_backend(name)
+        except ImportError as e:
+            print(f"{name:<12} not installed ({e})")
+            continue
+        backend_start = cold_start(name, "import chart_backends; chart_backends.get_backend()")
+        app_start = cold_start(name, "import app")
+
+        started = time.perf_counter()
+        single = []
+        for jd, lat, lon in zip(julian_days.tolist(), lats, lons):
+            try:
+                single.append(backend.compute(jd, lat, lon))
+            except Exception as e:
+                single.append({"error": str(e)})
+        per_chart = (time.perf_counter() - started) / args.charts
+
+        started = time.perf_counter()
+        batch = backend.compute_many(julian_days, lats, lons)
+        batch_rate = args.charts / (time.perf_counter() - started)
+
+        assert single == batch, f"{name}: single and batch charts differ"
+        results[name] = batch
+        app_text = f"{app_start:>10.2f}s" if app_start is not None else f"{'failed':>11}"
+        print(f"{name:<12} {backend_start:>10.2f}s {app_text} {per_chart * 1e6:>8.1f}us {batch_rate:>9,.0f}/s")
+
+    for name, charts in results.items():
+        if name == 'swisseph':
+            continue
+        planets, ascendants, differing, failed = compare(results['swisseph'], charts)
+        print(f"{name} vs swisseph: planets {planets:.1f}\", ascendant {ascendants:.1f}\" max; "
+              f"{differing} of {args.charts} charts with a different sign, {failed} failed")
+
+    planets, ascendants = legacy_difference(julian_days[:500], lats[:500], lons[:500])
+    print(f"FLG_SIDEREAL vs tropical - ayanamsa: planets {planets:.1f}\", ascendant {ascendants:.1f}\" max")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Chart model benchmark: nested chart dicts serialized with json (the old
+path, as jsonify does) against ChartRecords and encode_chart, in the full
+and compact shapes.
+
+Reports memory per cached chart (tracemalloc), build and serialize latency
+per chart, allocations per response, and response bytes.
+
+Usage:
+    python benchmarks/bench_chart_model.py [--charts 5000] [--seed 42]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_model import ChartRecord, encode_chart, orjson
+
+
+def make_columns(count, seed):
+    rng = np.random.default_rng(seed)
+    ascendants = rng.integers(0, 12, count)
+    longitudes = rng.uniform(0, 360, (count, 9))
+    signs = (longitudes // 30).astype(np.int64)
+    houses = (signs - ascendants[:, None]) % 12 + 1
+    return [(int(a), s.tolist(), h.tolist(), (l % 30).tolist(), float(l[0] % 30))
+            for a, s, h, l in zip(ascendants, signs, houses, longitudes)]
+
+
+def per_chart(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def retained(fn, items):
+    """Bytes still allocated per item after building all of them."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [fn(item) for item in items]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / len(items)
+
+
+def peak(fn, item, repeat=200):
+    """Peak bytes allocated while producing one response."""
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(item)
+        top = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return top
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--charts', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    columns = make_columns(args.charts, args.seed)
+    records = [ChartRecord(*c) for c in columns]
+    dicts = [r.to_dict() for r in records]
+
+    # The old path builds the dicts and json-encodes them; the new one builds
+    # a record and writes the JSON text directly
+    def dict_response(c):
+        return json.dumps(ChartRecord(*c).to_dict(), separators=(',', ':'))
+
+    def full_response(c):
+        return encode_chart(ChartRecord(*c))
+
+    def compact_response(c):
+        return encode_chart(ChartRecord(*c), compact=True)
+
+    rows = [
+        ("dict + json", dicts, lambda c: ChartRecord(*c).to_dict(), dict_response,
+         lambda i: json.dumps(dicts[i], separators=(',', ':'))),
+        ("record full", records, lambda c: ChartRecord(*c), full_response, lambda i: encode_chart(records[i])),
+        ("record compact", records, lambda c: ChartRecord(*c), compact_response,
+         lambda i: encode_chart(records[i], compact=True)),
+    ]
+
+    print(f"charts: {args.charts}   encoder: {'orjson' if orjson else 'json'}")
+    print(f"{'model':<16} {'memory':>9} {'build':>9} {'encode':>9} {'response':>9} {'peak':>9} {'bytes':>7}")
+    for name, charts, build, respond, encode in rows:
+        memory = retained(build, columns)
+        build_cost = per_chart(build, columns)
+        encode_cost = per_chart(encode, range(len(charts)))
+        respond_cost = per_chart(respond, columns)
+        size = np.mean([len(encode(i)) for i in range(min(len(charts), 1000))])
+        print(f"{name:<16} {memory:>8.0f}B {build_cost * 1e6:>7.1f}us {encode_cost * 1e6:>7.1f}us "
+              f"{respond_cost * 1e6:>7.1f}us {peak(respond, columns[0]):>8.0f}B {size:>7.0f}")
+
+    # The full shape must be exactly what the dicts serialize to
+    assert all(json.loads(encode_chart(r)) == d for r, d in zip(records[:1000], dicts))
+
+
+if __name__ == "__main__":
+    main()
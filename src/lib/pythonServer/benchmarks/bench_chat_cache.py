@@ -0,0 +1,119 @@
+"""
+Chat response cache benchmark: /chat throughput and latency for a mix of
+quick-reply questions over a few stored charts, with the response cache off
+and on, the cost of generate_astrology_insight alone, then a burst of
+concurrent identical requests to show coalescing.
+
+Requests go through the Flask test client with chart IDs, so routing,
+session lookup and JSON encoding are included; there is no network.
+
+Usage:
+    python benchmarks/bench_chat_cache.py [--charts 20] [--requests 5000] [--clients 16]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import SyntheticWorkload
+
+BASE = '/vedic_astrology_project/script/'
+
+# Canned questions, as sent by quick-reply buttons
+QUICK_REPLIES = [
+    "What does my chart say about my career?",
+    "How are my finances looking?",
+    "What about my health?",
+    "Tell me about my relationships",
+    "What remedies do you suggest?",
+    "Show my planetary positions",
+    "Tell me about my Moon",
+    "What is in my 7th house?",
+]
+
+
+def run(client, requests):
+    """(requests/s, p50 ms, p99 ms) for sequential requests."""
+    latencies = []
+    started = time.perf_counter()
+    for body in requests:
+        request_started = time.perf_counter()
+        response = client.post(BASE + 'chat', json=body)
+        response.get_data()
+        latencies.append(time.perf_counter() - request_started)
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return len(requests) / wall, statistics.median(latencies) * 1000, latencies[int(0.99 * (len(latencies) - 1))] * 1000
+
+
+def insight_cost(api, requests):
+    """Microseconds per generate_astrology_insight call, without the HTTP layer."""
+    calls = [(body["message"], api.services.chat_sessions.get(body["chartId"])) for body in requests]
+    started = time.perf_counter()
+    for message, session in calls:
+        api.generate_astrology_insight(message, session)
+    return (time.perf_counter() - started) / len(calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--charts', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=16, help="concurrent identical requests")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    import app as api
+    from response_cache import ResponseCache
+
+    client = api.app.test_client()
+    workload = SyntheticWorkload(args.seed)
+    chart_ids = []
+    for record in workload.birth_records(args.charts):
+        response = client.post(BASE + 'generate-birth-chart', json=record)
+        chart_ids.append(response.get_json()["chartId"])
+    rng = random.Random(args.seed)
+    requests = [{"chartId": rng.choice(chart_ids), "message": rng.choice(QUICK_REPLIES)} for _ in range(args.requests)]
+
+    print(f"{args.requests} requests: {len(QUICK_REPLIES)} questions x {args.charts} charts")
+    for name, cache in (('cache off', ResponseCache(max_size=0)), ('cache on', ResponseCache())):
+        api.services.chat_responses = cache
+        # Strength and the first session lookups are cached outside the response cache; exclude them
+        run(client, [{"chartId": chart_id, "message": "How is my career?"} for chart_id in chart_ids])
+        rate, p50, p99 = run(client, requests)
+        print(f"  {name:<10} {rate:>8.0f} req/s  p50 {p50:>6.3f} ms  p99 {p99:>6.3f} ms"
+              f"  insight {insight_cost(api, requests):>6.1f} us/call")
+    stats = api.services.chat_responses.stats()
+    print(f"  hit ratio {stats['hitRatio']:.3f}, saved {stats['savedCpuSeconds'] * 1000:.1f} ms CPU, "
+          f"{stats['size']} bodies in {stats['bytes'] / 1024:.1f} KiB")
+
+    # Identical requests arriving together; render is slowed so they overlap
+    api.services.chat_responses = ResponseCache()
+    render_insight = api.render_insight
+
+    def slow_render(match, session):
+        time.sleep(0.05)
+        return render_insight(match, session)
+
+    api.render_insight = slow_render
+    body = {"chartId": chart_ids[0], "message": QUICK_REPLIES[0]}
+    threads = [threading.Thread(target=lambda: client.post(BASE + 'chat', json=body).get_data())
+               for _ in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    api.render_insight = render_insight
+    stats = api.services.chat_responses.stats()
+    print(f"\n  {args.clients} concurrent identical requests in {(time.perf_counter() - started) * 1000:.0f} ms: "
+          f"{stats['misses']} computed, {stats['coalesced']} coalesced")
+
+
+if __name__ == "__main__":
+    main()
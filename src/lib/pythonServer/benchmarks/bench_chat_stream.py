@@ -0,0 +1,133 @@
+"""
+Streaming chat benchmark, offline: time to first token and tokens/s on
+/chat/stream for the rule-based backend and the stub model backend.
+
+    rules          the rule-based responder, streamed
+    stub cold      a new chart per request, so every prompt is prefilled in full
+    stub warm      one chart with varied questions, so the chart context
+                   prefix is cached (by the service and by the stub)
+    identical      --clients concurrent requests with the same question,
+                   coalesced onto one generation
+    distinct       --clients concurrent requests with different questions,
+                   limited to --max-concurrent generations; the rest wait up
+                   to --queue-wait and then fall back to the rules backend
+
+Requests go through the Flask test client, so routing, JSON and event
+framing are included; there is no network.
+
+Usage:
+    python benchmarks/bench_chat_stream.py [--requests 20] [--clients 16] [--token-rate 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import SyntheticWorkload
+
+STREAM_URL = '/vedic_astrology_project/script/chat/stream'
+
+
+def timed_stream(client, body):
+    """(time to first token, seconds, tokens, backend) for one streamed answer."""
+    started = time.perf_counter()
+    response = client.post(STREAM_URL, json=body, buffered=False)
+    first_token = None
+    tokens = 0
+    backend = None
+    for line in response.response:
+        if b'"type": "token"' in line:
+            tokens += 1
+            if first_token is None:
+                first_token = time.perf_counter() - started
+        elif b'"type": "meta"' in line:
+            backend = line.split(b'"backend": "')[1].split(b'"')[0].decode()
+    response.close()
+    return first_token, time.perf_counter() - started, tokens, backend
+
+
+def report(name, results, wall=None):
+    first_tokens = sorted(r[0] for r in results)
+    tokens = sum(r[2] for r in results)
+    per_stream = statistics.median(r[2] / max(r[1] - r[0], 1e-9) for r in results)
+    backends = sorted({r[3] for r in results})
+    line = (f"  {name:<12} ttft p50 {statistics.median(first_tokens) * 1000:>7.1f} ms"
+            f"  p95 {first_tokens[int(0.95 * (len(first_tokens) - 1))] * 1000:>7.1f} ms"
+            f"  {per_stream:>8.0f} tok/s/stream")
+    if wall is not None:
+        line += f"  {tokens / wall:>8.0f} tok/s total"
+    print(line + f"  [{', '.join(backends)}]")
+
+
+def concurrent(client, bodies):
+    results = [None] * len(bodies)
+
+    def run(i):
+        results[i] = timed_stream(client, bodies[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(bodies))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20, help="sequential requests per scenario")
+    parser.add_argument('--clients', type=int, default=16, help="concurrent requests")
+    parser.add_argument('--max-concurrent', type=int, default=4)
+    parser.add_argument('--queue-wait', type=float, default=0.25)
+    parser.add_argument('--prefill-rate', type=float, default=2000)
+    parser.add_argument('--token-rate', type=float, default=200)
+    parser.add_argument('--max-tokens', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Configure the service before the app creates it
+    os.environ.update(INSIGHT_BACKEND='stub', INSIGHT_STUB_PREFILL_RATE=str(args.prefill_rate),
+                      INSIGHT_STUB_TOKEN_RATE=str(args.token_rate), INSIGHT_MAX_TOKENS=str(args.max_tokens),
+                      INSIGHT_MAX_CONCURRENT=str(args.max_concurrent), INSIGHT_QUEUE_WAIT=str(args.queue_wait))
+    logging_level = os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    import app as api
+    from insight_backends import InsightService, RuleBasedBackend
+
+    client = api.app.test_client()
+    workload = SyntheticWorkload(args.seed)
+    stub_service = api.services.insight_service
+    rules = RuleBasedBackend(api.generate_astrology_insight)
+
+    print(f"stub: prefill {args.prefill_rate:g} tok/s, decode {args.token_rate:g} tok/s, "
+          f"{args.max_tokens} max tokens (log level {logging_level})")
+    chart = workload.mock_chart().to_dict()
+    messages = [message for _, message in workload.chat_messages(args.requests)]
+
+    api.services.insight_service = InsightService(rules, rules)
+    report('rules', [timed_stream(client, {"birthChart": chart, "message": message}) for message in messages])
+    api.services.insight_service = stub_service
+    report('stub cold', [timed_stream(client, {"birthChart": workload.mock_chart().to_dict(), "message": message})
+                         for message in messages])
+    report('stub warm', [timed_stream(client, {"birthChart": chart, "message": f"{message} ({i})"})
+                         for i, message in enumerate(messages)])
+
+    identical = [{"birthChart": chart, "message": "What does my chart say about my career?"}] * args.clients
+    results, wall = concurrent(client, identical)
+    report('identical', results, wall)
+    distinct = [{"birthChart": chart, "message": f"{message} ({i})"}
+                for i, (_, message) in enumerate(workload.chat_messages(args.clients))]
+    results, wall = concurrent(client, distinct)
+    report('distinct', results, wall)
+
+    stats = api.services.insight_service.stats()
+    print(f"  generations {stats['generations']}, coalesced {stats['coalesced']}, fallbacks {stats['fallbacks']}, "
+          f"prefix cache {stats['prefixHits']} hits / {stats['prefixMisses']} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput benchmark: live swisseph sidereal_positions vs the precomputed
+interpolation table, for batches of random dates.
+
+Usage:
+    python benchmarks/bench_ephemeris_table.py --table data/ephemeris_table.npy [--dates 100000]
+
+Build the table first with `python ephemeris_table.py build data/ephemeris_table.npy`.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ephemeris import live_sidereal_positions
+from ephemeris_table import EphemerisTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--table', required=True)
+    parser.add_argument('--dates', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    table = EphemerisTable(args.table)
+    rng = np.random.default_rng(args.seed)
+    julian_days = rng.uniform(table.start_jd, table.end_jd, args.dates)
+
+    start = time.perf_counter()
+    live_lons, _ = live_sidereal_positions(julian_days)
+    live_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table_lons, _ = table.sidereal_positions(julian_days)
+    table_elapsed = time.perf_counter() - start
+
+    # Single-date lookups, as on the per-record chart path
+    singles = julian_days[:min(args.dates, 10000)]
+    start = time.perf_counter()
+    for julian_day in singles:
+        live_sidereal_positions([julian_day])
+    live_single = (time.perf_counter() - start) / len(singles)
+    start = time.perf_counter()
+    for julian_day in singles:
+        table.sidereal_positions([julian_day])
+    table_single = (time.perf_counter() - start) / len(singles)
+
+    errors = np.abs((table_lons - live_lons + 180) % 360 - 180) * 3600
+
+    print(f"dates:        {args.dates}")
+    print(f"live batch:   {live_elapsed:.3f}s  {args.dates / live_elapsed:,.0f} dates/s")
+    print(f"table batch:  {table_elapsed:.3f}s  {args.dates / table_elapsed:,.0f} dates/s")
+    print(f"speedup:      {live_elapsed / table_elapsed:.1f}x")
+    print(f"single date:  live {live_single * 1e6:.1f}us  table {table_single * 1e6:.1f}us")
+    print(f"max error:    {errors.max():.3f}\"  p99 {np.percentile(errors, 99):.4f}\"")
+
+
+if __name__ == "__main__":
+    main()
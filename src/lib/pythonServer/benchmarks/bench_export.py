@@ -0,0 +1,73 @@
+"""
+Bulk export benchmark: runs export_charts.py on synthetic CSVs of growing
+size and reports throughput and the exporter's peak memory, which should
+stay flat as the input grows.
+
+Each run is a fresh process, so peak RSS is the exporter's own (workers
+are reported separately).
+
+Usage:
+    python benchmarks/bench_export.py [--rows 5000 50000] [--workers 2] [--format ndjson]
+"""
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from synthetic import SyntheticWorkload
+
+FIELDS = ['id', 'name', 'date', 'time', 'location', 'lat', 'lon', 'timezone']
+
+# Peak RSS of the exporter itself, and of its (already exited) workers
+MEASURED = r'''
+import resource, sys
+import export_charts
+export_charts.main(sys.argv[1:])
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+'''
+
+
+def write_csv(path, rows, seed):
+    workload = SyntheticWorkload(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow(dict(workload.birth_record(coordinate_share=0.3), id=i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 50000])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--format', choices=['ndjson', 'parquet'], default='ndjson')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+
+    print(f"{args.workers} workers, chunks of {args.chunk_size}, {args.format} output")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            source = os.path.join(directory, f'births-{rows}.csv')
+            write_csv(source, rows, args.seed)
+            output = os.path.join(directory, f'charts-{rows}.{args.format}')
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-c', MEASURED, source, output, '--format', args.format,
+                 '--workers', str(args.workers), '--chunk-size', str(args.chunk_size), '--progress-interval', '1e9'],
+                cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+            seconds = time.perf_counter() - started
+            exporter_kib, worker_kib = map(int, result.stdout.split())
+            print(f"  {rows:>9,} rows  {rows / seconds:>8,.0f} charts/s  {seconds:>7.1f}s"
+                  f"  peak RSS {exporter_kib / 1024:>6.1f} MiB (workers {worker_kib / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
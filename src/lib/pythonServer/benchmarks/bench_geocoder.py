@@ -0,0 +1,89 @@
+"""
+Lookup latency benchmark for the offline geocoder on a synthetic gazetteer.
+
+Generates a GeoNames-style TSV with --places entries, compiles it, then times
+index open, exact lookups, typo'd (fuzzy) lookups and autocomplete.
+
+Usage:
+    python benchmarks/bench_geocoder.py [--places 150000] [--queries 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geocoder import Gazetteer, build_index
+
+SYLLABLES = ['ka', 'ra', 'pur', 'na', 'ga', 'bad', 'li', 'vi', 'lon', 'ton', 'san',
+             'mo', 'del', 'ha', 'chan', 'di', 'ber', 'lin', 'ma', 'dra', 'sha', 'ko']
+TIMEZONES = ['Asia/Kolkata', 'Europe/London', 'America/New_York', 'Asia/Tokyo', 'Australia/Sydney']
+
+
+def make_gazetteer(path, count, rng):
+    names = []
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))).title()
+            names.append(name)
+            row = [str(i), name, name, '', f"{rng.uniform(-60, 60):.4f}", f"{rng.uniform(-180, 180):.4f}",
+                   'P', 'PPL', 'XX', '', '', '', '', '', str(rng.randint(1000, 5000000)), '', '',
+                   rng.choice(TIMEZONES), '2026-01-01']
+            f.write('\t'.join(row) + '\n')
+    return names
+
+
+def report(label, samples):
+    samples.sort()
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"{label:<14} p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def typo(name, rng):
+    i = rng.randrange(1, len(name))
+    return name[:i] + name[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--places', type=int, default=150000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tsv = os.path.join(tmp, 'gazetteer.tsv')
+        names = make_gazetteer(tsv, args.places, rng)
+
+        start = time.perf_counter()
+        meta = build_index(tsv, os.path.join(tmp, 'idx'))
+        print(f"build          {time.perf_counter() - start:8.2f} s    "
+              f"({meta['places']} places, {meta['keys']} keys)")
+
+        start = time.perf_counter()
+        gazetteer = Gazetteer(os.path.join(tmp, 'idx'))
+        print(f"open           {(time.perf_counter() - start) * 1e3:8.2f} ms")
+
+        queries = [rng.choice(names) for _ in range(args.queries)]
+        report("exact", timed(gazetteer.lookup, queries))
+        report("with country", timed(gazetteer.lookup, [q + ", XX" for q in queries]))
+        report("fuzzy", timed(gazetteer.lookup, [typo(q, rng) for q in queries[:2000]]))
+        report("autocomplete", timed(gazetteer.autocomplete, [q[:3] for q in queries]))
+
+
+if __name__ == "__main__":
+    main()
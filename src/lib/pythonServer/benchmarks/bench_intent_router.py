@@ -0,0 +1,107 @@
+"""
+Intent routing benchmark and accuracy check over a labeled corpus.
+
+Compares the compiled intent router with the keyword scan it replaced,
+reporting messages/s for both and accuracy against the labels in
+data/intent_corpus.tsv (intent, planet, house). Exits non-zero if the
+router's accuracy falls below --min-accuracy.
+
+Usage:
+    python benchmarks/bench_intent_router.py [--repeat 2000] [--min-accuracy 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ephemeris import PLANETS
+from intent_router import route_message
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'intent_corpus.tsv')
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            message, intent, planet, house = (line.rstrip('\n').split('\t') + ['', '', ''])[:4]
+            corpus.append((message, intent, planet or None, int(house) if house else None))
+    return corpus
+
+
+def legacy_route(message):
+    """The keyword scan generate_astrology_insight used before the router."""
+    message_lower = message.lower()
+    if any(word in message_lower for word in ['planet', 'position', 'where']):
+        return 'planetary', None, None
+    for planet in PLANETS:
+        if planet.lower() in message_lower:
+            return 'planet', planet, None
+    for i in range(1, 13):
+        house_patterns = [f"{i}th house", f"{i} house", f"house {i}"]
+        if any(pattern in message_lower for pattern in house_patterns):
+            return 'house', None, i
+    for intent, words in [('remedy', ['remedy', 'solution', 'fix', 'improve']),
+                          ('career', ['career', 'profession', 'job', 'work']),
+                          ('relationship', ['relationship', 'marriage', 'love', 'partner']),
+                          ('health', ['health', 'medical', 'wellbeing']),
+                          ('finance', ['finance', 'money', 'wealth', 'financial'])]:
+        if any(word in message_lower for word in words):
+            return intent, None, None
+    return 'general', None, None
+
+
+def router_route(message):
+    match = route_message(message)
+    return match.intent, match.planet, match.house
+
+
+def accuracy(route, corpus):
+    failures = []
+    for message, intent, planet, house in corpus:
+        got_intent, got_planet, got_house = route(message)
+        expected = (intent, planet if intent == 'planet' else None, house if intent == 'house' else None)
+        got = (got_intent, got_planet if got_intent == 'planet' else None, got_house if got_intent == 'house' else None)
+        if got != expected:
+            failures.append((message, expected, got))
+    return 1 - len(failures) / len(corpus), failures
+
+
+def throughput(route, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            route(message)
+    return repeat * len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--min-accuracy', type=float, default=1.0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    messages = [message for message, _, _, _ in corpus]
+
+    legacy_accuracy, _ = accuracy(legacy_route, corpus)
+    router_accuracy, failures = accuracy(router_route, corpus)
+    legacy_rate = throughput(legacy_route, messages, args.repeat)
+    router_rate = throughput(router_route, messages, args.repeat)
+
+    print(f"corpus:    {len(corpus)} labeled messages")
+    print(f"legacy:    {legacy_rate:,.0f} msg/s  accuracy {legacy_accuracy:.1%}")
+    print(f"router:    {router_rate:,.0f} msg/s  accuracy {router_accuracy:.1%}")
+    print(f"speedup:   {router_rate / legacy_rate:.2f}x")
+    for message, expected, got in failures:
+        print(f"  MISS {message!r}: expected {expected}, got {got}")
+    return 0 if router_accuracy >= args.min_accuracy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
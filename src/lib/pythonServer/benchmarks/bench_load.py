@@ -0,0 +1,208 @@
+"""
+Load benchmark: drives generate-birth-chart and chat through the Flask test
+client with a seeded synthetic workload (see synthetic.py), at one or more
+concurrency levels, and reports throughput and p50/p95/p99 latency per
+endpoint.
+
+Chat requests use chart IDs from charts generated earlier in the run. A
+share of chart requests repeat an earlier birth record, to exercise the
+chart cache the way returning users do. Each client's request sequence is
+fixed by the seed.
+
+Results are saved as JSON. Pass --baseline with an earlier results file to
+compare against it; the exit status is 1 when throughput or p95 latency
+regressed by more than --max-regression.
+
+Usage:
+    python benchmarks/bench_load.py [--concurrency 1,4,16] [--requests 2000]
+                                    [--chat-share 0.7] [--repeat-share 0.2] [--seed 42]
+                                    [--output results.json] [--baseline old.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+import app as api
+from synthetic import SyntheticWorkload, load_places
+
+BASE_PATH = '/vedic_astrology_project/script'
+ENDPOINTS = ['generate-birth-chart', 'chat']
+
+
+def summarize(latencies, errors):
+    values = np.array(latencies) * 1000
+    if not len(values):
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(values),
+        "errors": errors,
+        "meanMs": float(values.mean()),
+        "p50Ms": float(np.percentile(values, 50)),
+        "p95Ms": float(np.percentile(values, 95)),
+        "p99Ms": float(np.percentile(values, 99)),
+        "maxMs": float(values.max()),
+    }
+
+
+def run_level(concurrency, args, places, chart_ids):
+    """Run args.requests requests split across concurrency client threads."""
+    lock = threading.Lock()
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = {endpoint: 0 for endpoint in ENDPOINTS}
+
+    def client(index, count):
+        workload = SyntheticWorkload(args.seed * 1000 + concurrency * 100 + index, places)
+        client = api.app.test_client()
+        # Each client chats about the warm-up charts and its own, so the
+        # request sequence does not depend on thread scheduling
+        own_ids = list(chart_ids)
+        seen = []
+        for _ in range(count):
+            rng = workload.rng
+            if own_ids and rng.random() < args.chat_share:
+                endpoint = 'chat'
+                body = {"chartId": rng.choice(own_ids), "message": workload.chat_message()[1]}
+            else:
+                endpoint = 'generate-birth-chart'
+                repeat = seen and rng.random() < args.repeat_share
+                body = rng.choice(seen) if repeat else workload.birth_record(args.coordinate_share)
+                seen.append(body)
+            started = time.perf_counter()
+            response = client.post(f"{BASE_PATH}/{endpoint}", json=body)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[endpoint].append(elapsed)
+                if response.status_code != 200:
+                    errors[endpoint] += 1
+            if response.status_code == 200 and endpoint == 'generate-birth-chart':
+                own_ids.append(response.get_json()["chartId"])
+
+    shares = [args.requests // concurrency + (i < args.requests % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=client, args=(i, count)) for i, count in enumerate(shares)]
+    api.services.chart_cache.clear()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "seconds": elapsed,
+        "throughput": args.requests / elapsed,
+        "endpoints": {endpoint: summarize(latencies[endpoint], errors[endpoint]) for endpoint in ENDPOINTS},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Print changes against a baseline; return the regressions beyond max_regression."""
+    previous = {run["concurrency"]: run for run in baseline["runs"]}
+    regressions = []
+    print(f"\nagainst baseline {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')}):")
+    for run in results["runs"]:
+        old_run = previous.get(run["concurrency"])
+        if old_run is None:
+            continue
+        rows = [("all", "throughput", run["throughput"], old_run["throughput"], 1)]
+        for endpoint in ENDPOINTS:
+            new, old = run["endpoints"][endpoint], old_run["endpoints"].get(endpoint, {})
+            if new.get("count") and old.get("count"):
+                rows.append((endpoint, "p95Ms", new["p95Ms"], old["p95Ms"], -1))
+        for endpoint, metric, new, old, sign in rows:
+            change = (new - old) / old if old else 0.0
+            worse = -sign * change
+            flag = "  REGRESSION" if worse > max_regression else ""
+            print(f"  c={run['concurrency']:<3} {endpoint:<21} {metric:<10} {old:>9.1f} -> {new:>9.1f} "
+                  f"({change:+.1%}){flag}")
+            if flag:
+                regressions.append((run["concurrency"], endpoint, metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='1,4,16', help="comma-separated client thread counts")
+    parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--chat-share', type=float, default=0.7, help="fraction of requests that are chat")
+    parser.add_argument('--repeat-share', type=float, default=0.2,
+                        help="fraction of chart requests repeating an earlier record")
+    parser.add_argument('--coordinate-share', type=float, default=0.1,
+                        help="fraction of records with lat/lon instead of a place name")
+    parser.add_argument('--warmup', type=int, default=50, help="charts generated before measuring")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None,
+                        help="results file (default benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    args = parser.parse_args()
+
+    places = load_places()
+    chart_ids = []
+    runs = []
+    warmup = SyntheticWorkload(args.seed, places)
+    client = api.app.test_client()
+    for body in warmup.birth_records(args.warmup):
+        chart_ids.append(client.post(f"{BASE_PATH}/generate-birth-chart", json=body).get_json()["chartId"])
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        runs.append(run_level(concurrency, args, places, chart_ids))
+
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    results = {
+        "meta": {
+            "timestamp": timestamp.isoformat(timespec='seconds'),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pool": api.services.chart_pool.workers if api.services.chart_pool is not None else 0,
+            "args": vars(args),
+        },
+        "runs": runs,
+    }
+
+    print(f"{'clients':>7} {'req/s':>8} {'endpoint':<21} {'count':>6} {'errors':>6} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}")
+    for run in runs:
+        for endpoint, stats in run["endpoints"].items():
+            if stats["count"]:
+                print(f"{run['concurrency']:>7} {run['throughput']:>8.0f} {endpoint:<21} {stats['count']:>6} "
+                      f"{stats['errors']:>6} {stats['p50Ms']:>6.2f}ms {stats['p95Ms']:>6.2f}ms "
+                      f"{stats['p99Ms']:>6.2f}ms")
+
+    output = args.output or os.path.join(SERVER_DIR, 'benchmarks', 'results',
+                                         f"load-{timestamp.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Matching benchmark: scores one query chart against N candidates (100k by
+default) and picks the top K, comparing
+
+    loop        _koota_points per candidate in Python (timed on a sample)
+    table       one GUNA_TABLE lookup for all candidates (matching.guna_scores)
+    full sort   np.argsort of every score
+    top-k       np.argpartition, sorting only the K chosen (matching.top_k)
+
+plus the synastry aspects for the K matches, and match_candidates end to
+end. Candidate longitudes are uniform random, which is all the scoring
+sees; computing them from birth details is a separate, per-candidate
+ephemeris cost (see bench_batch_charts.py).
+
+Usage:
+    python benchmarks/bench_matching.py [--candidates 100000] [--k 10] [--seed 42]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matching import (KOOTA_TABLES, MOON, _koota_points, guna_scores, match_candidates, moon_padas,
+                      synastry_aspects, top_k)
+
+
+def best_of(fn, repeat=5):
+    """Fastest of repeat runs, in seconds, and the last result."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--loop-sample', type=int, default=5000, help="candidates timed in the Python loop")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    query = rng.uniform(0, 360, 9)
+    candidates = rng.uniform(0, 360, (args.candidates, 9))
+    moons = candidates[:, MOON]
+    query_pada = int(moon_padas(query[MOON]))
+
+    started = time.perf_counter()
+    sample = moon_padas(moons[:args.loop_sample]).tolist()
+    loop_scores = [sum(_koota_points(query_pada, pada)) for pada in sample]
+    loop_time = (time.perf_counter() - started) / len(sample) * args.candidates
+
+    table_time, scores = best_of(lambda: guna_scores(query[MOON], moons))
+    assert np.allclose(scores[:args.loop_sample], loop_scores), "table and loop scores differ"
+    sort_time, by_sort = best_of(lambda: np.lexsort((np.arange(len(scores)), -scores))[:args.k])
+    topk_time, by_partition = best_of(lambda: top_k(scores, args.k))
+    assert by_sort.tolist() == by_partition.tolist(), "top-k and full sort disagree"
+    aspects_time, _ = best_of(lambda: synastry_aspects(query, candidates[by_partition]))
+    end_to_end, _ = best_of(lambda: match_candidates(query, candidates, args.k))
+
+    print(f"{args.candidates:,} candidates, top {args.k}, tables {KOOTA_TABLES.nbytes // 1024} KiB")
+    print(f"  {'score, Python loop':<26} {loop_time * 1000:>9.2f} ms (extrapolated from {len(sample):,})")
+    print(f"  {'score, table lookup':<26} {table_time * 1000:>9.2f} ms")
+    print(f"  {'select, full sort':<26} {sort_time * 1000:>9.2f} ms")
+    print(f"  {'select, argpartition':<26} {topk_time * 1000:>9.2f} ms")
+    print(f"  {'synastry for top k':<26} {aspects_time * 1000:>9.2f} ms")
+    print(f"  {'match_candidates':<26} {end_to_end * 1000:>9.2f} ms "
+          f"({args.candidates / end_to_end:,.0f} candidates/s)")
+    print(f"  score distribution: mean {scores.mean():.1f}, "
+          f"{(scores >= 18).mean():.0%} at 18+, best {scores.max():.1f} of 36")
+
+
+if __name__ == "__main__":
+    main()
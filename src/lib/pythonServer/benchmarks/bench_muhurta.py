@@ -0,0 +1,91 @@
+"""
+Muhurta search benchmark: coarse sampling plus bisection (muhurta.search)
+against a brute-force scan evaluating the condition at every minute, and
+search in-process against the chart pool.
+
+The brute-force scan is the reference: the intervals found by search must
+agree with it to within a couple of minutes. It runs on --brute-days only.
+
+Usage:
+    python benchmarks/bench_muhurta.py [--days 365] [--brute-days 14] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_pool import ChartPool
+from ephemeris import init_swisseph
+from muhurta import Sky, parse_condition, search
+
+START_JD = 2461041.5  # 2026-01-01
+LOCATION = (18.5204, 73.8567)  # Pune
+CONDITIONS = [
+    "Moon in Rohini",
+    "shukla paksha and not tithi 8",
+    "Moon in Rohini and Jupiter in kendra from lagna",
+    "lagna in Leo and Venus in house 11 from Moon",
+]
+
+
+def brute_force(condition, start_jd, end_jd):
+    """Intervals from evaluating the condition at every minute."""
+    julian_days = np.arange(start_jd, end_jd, 1.0 / 1440)
+    location = LOCATION if condition.uses_lagna else None
+    mask = np.concatenate([
+        condition.evaluate(Sky(julian_days[i:i + 1440], condition.planets, location, planet_step=0))
+        for i in range(0, len(julian_days), 1440)
+    ])
+    changes = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    edges = ([0] if mask[0] else []) + changes.tolist() + ([len(mask) - 1] if mask[-1] else [])
+    return [(julian_days[a], julian_days[b]) for a, b in zip(edges[::2], edges[1::2])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--brute-days', type=float, default=14)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    init_swisseph()
+
+    print(f"{'condition':<50} {'brute':>9} {'search':>9} {'max error':>10}")
+    for text in CONDITIONS:
+        condition = parse_condition(text)
+        end_jd = START_JD + args.brute_days
+        started = time.perf_counter()
+        expected = brute_force(condition, START_JD, end_jd)
+        brute_time = time.perf_counter() - started
+        started = time.perf_counter()
+        found = search(condition, START_JD, end_jd, location=LOCATION)
+        search_time = time.perf_counter() - started
+        assert len(found) == len(expected), f"{text}: {len(found)} intervals, brute force found {len(expected)}"
+        error = max((max(abs(f["startJd"] - a), abs(f["endJd"] - b)) for f, (a, b) in zip(found, expected)),
+                    default=0.0)
+        print(f"{text:<50} {brute_time:>8.2f}s {search_time:>8.2f}s {error * 1440:>7.1f}min")
+
+    pool = ChartPool(args.workers, chunk_size=256)
+    pool.start()
+    print(f"\n{args.days:g} days, {args.workers} workers")
+    print(f"{'condition':<50} {'intervals':>9} {'serial':>9} {'pool':>9}")
+    try:
+        for text in CONDITIONS:
+            end_jd = START_JD + args.days
+            started = time.perf_counter()
+            serial = search(text, START_JD, end_jd, location=LOCATION)
+            serial_time = time.perf_counter() - started
+            started = time.perf_counter()
+            pooled = search(text, START_JD, end_jd, location=LOCATION, pool=pool)
+            pool_time = time.perf_counter() - started
+            assert len(pooled) == len(serial), f"{text}: pool and serial searches disagree"
+            print(f"{text:<50} {len(serial):>9} {serial_time:>8.2f}s {pool_time:>8.2f}s")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Panchang benchmark: builds a file for the gazetteer's cells, then times
+day lookups served from each tier of PanchangStore
+
+    computed    exact computation (no file, hot tier disabled)
+    file        rows read from the memory-mapped file (hot tier disabled)
+    hot         repeat lookups answered by the in-memory LRU
+
+and checks that the file rows agree with exact computation.
+
+Usage:
+    python benchmarks/bench_panchang.py [--days 60] [--lookups 2000] [--seed 42]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from panchang import CELL_SIZE, PanchangStore, build_file, cell_center, gazetteer_cells
+
+START = datetime.date(2026, 1, 1)
+GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'gazetteer.tsv')
+
+
+def timed(store, lookups):
+    """Seconds per lookup, and the results."""
+    started = time.perf_counter()
+    results = [store.get(lat, lon, day, timezone_id) for lat, lon, day, timezone_id in lookups]
+    return (time.perf_counter() - started) / len(lookups), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--computed-lookups', type=int, default=200, help="lookups timed without the file")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    cells = gazetteer_cells(GAZETTEER)
+    rng = random.Random(args.seed)
+    lookups = []
+    for _ in range(args.lookups):
+        cell = rng.choice(sorted(cells))
+        lat, lon = cell_center(cell, CELL_SIZE)
+        lookups.append((lat, lon, START + datetime.timedelta(days=rng.randrange(args.days)), cells[cell]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'panchang.bin')
+        started = time.perf_counter()
+        build_file(path, START, args.days, cells)
+        build_time = time.perf_counter() - started
+        size = os.path.getsize(path)
+
+        computed_time, computed = timed(PanchangStore(None, cache_size=0), lookups[:args.computed_lookups])
+        file_time, from_file = timed(PanchangStore(path, cache_size=0), lookups)
+        assert from_file[:len(computed)] == computed, "file rows and exact computation differ"
+        hot_store = PanchangStore(path, cache_size=len(lookups))
+        timed(hot_store, lookups)
+        hot_time, _ = timed(hot_store, lookups)
+
+    print(f"{len(cells)} cells x {args.days} days: built in {build_time:.1f}s, {size / 1024:.0f} KiB "
+          f"({size / (len(cells) * args.days):.0f} bytes/day)")
+    for name, seconds in (('computed', computed_time), ('file', file_time), ('hot', hot_time)):
+        print(f"  {name:<10} {seconds * 1e6:>10.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Load test for server.py: chart throughput scaling across chart workers, and
+chat latency while chart traffic is saturating the server.
+
+For each worker count a fresh server is started (with the chart cache off, so
+every chart is computed), then chart clients post batches of unique birth
+records while chat clients send small requests alongside.
+
+Usage:
+    python benchmarks/bench_server_scaling.py [--workers 0,1,2,4] [--duration 10]
+                                   [--chart-clients 8] [--batch 200] [--chat-clients 2]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_PATH = '/vedic_astrology_project/script'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def make_batch(rng, size):
+    start = datetime.datetime(1950, 1, 1)
+    return [{
+        "date": (start + datetime.timedelta(seconds=rng.randrange(86400 * 365 * 60))).isoformat() + "Z",
+        "lat": rng.uniform(-60, 60),
+        "lon": rng.uniform(-180, 180),
+    } for _ in range(size)]
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_load(port, args):
+    base = f"http://127.0.0.1:{port}{BASE_PATH}"
+    stop = time.monotonic() + args.duration
+    lock = threading.Lock()
+    totals = {"charts": 0, "rejected": 0, "errors": 0}
+    chat_latencies = []
+    chat_body = {"message": "What does my Sun in the 1st house mean?", "birthDetails": {},
+                 "birthChart": {"ascendant": "Aries", "houses": [], "planets": []}}
+
+    def chart_client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < stop:
+            status = post(f"{base}/generate-birth-charts", make_batch(rng, args.batch))
+            with lock:
+                if status == 200:
+                    totals["charts"] += args.batch
+                elif status == 503:
+                    totals["rejected"] += 1
+                else:
+                    totals["errors"] += 1
+
+    def chat_client():
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            post(f"{base}/chat", chat_body)
+            with lock:
+                chat_latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=chart_client, args=(seed,)) for seed in range(args.chart_clients)]
+    threads += [threading.Thread(target=chat_client) for _ in range(args.chat_clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "chartsPerSecond": totals["charts"] / elapsed,
+        "rejected": totals["rejected"],
+        "errors": totals["errors"],
+        "chatP50Ms": percentile(chat_latencies, 50) * 1000,
+        "chatP99Ms": percentile(chat_latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', default='0,1,2,4', help="comma-separated chart worker counts")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--chart-clients', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=200, help="records per chart request")
+    parser.add_argument('--chat-clients', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    env = dict(os.environ, CHART_CACHE_SIZE='0')
+    env.pop('CHART_CACHE_DB', None)
+    # Small chunks so even one batch request spreads over every worker
+    env['CHART_POOL_CHUNK'] = '16'
+
+    print(f"{'workers':>8} {'charts/s':>10} {'scaling':>8} {'503s':>6} {'errors':>7} {'chat p50':>9} {'chat p99':>9}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, 'server.py', '--host', '127.0.0.1', '--port', str(port),
+             '--threads', str(args.threads), '--chart-workers', str(workers)],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(port)
+            result = run_load(port, args)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or result["chartsPerSecond"]
+        print(f"{workers:>8} {result['chartsPerSecond']:>10,.0f} {result['chartsPerSecond'] / baseline:>7.2f}x "
+              f"{result['rejected']:>6} {result['errors']:>7} {result['chatP50Ms']:>7.1f}ms {result['chatP99Ms']:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
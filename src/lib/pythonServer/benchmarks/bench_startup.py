@@ -0,0 +1,123 @@
+"""
+Cold start benchmark: the time to import app (from python -X importtime)
+and the latency of the first request to each endpoint in a fresh process,
+with and without warm_up().
+
+Importing app should load Flask and little else; the chart modules, NumPy,
+swisseph and the services load on first use, or in warm_up(). -X importtime
+itself slows imports down, so budgets here are above plain import times. Exits
+non-zero if the median import time or a warmed first request is over its
+budget, or if importing app loads a module it should load lazily.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--import-budget-ms 275] [--first-request-budget-ms 25]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules importing app must not load
+LAZY = ['numpy', 'swisseph', 'pytz', 'chart_backends', 'matching', 'strength', 'geocoder']
+
+# A fresh process times its first request to each endpoint
+FIRST_REQUESTS = r'''
+import json, sys, time
+started = time.perf_counter()
+import app as api
+timings = {"import": time.perf_counter() - started}
+if sys.argv[1] == "warm":
+    timings["warm_up"] = api.warm_up()
+client = api.app.test_client()
+base = "/vedic_astrology_project/script/"
+birth = {"date": "1990-05-15", "time": "10:30", "location": "Pune"}
+requests = [
+    ("generate-birth-chart", "post", "generate-birth-chart", birth),
+    ("chat", "post", "chat", None),
+    ("chat/stream", "post", "chat/stream", None),
+    ("locations", "get", "locations?q=mum", None),
+    ("panchang", "get", "panchang?location=Delhi&date=2026-01-01", None),
+]
+chart_id = None
+for name, method, path, body in requests:
+    if body is None and method == "post":
+        body = {"chartId": chart_id, "message": "Tell me about my Moon"}
+    started = time.perf_counter()
+    response = getattr(client, method)(base + path, json=body)
+    response.get_data()
+    timings[name] = time.perf_counter() - started
+    assert response.status_code == 200, (name, response.status_code)
+    if name == "generate-birth-chart":
+        chart_id = response.get_json()["chartId"]
+print(json.dumps(timings))
+'''
+
+
+def run(args, env):
+    return subprocess.run([sys.executable] + args, cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+
+
+def import_profile(env):
+    """(cumulative microseconds of app, {module: cumulative us} for app's direct imports, modules app loaded)."""
+    output = run(['-X', 'importtime', '-c', 'import app'], env).stderr
+    # Lines come in post-order: a module's imports are listed before it
+    subtree = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth > 0:
+            subtree.append((depth, name, int(cumulative)))
+        elif name == 'app':
+            direct = {module: us for depth, module, us in subtree if depth == 1}
+            return int(cumulative), direct, {module for _, module, _ in subtree}
+        else:
+            subtree = []
+    raise RuntimeError("python -X importtime did not report app")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=275)
+    parser.add_argument('--first-request-budget-ms', type=float, default=25)
+    args = parser.parse_args()
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    failures = []
+
+    profiles = [import_profile(env) for _ in range(args.repeat)]
+    import_ms = statistics.median(total for total, _, _ in profiles) / 1000
+    _, direct, modules = profiles[-1]
+    print(f"import app: {import_ms:.1f} ms median of {args.repeat} (budget {args.import_budget_ms:g} ms)")
+    for name, cumulative in sorted(direct.items(), key=lambda item: -item[1])[:6]:
+        print(f"  {name:<20} {cumulative / 1000:>7.1f} ms")
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import app takes {import_ms:.1f} ms")
+    eager = [name for name in LAZY if name in modules]
+    if eager:
+        failures.append(f"importing app loads {', '.join(eager)}")
+
+    cold = json.loads(run(['-c', FIRST_REQUESTS, 'cold'], env).stdout)
+    warm = json.loads(run(['-c', FIRST_REQUESTS, 'warm'], env).stdout)
+    print(f"\nfirst request in a fresh process (warm_up took {warm['warm_up'] * 1000:.0f} ms)")
+    print(f"  {'endpoint':<22} {'cold':>9} {'warmed':>9}")
+    for name in cold:
+        if name == 'import':
+            continue
+        print(f"  {name:<22} {cold[name] * 1000:>7.1f}ms {warm[name] * 1000:>7.1f}ms")
+        if warm[name] * 1000 > args.first_request_budget_ms:
+            failures.append(f"warmed first {name} request takes {warm[name] * 1000:.1f} ms")
+
+    if failures:
+        print("\nOver budget: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
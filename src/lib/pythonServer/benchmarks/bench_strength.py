@@ -0,0 +1,64 @@
+"""
+Chart strength benchmark: per-chart cost of Ashtakavarga and Shadbala at
+batch sizes 1, 1k and 100k, and of the per-chart path the chat uses
+(ChartStrength for a miss, StrengthCache for a repeat question).
+
+Longitudes are random; the cost does not depend on where planets fall.
+
+Usage:
+    python benchmarks/bench_strength.py [--batches 1 1000 100000] [--charts 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strength import ChartStrength, StrengthCache, ashtakavarga, shadbala
+from synthetic import SyntheticWorkload
+
+
+def per_chart(function, count, repeat):
+    """Best seconds per chart over repeat runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 1000, 100000])
+    parser.add_argument('--charts', type=int, default=500, help="charts for the per-chart paths")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"  {'batch':>8} {'ashtakavarga':>14} {'shadbala':>14} {'both':>14}")
+    for batch in args.batches:
+        longitudes = rng.uniform(0, 360, (batch, 9))
+        ascendants = rng.uniform(0, 360, batch)
+        repeat = max(1, min(20, 100000 // batch))
+        varga = per_chart(lambda: ashtakavarga(longitudes, ascendants), batch, repeat)
+        bala = per_chart(lambda: shadbala(longitudes, ascendants), batch, repeat)
+        print(f"  {batch:>8,} {varga * 1e6:>11.2f} us {bala * 1e6:>11.2f} us {(varga + bala) * 1e6:>11.2f} us")
+
+    workload = SyntheticWorkload(args.seed)
+    charts = [workload.mock_chart().to_dict() for _ in range(args.charts)]
+    cache = StrengthCache(len(charts))
+    miss = per_chart(lambda: [cache.get(chart) for chart in charts], len(charts), 1)
+    hit = per_chart(lambda: [cache.get(chart) for chart in charts], len(charts), 5)
+    longitudes = rng.uniform(0, 360, (len(charts), 9))
+    single = per_chart(lambda: [ChartStrength(row, 0.0) for row in longitudes], len(charts), 3)
+    print(f"\n  ChartStrength {single * 1e6:>9.1f} us/chart")
+    print(f"  cache miss    {miss * 1e6:>9.1f} us/chart")
+    print(f"  cache hit     {hit * 1e6:>9.1f} us/chart")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Varga engine benchmark: cost of deriving 1..16 divisional charts, to show
+the marginal cost per extra varga.
+
+Measures varga_charts for a single chart (the endpoint path, including
+building the chart records) and varga_positions for a batch of charts (the raw
+vectorized lookup), and fits the per-varga slope of each.
+
+Usage:
+    python benchmarks/bench_vargas.py [--charts 10000] [--repeat 2000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from birth_chart import compute_birth_chart, compute_birth_charts
+from birth_instant import julian_day_ut
+from vargas import DIVISIONS, varga_charts, varga_positions
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--charts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    julian_day = julian_day_ut(datetime.datetime(1990, 5, 17, 4, 30))
+    chart = compute_birth_chart(julian_day, 19.07, 72.87)
+    chart_cost = per_call(lambda: compute_birth_chart(julian_day, 19.07, 72.87), max(args.repeat // 10, 10))
+
+    rng = np.random.default_rng(args.seed)
+    longitudes = rng.uniform(0, 360, (args.charts, 10))
+
+    counts = list(range(1, len(DIVISIONS) + 1))
+    single, batch = [], []
+    for count in counts:
+        divisions = DIVISIONS[:count]
+        single.append(per_call(lambda: varga_charts(chart, divisions), args.repeat))
+        batch.append(per_call(lambda: varga_positions(longitudes, divisions), max(args.repeat // 100, 5)))
+
+    single_slope = np.polyfit(counts, single, 1)[0]
+    batch_slope = np.polyfit(counts, batch, 1)[0]
+
+    print(f"D1 chart (ephemeris):      {chart_cost * 1e6:8.1f} us")
+    print(f"{'vargas':>6} {'one chart':>12} {'batch/chart':>12}")
+    for count, one, many in zip(counts, single, batch):
+        print(f"{count:>6} {one * 1e6:>10.1f}us {many / args.charts * 1e9:>10.1f}ns")
+    print(f"marginal per varga:        {single_slope * 1e6:8.1f} us per chart (with records), "
+          f"{batch_slope / args.charts * 1e9:.1f} ns per chart (batched lookup)")
+
+    # Sanity check: batched charts agree with the one-chart path
+    charts = compute_birth_charts(np.full(3, julian_day), [19.07] * 3, [72.87] * 3)
+    assert varga_charts(charts[0], [9])["D9"] == varga_charts(chart, [9])["D9"]
+
+
+if __name__ == "__main__":
+    main()
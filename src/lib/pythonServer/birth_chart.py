@@ -0,0 +1,85 @@
+"""
+Pure birth chart computation, shared by the web process and the chart pool.
+
+Everything here takes Julian days (UT) and coordinates and returns compact
+ChartRecords (see chart_model.py), so calls can be shipped to worker
+processes cheaply. Positions come from swisseph in sidereal mode
+(FLG_SIDEREAL), with no ayanamsa arithmetic here. Parsing, geocoding and
+caching stay in app.py; chart_backends.py selects how charts are computed.
+"""
+import numpy as np
+
+from chart_model import ChartRecord
+from ephemeris import sidereal_ascendant, sidereal_positions
+from instrumentation import span
+
+
+def build_chart(ascendant_sign, planet_signs, planet_houses, planet_degrees, ascendant_degrees=None):
+    """
+    Assemble the chart dict from the ascendant sign index and per-planet
+    sign indices, house numbers and degrees, given in PLANETS order.
+    The ascendant's degrees within its sign are included when given.
+    """
+    return ChartRecord(ascendant_sign, planet_signs, planet_houses, planet_degrees, ascendant_degrees).to_dict()
+
+
+def chart_from_longitudes(ascendant_lon, sidereal_lons):
+    """A ChartRecord from the sidereal ascendant and planet longitudes (PLANETS order)."""
+    ascendant_lon %= 360
+    ascendant_sign = int(ascendant_lon / 30)
+    planet_signs = [int(lon_sidereal % 360 / 30) for lon_sidereal in sidereal_lons]
+    planet_houses = [((sign - ascendant_sign) % 12) + 1 for sign in planet_signs]
+    planet_degrees = [lon_sidereal % 30 for lon_sidereal in sidereal_lons]
+    
+    return ChartRecord(ascendant_sign, planet_signs, planet_houses, planet_degrees, ascendant_lon % 30)
+
+
+def compute_birth_chart(julian_day, lat, lon):
+    """Compute one ChartRecord; raises on swisseph errors."""
+    # Get sidereal ascendant (lagna)
+    with span("chart.houses"):
+        ascendant_lon = sidereal_ascendant(julian_day, lat, lon)
+    
+    # Calculate sidereal (Vedic) planet longitudes (Ketu mirrors Rahu);
+    # served from the precomputed table when EPHEMERIS_TABLE is set
+    with span("chart.planets"):
+        sidereal_lons = sidereal_positions([julian_day])[0][0].tolist()
+    
+    return chart_from_longitudes(ascendant_lon, sidereal_lons)
+
+
+def compute_birth_charts(julian_days, lats, lons):
+    """
+    Compute charts for arrays of Julian days and coordinates in one pass.
+    
+    Planet and ascendant longitudes are gathered into NumPy arrays so sign
+    and house assignment is vectorized across the whole batch. Returns one
+    entry per input: the ChartRecord, or {"error": ...} if swisseph failed.
+    """
+    julian_days = np.asarray(julian_days, dtype=float)
+    count = len(julian_days)
+    results = [None] * count
+    if count == 0:
+        return results
+    
+    sidereal_lons, _ = sidereal_positions(julian_days)
+    ascendant_lons = np.full(count, np.nan)
+    for k, jd in enumerate(julian_days.tolist()):
+        try:
+            ascendant_lons[k] = sidereal_ascendant(jd, lats[k], lons[k])
+        except Exception as e:
+            results[k] = {"error": str(e)}
+    
+    ascendant_lons = np.nan_to_num(ascendant_lons % 360)
+    ascendant_signs = (ascendant_lons // 30).astype(np.int64)
+    planet_signs = (sidereal_lons // 30).astype(np.int64)
+    planet_houses = (planet_signs - ascendant_signs[:, None]) % 12 + 1
+    planet_degrees = sidereal_lons % 30
+    
+    for k in range(count):
+        if results[k] is None:
+            results[k] = ChartRecord(ascendant_signs[k], planet_signs[k].tolist(),
+                                     planet_houses[k].tolist(), planet_degrees[k].tolist(),
+                                     ascendant_lons[k] % 30)
+    
+    return results
@@ -0,0 +1,139 @@
+"""
+Resolve birth details to a UTC instant and a Julian day in UT.
+
+A birth is a calendar date, an optional local clock time and a place. The
+place's IANA zone comes from an explicit "timezone", the geocoder match, or
+the nearest gazetteer place to the coordinates; far from any known place a
+nautical offset derived from the longitude is used. Historical UTC offsets are
+read from the tz database via pytz.
+
+Per-zone transition tables and coordinate-to-zone lookups are memoized, so a
+warm resolve is a couple of bisects.
+"""
+import bisect
+import datetime
+import functools
+
+import pytz
+
+UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+UNIX_EPOCH_JD = 2440587.5
+
+# Coordinates are rounded to ~1 km before the zone lookup is memoized
+COORD_PRECISION = 2
+
+
+@functools.lru_cache(maxsize=None)
+def zone_transitions(timezone_id):
+    """
+    UTC transition instants (epoch seconds) and the UTC offsets (seconds)
+    that take effect at each one, for an IANA zone. Raises ValueError for
+    unknown zones.
+    """
+    try:
+        zone = pytz.timezone(timezone_id)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone: {timezone_id}") from None
+    utc_times = getattr(zone, '_utc_transition_times', None)
+    if not utc_times:
+        # UTC and fixed-offset zones
+        return [float('-inf')], [zone.utcoffset(UNIX_EPOCH).total_seconds()]
+    transition_info = zone._transition_info
+    return (
+        [(t - UNIX_EPOCH).total_seconds() for t in utc_times],
+        [info[0].total_seconds() for info in transition_info],
+    )
+
+
+def offset_at_utc(timezone_id, utc_seconds):
+    """UTC offset in seconds in force at a UTC instant."""
+    utc_times, offsets = zone_transitions(timezone_id)
+    return offsets[max(bisect.bisect_right(utc_times, utc_seconds) - 1, 0)]
+
+
+def offset_for_local(timezone_id, local_seconds):
+    """
+    UTC offset in seconds for a local wall-clock time. Times that are
+    ambiguous (fall-back overlap) or skipped (spring-forward gap) are read
+    with the offset in force before the transition, like PEP 495 fold=0.
+    """
+    before = offset_at_utc(timezone_id, local_seconds - 86400)
+    after = offset_at_utc(timezone_id, local_seconds + 86400)
+    if before == after:
+        return before
+    if offset_at_utc(timezone_id, local_seconds - before) == before:
+        return before
+    if offset_at_utc(timezone_id, local_seconds - after) == after:
+        return after
+    return before
+
+
+def nautical_timezone(lon):
+    """Etc/GMT zone for a longitude (note the inverted POSIX sign)."""
+    hours = int(round(lon / 15.0))
+    return f"Etc/GMT{-hours:+d}" if hours else "Etc/GMT"
+
+
+def julian_day_ut(birth_datetime):
+    """Julian day (UT) for a datetime; naive datetimes are taken as UTC."""
+    if birth_datetime.tzinfo is not None:
+        birth_datetime = birth_datetime.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (birth_datetime - UNIX_EPOCH).total_seconds() / 86400.0 + UNIX_EPOCH_JD
+
+
+class BirthInstantResolver:
+    """Turns date + time + location into a UTC birth instant."""
+
+    def __init__(self, gazetteer, coord_cache_size=65536):
+        self.gazetteer = gazetteer
+        self._timezone_at = functools.lru_cache(maxsize=coord_cache_size)(self._lookup_timezone)
+
+    def _lookup_timezone(self, lat, lon):
+        index = self.gazetteer.nearest(lat, lon)
+        if index is None:
+            return nautical_timezone(lon)
+        return self.gazetteer.place(index)["timezone"]
+
+    def timezone_at(self, lat, lon):
+        """IANA zone ID for coordinates, from the nearest gazetteer place."""
+        return self._timezone_at(round(lat, COORD_PRECISION), round(lon, COORD_PRECISION))
+
+    def resolve(self, date_str, time_str, lat, lon, timezone_id=None):
+        """
+        Return the birth instant as an aware UTC datetime.
+
+        date_str is ISO 8601. With a separate time_str ("HH:MM" or
+        "HH:MM:SS"), only its calendar date is used and time_str is read as
+        local time at the birthplace; a date with a UTC offset (as browsers
+        send date-picker values) is first converted to the birthplace zone so
+        local midnight does not slip to the previous day. Without time_str an
+        offset-aware date_str is already an instant, and a naive one is local
+        time at the birthplace.
+        """
+        timezone_id = timezone_id or self.timezone_at(lat, lon)
+        value = datetime.datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+
+        if value.tzinfo is not None:
+            utc_seconds = (value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                           - UNIX_EPOCH).total_seconds()
+            if not time_str:
+                return value.astimezone(datetime.timezone.utc)
+            local_date = (UNIX_EPOCH + datetime.timedelta(
+                seconds=utc_seconds + offset_at_utc(timezone_id, utc_seconds))).date()
+        else:
+            local_date = value.date()
+
+        if time_str:
+            local = datetime.datetime.combine(local_date, datetime.time.fromisoformat(time_str))
+        else:
+            local = value
+
+        local_seconds = (local - UNIX_EPOCH).total_seconds()
+        utc = local - datetime.timedelta(seconds=offset_for_local(timezone_id, local_seconds))
+        return utc.replace(tzinfo=datetime.timezone.utc)
+
+
+def datetime_from_julian_day(julian_day):
+    """Aware UTC datetime for a Julian day (UT)."""
+    utc = UNIX_EPOCH + datetime.timedelta(days=julian_day - UNIX_EPOCH_JD)
+    return utc.replace(tzinfo=datetime.timezone.utc)
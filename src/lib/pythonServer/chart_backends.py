@@ -0,0 +1,128 @@
+"""
+Pluggable chart calculation backends.
+
+    swisseph    (default) sidereal positions straight from swisseph
+                (set_sid_mode + FLG_SIDEREAL), see birth_chart.py
+    jyotishyam  positions read from jyotishyam's own Chart, built in
+                Lahiri mode; optional, needs `pip install jyotishyam`
+
+A backend has compute(julian_day, lat, lon) and compute_many(julian_days,
+lats, lons) returning ChartRecords. Only the configured backend is
+constructed, and jyotishyam is imported only when its backend is. compute_chart and compute_charts use the configured backend and
+are what the chart pool runs; each worker process builds its own backend
+from the same configuration.
+
+Configuration (environment variables):
+    CHART_BACKEND  "swisseph" (default) or "jyotishyam"
+"""
+import os
+
+from birth_chart import chart_from_longitudes, compute_birth_chart, compute_birth_charts
+from birth_instant import datetime_from_julian_day
+from ephemeris import AYANAMSA, PLANETS
+from instrumentation import span
+
+
+class SwissephBackend:
+    """Charts computed with swisseph alone."""
+
+    name = 'swisseph'
+
+    def compute(self, julian_day, lat, lon):
+        """One ChartRecord; raises on swisseph errors."""
+        with span("chart.compute"):
+            return compute_birth_chart(julian_day, lat, lon)
+
+    def compute_many(self, julian_days, lats, lons):
+        """One ChartRecord, or {"error": ...}, per input, vectorized."""
+        return compute_birth_charts(julian_days, lats, lons)
+
+
+def _longitude(chart, name):
+    """
+    Sidereal longitude of a planet, or of the ascendant, from a jyotishyam
+    Chart. Planets are looked up in chart.planets (or by attribute), and
+    each may be a number or an object or dict with a longitude.
+    """
+    planets = getattr(chart, 'planets', None)
+    if name == 'Ascendant':
+        value = getattr(chart, 'ascendant', None)
+        if value is None:
+            value = getattr(chart, 'lagna', None)
+    elif isinstance(planets, dict):
+        value = planets.get(name, planets.get(name.lower()))
+    else:
+        value = getattr(chart, name.lower(), None)
+    if isinstance(value, dict):
+        value = value.get('longitude')
+    elif value is not None and not isinstance(value, (int, float)):
+        value = getattr(value, 'longitude', None)
+    if value is None:
+        raise ValueError(f"jyotishyam Chart has no longitude for {name}")
+    return float(value)
+
+
+class JyotishyamBackend:
+    """Charts from jyotishyam's Chart, for comparison with swisseph."""
+
+    name = 'jyotishyam'
+
+    def __init__(self):
+        from jyotishyam import Chart
+        self.chart_class = Chart
+
+    def compute(self, julian_day, lat, lon):
+        """One ChartRecord; raises if jyotishyam fails or lacks a position."""
+        with span("chart.compute"):
+            chart = self.chart_class(datetime_from_julian_day(julian_day), lat, lon, AYANAMSA)
+            longitudes = [_longitude(chart, planet) for planet in PLANETS[:-1]]
+            # Ketu is always opposite Rahu
+            longitudes.append(longitudes[-1] + 180)
+            return chart_from_longitudes(_longitude(chart, 'Ascendant'), longitudes)
+
+    def compute_many(self, julian_days, lats, lons):
+        """One ChartRecord, or {"error": ...}, per input; jyotishyam has no batch API."""
+        results = []
+        for julian_day, lat, lon in zip(julian_days, lats, lons):
+            try:
+                results.append(self.compute(float(julian_day), lat, lon))
+            except Exception as e:
+                results.append({"error": str(e)})
+        return results
+
+
+BACKENDS = {
+    'swisseph': SwissephBackend,
+    'jyotishyam': JyotishyamBackend,
+}
+
+_backend = None
+
+
+def create_backend(name=None):
+    """
+    A new backend by name, or as configured by CHART_BACKEND.
+    Raises ValueError for unknown names, ImportError if its library is missing.
+    """
+    name = name or os.environ.get('CHART_BACKEND', 'swisseph')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown chart backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def get_backend():
+    """This process' configured backend, created on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def compute_chart(julian_day, lat, lon):
+    """One chart with the configured backend."""
+    return get_backend().compute(julian_day, lat, lon)
+
+
+def compute_charts(julian_days, lats, lons):
+    """A batch of charts with the configured backend."""
+    return get_backend().compute_many(julian_days, lats, lons)
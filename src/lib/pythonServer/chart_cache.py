@@ -0,0 +1,214 @@
+"""
+Bounded cache for computed birth charts.
+
+Charts are keyed on the normalized birth instant, rounded coordinates and the
+ayanamsa mode. An in-process LRU with TTL sits in front of an optional shared
+SQLite file so every gunicorn worker on the host can reuse charts computed by
+the others.
+
+Configuration (environment variables):
+    CHART_CACHE_SIZE     max charts kept per process (default 4096, 0 disables)
+    CHART_CACHE_TTL      seconds a chart stays valid (default 86400)
+    CHART_CACHE_DB       path to a shared SQLite cache file (default: none)
+    CHART_CACHE_DB_SIZE  max charts kept in the shared file (default 65536)
+"""
+import collections
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from chart_model import ChartRecord
+
+logger = logging.getLogger(__name__)
+
+# ~11 m at the equator, well below anything that changes the ascendant
+COORD_PRECISION = 4
+
+
+def make_chart_key(birth_datetime, lat, lon, ayanamsa):
+    """Build the cache key for a chart request."""
+    # Normalize to the UTC instant, to the second; naive datetimes are UTC
+    if birth_datetime.tzinfo is not None:
+        birth_datetime = birth_datetime.astimezone(datetime.timezone.utc)
+    instant = birth_datetime.replace(tzinfo=None, microsecond=0).isoformat()
+    return f"{instant}|{round(lat, COORD_PRECISION):.{COORD_PRECISION}f}|" \
+           f"{round(lon, COORD_PRECISION):.{COORD_PRECISION}f}|{ayanamsa}"
+
+
+class SQLiteChartStore:
+    """
+    Shared ChartRecord store backed by a local SQLite file.
+    Safe to use from several processes; each process opens its own connection.
+    """
+
+    def __init__(self, path, max_size, ttl):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # Reconnect after fork so workers never share a parent's handle
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS charts ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, created FROM charts WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        value = json.loads(row[0])
+        # Rows written before charts were ChartRecords hold the chart dict
+        return ChartRecord.from_dict(value) if isinstance(value, dict) else ChartRecord.from_compact(value)
+
+    def set(self, key, chart):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO charts (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(chart.to_compact()), time.time()),
+                )
+            self._writes += 1
+            # Trim now and then rather than on every write
+            if self._writes % 256 == 0:
+                self._trim(conn)
+
+    def _trim(self, conn):
+        with conn:
+            conn.execute("DELETE FROM charts WHERE created < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM charts WHERE key IN ("
+                "SELECT key FROM charts ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM charts")
+
+
+class ChartCache:
+    """
+    In-process LRU/TTL chart cache with an optional shared backend.
+
+    Cached charts are returned as-is, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_size=4096, ttl=86400, shared=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls):
+        max_size = int(os.environ.get('CHART_CACHE_SIZE', 4096))
+        ttl = float(os.environ.get('CHART_CACHE_TTL', 86400))
+        db_path = os.environ.get('CHART_CACHE_DB')
+        db_size = int(os.environ.get('CHART_CACHE_DB_SIZE', 65536))
+        shared = SQLiteChartStore(db_path, db_size, ttl) if db_path else None
+        return cls(max_size=max_size, ttl=ttl, shared=shared)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        """Return the cached chart for key, or None."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                chart, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return chart
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.shared is not None:
+            try:
+                chart = self.shared.get(key)
+            except sqlite3.Error as e:
+                logger.error("Chart cache backend error: %s", e)
+                chart = None
+            if chart is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, chart, now)
+                return chart
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, chart):
+        """Store a computed chart."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(key, chart, time.monotonic())
+        if self.shared is not None:
+            try:
+                self.shared.set(key, chart)
+            except sqlite3.Error as e:
+                logger.error("Chart cache backend error: %s", e)
+
+    def _store(self, key, chart, now):
+        self._entries[key] = (chart, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "sharedHits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hitRatio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                "sharedBackend": self.shared.path if self.shared is not None else None,
+            }
@@ -0,0 +1,169 @@
+"""
+Compact chart model and JSON serializer.
+
+A ChartRecord keeps a chart as a few flat tuples: sign index, house number
+and degrees per planet (in PLANETS order), plus the planet indices in each
+house. There are no per-planet or per-house dicts. Records are what the
+chart cache holds and what the chart pool ships between processes. They are
+turned into the nested dict shape only when a consumer needs it (to_dict).
+
+encode_chart writes a record straight to JSON text in one of two shapes:
+    full     the established response shape; each house lists its planets
+             in full. Every planet object is encoded once and the text is
+             reused for its house.
+    compact  the same keys, but each house lists indices into "planets"
+             instead of repeating the planet objects
+Other values are encoded with orjson when it is installed, otherwise with
+the standard json module.
+"""
+import json
+
+from ephemeris import PLANETS, SIGNS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PLANET_INDEX = {planet: i for i, planet in enumerate(PLANETS)}
+SIGN_INDEX = {sign: i for i, sign in enumerate(SIGNS)}
+
+# Chart shapes accepted by the routes' "format" parameter
+CHART_FORMATS = ('full', 'compact')
+
+
+class ChartRecord:
+    """A birth (or divisional) chart; treat it as read-only."""
+
+    __slots__ = ('ascendant_sign', 'ascendant_degrees', 'signs', 'houses', 'degrees', 'members', 'name')
+
+    def __init__(self, ascendant_sign, signs, houses, degrees, ascendant_degrees=None, name=None):
+        self.ascendant_sign = int(ascendant_sign)
+        self.ascendant_degrees = None if ascendant_degrees is None else float(ascendant_degrees)
+        self.signs = tuple(int(sign) for sign in signs)
+        self.houses = tuple(int(house) for house in houses)
+        self.degrees = tuple(float(degree) for degree in degrees)
+        self.name = name
+        members = [[] for _ in range(12)]
+        for i, house in enumerate(self.houses):
+            members[house - 1].append(i)
+        # members[house - 1]: indices of the planets in that house
+        self.members = tuple(tuple(planets) for planets in members)
+
+    def __eq__(self, other):
+        return isinstance(other, ChartRecord) and self.to_compact() == other.to_compact()
+
+    @property
+    def ascendant(self):
+        return SIGNS[self.ascendant_sign]
+
+    def longitude(self, planet):
+        """Sidereal longitude of a planet, by name or index."""
+        i = PLANET_INDEX[planet] if isinstance(planet, str) else planet
+        return self.signs[i] * 30 + self.degrees[i]
+
+    def to_dict(self):
+        """The nested dict shape; house "planets" share the planet dicts."""
+        planets = [
+            {"planet": planet, "house": house, "sign": SIGNS[sign], "degrees": degrees}
+            for planet, sign, house, degrees in zip(PLANETS, self.signs, self.houses, self.degrees)
+        ]
+        chart = {
+            "ascendant": self.ascendant,
+            "houses": [
+                {
+                    "number": number,
+                    "sign": SIGNS[(self.ascendant_sign + number - 1) % 12],
+                    "planets": [planets[i] for i in members],
+                }
+                for number, members in enumerate(self.members, 1)
+            ],
+            "planets": planets,
+        }
+        if self.ascendant_degrees is not None:
+            chart["ascendantDegrees"] = self.ascendant_degrees
+        if self.name is not None:
+            chart["name"] = self.name
+        return chart
+
+    @classmethod
+    def from_dict(cls, chart):
+        """Record for a chart dict; its planets may come in any order."""
+        by_planet = {p['planet']: p for p in chart['planets']}
+        planets = [by_planet[name] for name in PLANETS]
+        return cls(SIGN_INDEX[chart['ascendant']],
+                   [SIGN_INDEX[p['sign']] for p in planets],
+                   [p['house'] for p in planets],
+                   [p['degrees'] for p in planets],
+                   chart.get('ascendantDegrees'), chart.get('name'))
+
+    def to_compact(self):
+        """List form for storage: [ascendant, ascendantDegrees, signs, houses, degrees, name]."""
+        return [self.ascendant_sign, self.ascendant_degrees, list(self.signs),
+                list(self.houses), list(self.degrees), self.name]
+
+    @classmethod
+    def from_compact(cls, compact):
+        ascendant_sign, ascendant_degrees, signs, houses, degrees, name = compact
+        return cls(ascendant_sign, signs, houses, degrees, ascendant_degrees, name)
+
+
+def as_record(chart):
+    """A ChartRecord for either a record or a chart dict."""
+    return chart if isinstance(chart, ChartRecord) else ChartRecord.from_dict(chart)
+
+
+def dumps(value):
+    """JSON text for plain values, using the fastest available encoder."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+
+def encode_chart(chart, compact=False, extra=None):
+    """
+    JSON text for a ChartRecord in the full or compact shape. Fields in extra
+    are appended to the chart object; their values may be plain values, other
+    ChartRecords, or dicts of ChartRecords (such as the vargas).
+    """
+    planets = [
+        f'{{"planet":"{planet}","house":{house},"sign":"{SIGNS[sign]}","degrees":{degrees!r}}}'
+        for planet, sign, house, degrees in zip(PLANETS, chart.signs, chart.houses, chart.degrees)
+    ]
+    houses = []
+    for number, members in enumerate(chart.members, 1):
+        if compact:
+            house_planets = ','.join(map(str, members))
+        else:
+            house_planets = ','.join([planets[i] for i in members])
+        sign = SIGNS[(chart.ascendant_sign + number - 1) % 12]
+        houses.append(f'{{"number":{number},"sign":"{sign}","planets":[{house_planets}]}}')
+
+    parts = [f'{{"ascendant":"{chart.ascendant}","houses":[{",".join(houses)}],"planets":[{",".join(planets)}]']
+    if chart.ascendant_degrees is not None:
+        parts.append(f',"ascendantDegrees":{chart.ascendant_degrees!r}')
+    if chart.name is not None:
+        parts.append(f',"name":{dumps(chart.name)}')
+    for key, value in (extra or {}).items():
+        parts.append(f',{dumps(key)}:{encode_value(value, compact)}')
+    parts.append('}')
+    return ''.join(parts)
+
+
+def encode_value(value, compact=False):
+    """JSON text for a value that may hold ChartRecords."""
+    if isinstance(value, ChartRecord):
+        return encode_chart(value, compact)
+    if isinstance(value, dict) and any(isinstance(v, ChartRecord) for v in value.values()):
+        return '{' + ','.join(f'{dumps(k)}:{encode_value(v, compact)}' for k, v in value.items()) + '}'
+    if isinstance(value, list) and any(isinstance(v, ChartRecord) for v in value):
+        return '[' + ','.join(encode_value(v, compact) for v in value) + ']'
+    return dumps(value)
+
+
+def parse_chart_format(value):
+    """True for the compact shape; raises ValueError for unknown formats."""
+    value = (value or 'full').lower()
+    if value not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart format: {value}")
+    return value == 'compact'
@@ -0,0 +1,168 @@
+"""
+Process pool for CPU-bound chart computation.
+
+Chart requests are shipped to a bounded ProcessPoolExecutor so the web
+process' threads stay free for cheap requests (chat, autocomplete) while
+charts are computed on every core. Admission is bounded: at most
+workers + max_queue jobs are in flight, and a request that cannot get a slot
+within queue_wait seconds is rejected with PoolSaturatedError (the routes
+answer 503 with Retry-After) instead of queueing without limit.
+
+Configuration (environment variables):
+    CHART_POOL_WORKERS  worker processes (default 0: compute in-process)
+    CHART_POOL_QUEUE    jobs allowed to wait beyond the busy workers (default 4 x workers)
+    CHART_POOL_WAIT     seconds a request waits for a queue slot (default 0.5)
+    CHART_POOL_CHUNK    minimum batch records per pool job (default 256)
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+
+from ephemeris import init_swisseph
+
+
+class PoolSaturatedError(RuntimeError):
+    """The chart pool queue is full; the client should retry later."""
+
+
+def init_worker():
+    """Runs once in each worker process."""
+    init_swisseph()
+
+
+class ChartPool:
+    """Bounded ProcessPoolExecutor with backpressure and counters."""
+
+    def __init__(self, workers, max_queue=None, queue_wait=0.5, chunk_size=256):
+        self.workers = workers
+        self.max_queue = 4 * workers if max_queue is None else max_queue
+        self.queue_wait = queue_wait
+        self.chunk_size = chunk_size
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls):
+        """Pool configured from CHART_POOL_*; None when the pool is disabled."""
+        workers = int(os.environ.get('CHART_POOL_WORKERS', 0))
+        if workers <= 0:
+            return None
+        max_queue = os.environ.get('CHART_POOL_QUEUE')
+        return cls(
+            workers,
+            max_queue=int(max_queue) if max_queue is not None else None,
+            queue_wait=float(os.environ.get('CHART_POOL_WAIT', 0.5)),
+            chunk_size=int(os.environ.get('CHART_POOL_CHUNK', 256)),
+        )
+
+    def _pool(self):
+        # Create lazily, and again after fork, so a pool is never shared
+        # between a pre-forking server's master and its workers
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn rather than fork: the web process is multi-threaded
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=init_worker,
+                    mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+            return self._executor
+
+    def start(self):
+        """Start every worker now rather than on the first requests."""
+        pool = self._pool()
+        for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, fn, *args):
+        """
+        Submit fn(*args) to a worker and return its future.
+        Raises PoolSaturatedError when no queue slot frees up in time.
+        """
+        if not self._slots.acquire(timeout=self.queue_wait):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturatedError("Chart workers are busy, please retry shortly")
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        # The slot is held until the job really finishes, even if the
+        # caller stops waiting, so abandoned work still counts against the limit
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a worker and wait for the result."""
+        return self.submit(fn, *args).result()
+
+    def map_chunks(self, fn, *columns):
+        """
+        Split equal-length columns into at most one slice per worker (each
+        at least chunk_size long), run fn on each slice in the workers and
+        concatenate the list results in order.
+        """
+        results = []
+        for result in self.map_calls(fn, [[column[start:stop] for column in columns]
+                                          for start, stop in self.chunk_bounds(len(columns[0]))]):
+            results.extend(result)
+        return results
+
+    def chunk_bounds(self, count):
+        """(start, stop) of at most one slice per worker, each at least chunk_size long."""
+        size = max(self.chunk_size, -(-count // self.workers))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def map_calls(self, fn, argument_lists):
+        """
+        Run fn(*arguments) in the workers for every argument list and return
+        the results in order. All calls are submitted before any is awaited;
+        if the pool saturates part way, the submitted ones are cancelled.
+        """
+        futures = []
+        try:
+            for arguments in argument_lists:
+                futures.append(self.submit(fn, *arguments))
+        except PoolSaturatedError:
+            for future in futures:
+                future.cancel()
+            raise
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "maxQueue": self.max_queue,
+                "inFlight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,295 @@
+"""
+Server-side chat sessions.
+
+generate-birth-chart stores the chart under an unguessable chart ID, so chat
+requests only send {"chartId", "message"} instead of re-uploading the birth
+details and the whole chart with every message. Sessions hold the chart
+pre-indexed (planet name -> planet, house number -> house) with dignities
+precomputed, so answering a message needs no scans over the chart. Only
+the chart is stored; birth details are personal data that chat never reads.
+
+Backends:
+    MemorySessionBackend  in-process LRU with TTL, bounded by session count
+                          and by approximate bytes (the default)
+    SQLiteSessionBackend  local SQLite file shared by every worker process
+                          on the host; sessions are stored in a compact form
+
+Configuration (environment variables):
+    CHAT_SESSION_BACKEND    "memory" (default) or "sqlite"
+    CHAT_SESSION_DB         SQLite file for the sqlite backend (default data/chat_sessions.db)
+    CHAT_SESSION_MAX        max sessions kept (default 10000)
+    CHAT_SESSION_MAX_BYTES  max approximate bytes kept in memory (default 64 MiB)
+    CHAT_SESSION_TTL        seconds a session stays valid since last use (default 86400)
+"""
+import collections
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from birth_chart import build_chart
+from chart_model import ChartRecord
+from ephemeris import PLANETS, SIGNS, dignity
+
+logger = logging.getLogger(__name__)
+
+# Measured memory of an indexed chart beyond its compact form (the chart,
+# house and planet dicts and the indexes), used for the memory bound
+SESSION_OVERHEAD_BYTES = 7168
+
+
+class ChartSession:
+    """
+    A birth chart indexed for chat; treat it as read-only. The chart may be
+    a ChartRecord or a chart dict.
+    """
+
+    __slots__ = ('chart_id', 'chart', 'planets', 'houses', 'dignities', 'size', 'fingerprint')
+
+    def __init__(self, chart_id, chart):
+        if isinstance(chart, ChartRecord):
+            chart = chart.to_dict()
+        self.chart_id = chart_id
+        self.chart = chart
+        self.planets = {p['planet']: p for p in chart.get('planets', [])}
+        self.houses = {h['number']: h for h in chart.get('houses', [])}
+        self.dignities = {name: dignity(name, p['sign']) for name, p in self.planets.items()}
+        self.size = 0
+        # Content hash of the chart, set on first use (insight_backends.chart_fingerprint)
+        self.fingerprint = None
+
+    @property
+    def ascendant(self):
+        return self.chart.get('ascendant')
+
+    def to_compact(self):
+        """
+        Compact JSON form: ascendant sign index, ascendant degrees (or null)
+        and [sign index, house, degrees] per planet in PLANETS order. Birth
+        details are not kept; chat needs only the chart.
+        """
+        return json.dumps([
+            SIGNS.index(self.ascendant),
+            self.chart.get('ascendantDegrees'),
+            [[SIGNS.index(p['sign']), p['house'], p['degrees']] for p in (self.planets[name] for name in PLANETS)],
+        ], separators=(',', ':'))
+
+    @classmethod
+    def from_compact(cls, chart_id, compact):
+        fields = json.loads(compact)
+        if isinstance(fields[1], list):
+            # Older rows: no ascendant degrees, birth details last (ignored)
+            ascendant_sign, planets = fields[:2]
+            ascendant_degrees = None
+        else:
+            ascendant_sign, ascendant_degrees, planets = fields[:3]
+        signs, houses, degrees = zip(*planets) if planets else ((), (), ())
+        return cls(chart_id, build_chart(ascendant_sign, signs, houses, degrees, ascendant_degrees))
+
+
+def new_chart_id():
+    return secrets.token_urlsafe(12)
+
+
+class MemorySessionBackend:
+    """In-process LRU/TTL session store bounded by count and approximate bytes."""
+
+    def __init__(self, max_sessions=10000, max_bytes=64 << 20, ttl=86400):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, chart_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(chart_id)
+            if entry is None:
+                return None
+            session, expires = entry
+            if expires <= now:
+                self._remove(chart_id)
+                self.expirations += 1
+                return None
+            # Sliding expiry: active conversations stay alive
+            self._sessions[chart_id] = (session, now + self.ttl)
+            self._sessions.move_to_end(chart_id)
+            return session
+
+    def put(self, session):
+        if not session.size:
+            session.size = len(session.to_compact()) + SESSION_OVERHEAD_BYTES
+        with self._lock:
+            if session.chart_id in self._sessions:
+                self._remove(session.chart_id)
+            self._sessions[session.chart_id] = (session, time.monotonic() + self.ttl)
+            self.bytes += session.size
+            while self._sessions and (len(self._sessions) > self.max_sessions or self.bytes > self.max_bytes):
+                self._remove(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def delete(self, chart_id):
+        with self._lock:
+            if chart_id in self._sessions:
+                self._remove(chart_id)
+
+    def _remove(self, chart_id):
+        session, _ = self._sessions.pop(chart_id)
+        self.bytes -= session.size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "maxSessions": self.max_sessions,
+                "bytes": self.bytes,
+                "maxBytes": self.max_bytes,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteSessionBackend:
+    """
+    Session store in a local SQLite file, shared by all processes on the host.
+    Sessions are re-indexed on load, which costs a few microseconds.
+    """
+
+    def __init__(self, path, max_sessions=10000, ttl=86400):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # Reconnect after fork so workers never share a parent's handle
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, chart_id):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, last_used FROM sessions WHERE id = ?", (chart_id,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            with conn:
+                conn.execute("UPDATE sessions SET last_used = ? WHERE id = ?", (now, chart_id))
+        return ChartSession.from_compact(chart_id, row[0])
+
+    def put(self, session):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, value, last_used) VALUES (?, ?, ?)",
+                    (session.chart_id, session.to_compact(), time.time()),
+                )
+            self._writes += 1
+            # Trim now and then rather than on every write
+            if self._writes % 256 == 0:
+                self._trim(conn)
+
+    def delete(self, chart_id):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (chart_id,))
+
+    def _trim(self, conn):
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE last_used < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE id IN ("
+                "SELECT id FROM sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def stats(self):
+        with self._lock:
+            count = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": count,
+            "maxSessions": self.max_sessions,
+            "ttl": self.ttl,
+        }
+
+
+class ChatSessionStore:
+    """Creates and looks up chart sessions on a pluggable backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, default_db_path=None):
+        max_sessions = int(os.environ.get('CHAT_SESSION_MAX', 10000))
+        ttl = float(os.environ.get('CHAT_SESSION_TTL', 86400))
+        if os.environ.get('CHAT_SESSION_BACKEND', 'memory') == 'sqlite':
+            path = os.environ.get('CHAT_SESSION_DB', default_db_path)
+            return cls(SQLiteSessionBackend(path, max_sessions=max_sessions, ttl=ttl))
+        max_bytes = int(os.environ.get('CHAT_SESSION_MAX_BYTES', 64 << 20))
+        return cls(MemorySessionBackend(max_sessions=max_sessions, max_bytes=max_bytes, ttl=ttl))
+
+    def create(self, chart):
+        """Store a chart and return its session, or None if the backend failed."""
+        session = ChartSession(new_chart_id(), chart)
+        try:
+            self.backend.put(session)
+        except sqlite3.Error as e:
+            logger.error("Chat session backend error: %s", e)
+            return None
+        with self._lock:
+            self.created += 1
+        return session
+
+    def get(self, chart_id):
+        """The session for chart_id, or None if unknown or expired."""
+        session = None
+        if isinstance(chart_id, str) and chart_id:
+            try:
+                session = self.backend.get(chart_id)
+            except sqlite3.Error as e:
+                logger.error("Chat session backend error: %s", e)
+        with self._lock:
+            if session is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return session
+
+    def stats(self):
+        stats = self.backend.stats()
+        with self._lock:
+            stats.update(created=self.created, hits=self.hits, misses=self.misses)
+        return stats
@@ -0,0 +1,172 @@
+"""
+Shared swisseph setup and Vedic astrology mappings.
+"""
+import os
+
+import numpy as np
+import swisseph as swe
+
+# Planet and signs mappings
+PLANETS = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
+SIGNS = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
+         'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
+
+PLANET_DICT = {
+    'Sun': swe.SUN,
+    'Moon': swe.MOON,
+    'Mercury': swe.MERCURY,
+    'Venus': swe.VENUS,
+    'Mars': swe.MARS,
+    'Jupiter': swe.JUPITER,
+    'Saturn': swe.SATURN,
+    'Rahu': swe.MEAN_NODE,  # North Node
+    'Ketu': -1  # South Node, calculated from Rahu
+}
+
+NAKSHATRAS = ['Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra', 'Punarvasu',
+              'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni', 'Hasta',
+              'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha', 'Mula', 'Purva Ashadha',
+              'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha', 'Purva Bhadrapada',
+              'Uttara Bhadrapada', 'Revati']
+NAKSHATRA_SPAN = 360.0 / 27
+
+AYANAMSA = 'Lahiri'
+
+SIDEREAL_MODES = {
+    'Lahiri': swe.SIDM_LAHIRI,
+    'Raman': swe.SIDM_RAMAN,
+    'Krishnamurti': swe.SIDM_KRISHNAMURTI,
+}
+
+# You need to download ephemeris files from https://www.astro.com/ftp/swisseph/ephe/
+# and place them in the ephemeris directory
+EPHE_PATH = os.path.join(os.path.dirname(__file__), 'ephemeris')
+
+
+# swisseph flags for sidereal positions and speeds in the configured mode
+SIDEREAL_FLAGS = swe.FLG_SWIEPH | swe.FLG_SPEED | swe.FLG_SIDEREAL
+
+
+def init_swisseph():
+    """
+    Point swisseph at the ephemeris files and select the AYANAMSA sidereal
+    mode. swisseph state is per process, so chart pool workers call this too.
+    """
+    swe.set_ephe_path(EPHE_PATH)
+    swe.set_sid_mode(SIDEREAL_MODES[AYANAMSA])
+
+
+init_swisseph()
+
+# Dignities: exaltation sign (debilitation is the opposite sign) and own signs
+EXALTATION_SIGNS = {
+    'Sun': 'Aries', 'Moon': 'Taurus', 'Mercury': 'Virgo', 'Venus': 'Pisces',
+    'Mars': 'Capricorn', 'Jupiter': 'Cancer', 'Saturn': 'Libra',
+    'Rahu': 'Taurus', 'Ketu': 'Scorpio',
+}
+OWN_SIGNS = {
+    'Sun': ('Leo',), 'Moon': ('Cancer',), 'Mercury': ('Gemini', 'Virgo'),
+    'Venus': ('Taurus', 'Libra'), 'Mars': ('Aries', 'Scorpio'),
+    'Jupiter': ('Sagittarius', 'Pisces'), 'Saturn': ('Capricorn', 'Aquarius'),
+    'Rahu': (), 'Ketu': (),
+}
+
+
+def dignity(planet, sign):
+    """'exalted', 'debilitated', 'own sign' or 'neutral' for a planet in a sign."""
+    exaltation = EXALTATION_SIGNS.get(planet)
+    if exaltation == sign:
+        return 'exalted'
+    if exaltation is not None and SIGNS[(SIGNS.index(exaltation) + 6) % 12] == sign:
+        return 'debilitated'
+    if sign in OWN_SIGNS.get(planet, ()):
+        return 'own sign'
+    return 'neutral'
+
+
+# swisseph bodies actually computed; Ketu (last in PLANET_DICT) mirrors Rahu
+GRAHA_IDS = [planet_id for planet_id in PLANET_DICT.values() if planet_id != -1]
+PLANET_IDS = list(PLANET_DICT.values())
+
+
+def sidereal_longitude(julian_day, planet_id):
+    """Sidereal longitude and daily speed of one graha at a Julian day (UT)."""
+    xx = swe.calc_ut(julian_day, planet_id if planet_id != -1 else swe.MEAN_NODE, SIDEREAL_FLAGS)[0]
+    lon = xx[0]
+    if planet_id == -1:
+        lon += 180
+    return lon % 360, xx[3]
+
+
+def sidereal_ascendant(julian_day, lat, lon):
+    """Sidereal ascendant longitude at a Julian day (UT) and place."""
+    return swe.houses_ex(julian_day, lat, lon, b'P', swe.FLG_SIDEREAL)[1][0]
+
+
+# Optional precomputed interpolation table ("table mode"); see ephemeris_table.py
+_table = None
+
+
+def use_table(path):
+    """Serve sidereal_positions from a precomputed table, or live swisseph if path is None."""
+    global _table
+    if path is None:
+        _table = None
+        return
+    from ephemeris_table import EphemerisTable
+    _table = EphemerisTable(path)
+
+
+def sidereal_positions(julian_days):
+    """
+    Sidereal longitudes and daily speeds of all grahas, in PLANET_DICT order,
+    for an array of Julian days (UT). Returns two (len(julian_days), 9) arrays.
+    Uses the precomputed table when table mode is on.
+    """
+    if _table is not None:
+        return _table.sidereal_positions(julian_days)
+    return live_sidereal_positions(julian_days)
+
+
+def sidereal_longitudes(julian_days, columns):
+    """
+    Sidereal longitudes of only some grahas (PLANET_DICT column indices), as
+    a (len(julian_days), len(columns)) array. Live, only those bodies are
+    computed, which is far cheaper than sidereal_positions for one or two.
+    """
+    if _table is not None:
+        return _table.sidereal_positions(julian_days)[0][:, list(columns)]
+    julian_days = np.atleast_1d(np.asarray(julian_days, dtype=float))
+    planet_ids = [PLANET_IDS[col] for col in columns]
+    lons = np.empty((len(julian_days), len(planet_ids)))
+    for k, jd in enumerate(julian_days.tolist()):
+        for i, planet_id in enumerate(planet_ids):
+            lons[k, i] = sidereal_longitude(jd, planet_id)[0]
+    return lons
+
+
+def live_sidereal_positions(julian_days):
+    """
+    sidereal_positions computed directly with swisseph.
+
+    swisseph has no array API, so the calls are made one date at a time (all
+    planets for a date together, which keeps swisseph's per-date cache warm)
+    straight into preallocated arrays.
+    """
+    julian_days = np.atleast_1d(np.asarray(julian_days, dtype=float))
+    count = len(julian_days)
+    lons = np.empty((count, len(PLANET_DICT)))
+    speeds = np.empty((count, len(PLANET_DICT)))
+    for k, jd in enumerate(julian_days.tolist()):
+        for col, planet_id in enumerate(GRAHA_IDS):
+            xx = swe.calc_ut(jd, planet_id, SIDEREAL_FLAGS)[0]
+            lons[k, col] = xx[0]
+            speeds[k, col] = xx[3]
+    lons[:, -1] = lons[:, -2] + 180
+    speeds[:, -1] = speeds[:, -2]
+    lons %= 360
+    return lons, speeds
+
+
+if os.environ.get('EPHEMERIS_TABLE'):
+    use_table(os.environ['EPHEMERIS_TABLE'])
@@ -0,0 +1,192 @@
+"""
+Precomputed sidereal ephemeris with cubic Hermite interpolation ("table mode").
+
+The table holds the sidereal longitude and daily speed of every graha computed
+by swisseph (Rahu included, Ketu derived) on a regular Julian-day grid, stored
+as a .npy array of shape (samples, 2, bodies) plus a small JSON header, and is
+memory-mapped at load. Lookups interpolate between the two neighbouring grid
+points using both value and speed (cubic Hermite), fully vectorized, so a
+batch of dates costs a few array operations instead of one swisseph call per
+planet per date. Dates outside the table fall back to live swisseph.
+
+Error bound: with the default 1-day step the interpolated longitude stays
+within 1 arcsec of live swisseph (the Moon is the worst case, ~0.6"; the
+slow planets are orders of magnitude better). The exception is the day or so
+around a planet's conjunction with the Sun, where swisseph's gravitational
+light deflection adds a narrow bump the grid cannot follow; there the error
+can reach ~15" (0.004 deg), still far below anything that moves a sign, house
+or displayed degree. Run the `check` command to measure a specific table.
+
+Usage:
+    python ephemeris_table.py build data/ephemeris_table.npy --start 1900 --end 2100 --step 1
+    python ephemeris_table.py check data/ephemeris_table.npy --samples 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import swisseph as swe
+
+from birth_instant import julian_day_ut
+from ephemeris import AYANAMSA, GRAHA_IDS, PLANETS, live_sidereal_positions
+
+# 2: built with the Lahiri sidereal mode actually set (see ephemeris.init_swisseph)
+# 3: built from swisseph's own sidereal positions (FLG_SIDEREAL)
+TABLE_VERSION = 3
+# p99 bound everywhere, and max bound including solar conjunctions
+ERROR_BOUND_ARCSEC = 1.0
+CONJUNCTION_BOUND_ARCSEC = 30.0
+
+
+def header_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def build_table(path, start_year=1900, end_year=2100, step_days=1.0):
+    """Compute the table with live swisseph and write it to path."""
+    import datetime
+    start_jd = julian_day_ut(datetime.datetime(start_year, 1, 1))
+    end_jd = julian_day_ut(datetime.datetime(end_year, 12, 31))
+    julian_days = np.arange(start_jd, end_jd + step_days, step_days)
+
+    lons, speeds = live_sidereal_positions(julian_days)
+
+    bodies = len(GRAHA_IDS)
+    table = np.empty((len(julian_days), 2, bodies))
+    table[:, 0, :] = lons[:, :bodies]
+    table[:, 1, :] = speeds[:, :bodies]
+    np.save(path, table)
+
+    header = {
+        "version": TABLE_VERSION,
+        "startJd": float(start_jd),
+        "stepDays": float(step_days),
+        "samples": len(julian_days),
+        "bodies": PLANETS[:bodies],
+        "ayanamsa": AYANAMSA,
+        "swissephVersion": swe.version,
+    }
+    with open(header_path(path), 'w') as f:
+        json.dump(header, f, indent=2)
+    return header
+
+
+class EphemerisTable:
+    """Memory-mapped interpolation table; see the module docstring."""
+
+    def __init__(self, path):
+        with open(header_path(path)) as f:
+            header = json.load(f)
+        if header.get("version") != TABLE_VERSION:
+            raise ValueError(f"Unsupported ephemeris table version in {path}")
+        if header.get("ayanamsa") != AYANAMSA:
+            raise ValueError(f"Ephemeris table {path} was built for {header.get('ayanamsa')}, not {AYANAMSA}")
+        self.header = header
+        self.start_jd = header["startJd"]
+        self.step = header["stepDays"]
+        self.samples = header["samples"]
+        self._table = np.load(path, mmap_mode='r').view(np.ndarray)
+
+    @property
+    def end_jd(self):
+        return self.start_jd + (self.samples - 1) * self.step
+
+    def sidereal_positions(self, julian_days):
+        """
+        Same contract as ephemeris.live_sidereal_positions: (n, 9) sidereal
+        longitudes and daily speeds in PLANET_DICT order.
+        """
+        julian_days = np.atleast_1d(np.asarray(julian_days, dtype=float))
+        position = (julian_days - self.start_jd) / self.step
+        index = np.floor(position).astype(np.int64)
+        inside = (index >= 0) & (index < self.samples - 1)
+
+        count = len(julian_days)
+        lons = np.empty((count, len(PLANETS)))
+        speeds = np.empty((count, len(PLANETS)))
+        bodies = len(GRAHA_IDS)
+
+        if inside.all():
+            rows, t = index, position - index
+        else:
+            rows, t = index[inside], (position - index)[inside]
+        t = t[:, None]
+
+        before = self._table[rows]
+        after = self._table[rows + 1]
+        p0, m0 = before[:, 0, :], before[:, 1, :] * self.step
+        p1, m1 = after[:, 0, :], after[:, 1, :] * self.step
+        # Unwrap across 360 -> 0 so the segment is continuous
+        p1 = p0 + (p1 - p0 + 180) % 360 - 180
+
+        t2 = t * t
+        t3 = t2 * t
+        lon = ((2 * t3 - 3 * t2 + 1) * p0 + (t3 - 2 * t2 + t) * m0
+               + (3 * t2 - 2 * t3) * p1 + (t3 - t2) * m1)
+        speed = ((6 * t2 - 6 * t) * (p0 - p1) + (3 * t2 - 4 * t + 1) * m0
+                 + (3 * t2 - 2 * t) * m1) / self.step
+
+        if inside.all():
+            lons[:, :bodies], speeds[:, :bodies] = lon, speed
+        else:
+            lons[inside, :bodies], speeds[inside, :bodies] = lon, speed
+            outside = ~inside
+            live_lons, live_speeds = live_sidereal_positions(julian_days[outside])
+            lons[outside], speeds[outside] = live_lons, live_speeds
+
+        lons[:, -1] = lons[:, -2] + 180
+        speeds[:, -1] = speeds[:, -2]
+        lons %= 360
+        return lons, speeds
+
+
+def check_table(path, samples=20000, seed=0):
+    """Compare interpolated positions with live swisseph at random dates."""
+    table = EphemerisTable(path)
+    rng = np.random.default_rng(seed)
+    julian_days = rng.uniform(table.start_jd, table.end_jd, samples)
+    expected, _ = live_sidereal_positions(julian_days)
+    actual, _ = table.sidereal_positions(julian_days)
+    errors = np.abs((actual - expected + 180) % 360 - 180) * 3600
+    return {name: {"maxArcsec": float(errors[:, col].max()),
+                   "p99Arcsec": float(np.percentile(errors[:, col], 99))}
+            for col, name in enumerate(PLANETS)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precomputed ephemeris table tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="generate a table with live swisseph")
+    build.add_argument('path')
+    build.add_argument('--start', type=int, default=1900, help="first year")
+    build.add_argument('--end', type=int, default=2100, help="last year")
+    build.add_argument('--step', type=float, default=1.0, help="grid step in days")
+
+    check = commands.add_parser('check', help="measure interpolation error against live swisseph")
+    check.add_argument('path')
+    check.add_argument('--samples', type=int, default=20000)
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        start = time.perf_counter()
+        header = build_table(args.path, args.start, args.end, args.step)
+        print(f"Wrote {header['samples']} samples to {args.path} in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    report = check_table(args.path, args.samples)
+    worst_p99 = max(errors["p99Arcsec"] for errors in report.values())
+    worst = max(errors["maxArcsec"] for errors in report.values())
+    for name, errors in report.items():
+        print(f"{name:<8} max {errors['maxArcsec']:8.4f}\"   p99 {errors['p99Arcsec']:8.4f}\"")
+    print(f"worst p99 {worst_p99:.4f}\" (bound {ERROR_BOUND_ARCSEC}\"), "
+          f"worst max {worst:.4f}\" (bound {CONJUNCTION_BOUND_ARCSEC}\")")
+    ok = worst_p99 <= ERROR_BOUND_ARCSEC and worst <= CONJUNCTION_BOUND_ARCSEC
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
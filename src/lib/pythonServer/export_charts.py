@@ -0,0 +1,387 @@
+"""
+Bulk chart export: birth records from CSV or Parquet to charts in NDJSON or
+Parquet, computed across a process pool, for offline analytics.
+
+Input columns are the generate-birth-chart fields: date, time, and location
+or lat/lon (with an optional timezone); an id column is copied to the output.
+Records are read as a stream and cut into chunks; workers parse and compute
+each chunk with app.calculate_vedic_birth_charts, and results are written in
+input order. At most two chunks per worker are in flight, so memory stays
+flat however large the input is.
+
+Outputs:
+    ndjson   one chart per line, in the generate-birth-chart response shape,
+             plus "row" (0-based input row) and "id"
+    parquet  a directory of part files with one row per planet: row, id,
+             planet, sign, house, degrees, ascendant, ascendantDegrees
+             (needs pyarrow)
+
+Records that cannot be parsed or computed are written to an errors file
+(NDJSON: row, id, error) instead of the output; they never get mock charts.
+
+Progress is saved to <output>.checkpoint every --checkpoint-rows rows, after
+the output is flushed. --resume continues from the last checkpoint: output
+written after it is discarded and the rows it covers are skipped.
+
+Usage:
+    python export_charts.py births.csv charts.ndjson --workers 8
+    python export_charts.py births.parquet charts.parquet --workers 8 --resume
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+CHECKPOINT_VERSION = 1
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+PART_PATTERN = 'part-{:05d}.parquet'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("Parquet input and output need pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def file_format(path, given=None):
+    """'parquet' or the text format, from an explicit choice or the file extension."""
+    if given:
+        return given
+    return 'parquet' if path.lower().endswith(PARQUET_SUFFIXES) else None
+
+
+def _plain(value):
+    # Parquet dates and times become the ISO strings the parser expects
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def read_records(path, input_format, skip=0, batch_size=4096):
+    """Birth record dicts from a CSV or Parquet file, after the first skip rows."""
+    if input_format == 'parquet':
+        pyarrow = _require_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            for record in batch.slice(skip).to_pylist():
+                yield {key: _plain(value) for key, value in record.items()}
+            skip = 0
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            for record in itertools.islice(csv.DictReader(f), skip, None):
+                # Empty cells are missing fields, as they would be in a JSON body
+                yield {key: value for key, value in record.items() if value != ''}
+
+
+def count_records(path, input_format):
+    """Rows in a Parquet file (from its footer); None for CSV, which would need a full read."""
+    if input_format == 'parquet':
+        return _require_pyarrow().parquet.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def init_worker():
+    """Runs once in each worker process."""
+    # Workers compute in-process; a chart pool inside each would oversubscribe the cores
+    os.environ['CHART_POOL_WORKERS'] = '0'
+    from chart_pool import init_worker as init_chart_worker
+    init_chart_worker()
+
+
+def export_chunk(first_row, records, output_format, id_column):
+    """
+    Charts for one chunk of records: (output, errors, count). output is a
+    list of NDJSON lines or a pyarrow Table with one row per planet; errors
+    are NDJSON lines.
+    """
+    import app
+    from chart_model import encode_chart
+    from ephemeris import PLANETS, SIGNS
+
+    charts = app.calculate_vedic_birth_charts(records)
+    lines, errors = [], []
+    columns = collections.defaultdict(list)
+    for row, (record, chart) in enumerate(zip(records, charts), first_row):
+        record_id = record.get(id_column)
+        if isinstance(chart, dict):
+            errors.append(json.dumps({"row": row, "id": record_id, "error": chart.get("error")}) + "\n")
+        elif output_format == 'parquet':
+            for planet, sign, house, degrees in zip(PLANETS, chart.signs, chart.houses, chart.degrees):
+                columns['row'].append(row)
+                columns['id'].append(None if record_id is None else str(record_id))
+                columns['planet'].append(planet)
+                columns['sign'].append(SIGNS[sign])
+                columns['house'].append(house)
+                columns['degrees'].append(degrees)
+                columns['ascendant'].append(chart.ascendant)
+                columns['ascendantDegrees'].append(chart.ascendant_degrees)
+        else:
+            lines.append(encode_chart(chart, extra={"row": row, "id": record_id}) + "\n")
+    if output_format == 'parquet':
+        return _planet_table(columns), errors, len(records)
+    return lines, errors, len(records)
+
+
+def _planet_table(columns):
+    pyarrow = _require_pyarrow()
+    return pyarrow.table({
+        'row': pyarrow.array(columns['row'], pyarrow.int64()),
+        'id': pyarrow.array(columns['id'], pyarrow.string()),
+        'planet': pyarrow.array(columns['planet'], pyarrow.string()).dictionary_encode(),
+        'sign': pyarrow.array(columns['sign'], pyarrow.string()).dictionary_encode(),
+        'house': pyarrow.array(columns['house'], pyarrow.int8()),
+        'degrees': pyarrow.array(columns['degrees'], pyarrow.float64()),
+        'ascendant': pyarrow.array(columns['ascendant'], pyarrow.string()).dictionary_encode(),
+        'ascendantDegrees': pyarrow.array(columns['ascendantDegrees'], pyarrow.float64()),
+    })
+
+
+class TextSink:
+    """An append-only text file that can be cut back to a checkpointed size."""
+
+    def __init__(self, path, resume_bytes=None):
+        self.path = path
+        if resume_bytes is None:
+            self._file = open(path, 'wb')
+        else:
+            self._file = open(path, 'r+b' if os.path.exists(path) else 'wb')
+            self._file.truncate(resume_bytes)
+            self._file.seek(resume_bytes)
+
+    def write(self, lines):
+        self._file.write(''.join(lines).encode())
+
+    def commit(self):
+        """Flush and return the size to resume from."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    A directory of Parquet part files, one per checkpoint. Tables are
+    buffered up to row_group_rows rows and written as one row group.
+    """
+
+    def __init__(self, directory, resume_parts=None, row_group_rows=131072):
+        self.pyarrow = _require_pyarrow()
+        self.directory = directory
+        self.row_group_rows = row_group_rows
+        os.makedirs(directory, exist_ok=True)
+        self.parts = resume_parts or 0
+        # Parts written after the checkpoint, and unfinished ones, are discarded
+        for path in glob.glob(os.path.join(directory, 'part-*.parquet*')):
+            name = os.path.basename(path)
+            if name.endswith('.tmp') or int(name[5:10]) >= self.parts:
+                os.remove(path)
+        self._writer = None
+        self._buffer = []
+        self._buffered = 0
+
+    def _part_path(self):
+        return os.path.join(self.directory, PART_PATTERN.format(self.parts))
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        table = self.pyarrow.concat_tables(self._buffer, promote_options='permissive')
+        if self._writer is None:
+            self._writer = self.pyarrow.parquet.ParquetWriter(self._part_path() + '.tmp', table.schema)
+        self._writer.write_table(table)
+        self._buffer, self._buffered = [], 0
+
+    def write(self, table):
+        if table.num_rows:
+            self._buffer.append(table)
+            self._buffered += table.num_rows
+        if self._buffered >= self.row_group_rows:
+            self._flush()
+
+    def commit(self):
+        """Close the current part file and return the number of finished parts."""
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._part_path() + '.tmp', self._part_path())
+            self._writer = None
+            self.parts += 1
+        return self.parts
+
+    def close(self):
+        self.commit()
+
+
+def _input_identity(path):
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "inputSize": stat.st_size, "inputModified": stat.st_mtime_ns}
+
+
+def load_checkpoint(path, input_path):
+    """The saved checkpoint, or None; exits if it belongs to a different or changed input."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        sys.exit(f"{path} is from an unsupported version; remove it to start over")
+    identity = _input_identity(input_path)
+    if any(checkpoint.get(key) != value for key, value in identity.items()):
+        sys.exit(f"{path} was written for a different or modified input; remove it to start over")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, path)
+
+
+class Progress:
+    """Rows, errors and charts/s, reported to stderr every interval seconds."""
+
+    def __init__(self, total=None, done=0, interval=5.0):
+        self.total = total
+        self.start_rows = done
+        self.rows = done
+        self.errors = 0
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._reported = self.started
+
+    def add(self, rows, errors):
+        self.rows += rows
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._reported >= self.interval:
+            self._reported = now
+            self.report()
+
+    def rate(self):
+        return (self.rows - self.start_rows) / max(time.perf_counter() - self.started, 1e-9)
+
+    def report(self, final=False):
+        rate = self.rate()
+        text = f"{self.rows:,} rows, {self.errors:,} errors, {rate:,.0f} charts/s"
+        if self.total:
+            text += f", {self.rows / self.total:.1%}"
+            if not final and rate > 0:
+                text += f", {(self.total - self.rows) / rate:,.0f}s left"
+        if final:
+            text = f"done: {text} in {time.perf_counter() - self.started:,.1f}s"
+        print(text, file=sys.stderr, flush=True)
+
+
+def _chunks(records, first_row, chunk_size):
+    row = first_row
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield row, chunk
+        row += len(chunk)
+
+
+def export(input_path, output_path, input_format=None, output_format=None, errors_path=None, workers=1,
+           chunk_size=1000, checkpoint_rows=100000, resume=False, id_column='id', progress_interval=5.0):
+    """Export every record of input_path; returns the final Progress."""
+    input_format = file_format(input_path, input_format) or 'csv'
+    output_format = file_format(output_path, output_format) or 'ndjson'
+    errors_path = errors_path or output_path.rstrip('/') + '.errors.ndjson'
+    checkpoint_path = output_path.rstrip('/') + '.checkpoint'
+    checkpoint = load_checkpoint(checkpoint_path, input_path) if resume else None
+    if checkpoint is not None and checkpoint["format"] != output_format:
+        sys.exit(f"{checkpoint_path} is for {checkpoint['format']} output")
+    done = checkpoint["rows"] if checkpoint else 0
+
+    if output_format == 'parquet':
+        sink = ParquetSink(output_path, checkpoint["parts"] if checkpoint else None)
+    else:
+        sink = TextSink(output_path, checkpoint["outputBytes"] if checkpoint else None)
+    errors = TextSink(errors_path, checkpoint["errorsBytes"] if checkpoint else None)
+    progress = Progress(count_records(input_path, input_format), done, progress_interval)
+    if checkpoint:
+        progress.errors = checkpoint["errors"]
+        print(f"resuming after row {done:,}", file=sys.stderr)
+
+    def commit():
+        state = sink.commit()
+        save_checkpoint(checkpoint_path, dict(
+            _input_identity(input_path), version=CHECKPOINT_VERSION, format=output_format, rows=progress.rows,
+            errors=progress.errors, errorsBytes=errors.commit(),
+            **({"parts": state} if output_format == 'parquet' else {"outputBytes": state})))
+
+    last_commit = done
+
+    def write(result):
+        nonlocal last_commit
+        output, error_lines, count = result
+        sink.write(output)
+        errors.write(error_lines)
+        progress.add(count, len(error_lines))
+        if progress.rows - last_commit >= checkpoint_rows:
+            commit()
+            last_commit = progress.rows
+
+    chunks = _chunks(read_records(input_path, input_format, done), done, chunk_size)
+    try:
+        if workers <= 0:
+            init_worker()
+            for first_row, records in chunks:
+                write(export_chunk(first_row, records, output_format, id_column))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                                        initializer=init_worker) as pool:
+                # A bounded window of chunks in flight, written in submission order
+                pending = collections.deque()
+                for first_row, records in chunks:
+                    pending.append(pool.submit(export_chunk, first_row, records, output_format, id_column))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+        commit()
+    finally:
+        sink.close()
+        errors.close()
+    progress.report(final=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute birth charts for a CSV or Parquet file of birth records")
+    parser.add_argument('input')
+    parser.add_argument('output', help="NDJSON file, or a directory for Parquet output")
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help="default: from the extension")
+    parser.add_argument('--format', dest='output_format', choices=['ndjson', 'parquet'],
+                        help="default: from the extension")
+    parser.add_argument('--errors', help="errors file (default <output>.errors.ndjson)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="0 computes in this process")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--checkpoint-rows', type=int, default=100000)
+    parser.add_argument('--resume', action='store_true', help="continue from <output>.checkpoint")
+    parser.add_argument('--id-column', default='id')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    export(args.input, args.output, args.input_format, args.output_format, args.errors, args.workers,
+           args.chunk_size, args.checkpoint_rows, args.resume, args.id_column, args.progress_interval)
+
+
+if __name__ == "__main__":
+    main()
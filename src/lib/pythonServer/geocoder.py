@@ -0,0 +1,528 @@
+"""
+Offline geocoder backed by a GeoNames-style gazetteer.
+
+The tab-separated gazetteer (same columns as GeoNames' citiesNNNN.txt dumps) is
+compiled once into a directory of flat binary files that are memory-mapped at
+startup, so opening even a large index costs a few milliseconds:
+
+    meta.json       counts, timezone table, source file fingerprint
+    places.npy      lat, lon, population, timezone index, country per place
+    names.bin       display names (UTF-8), sliced by names_off.npy
+    keys.bin        normalized lookup keys (name, ascii name, alternate names)
+                    in sorted order, sliced by keys_off.npy
+    key_place.npy   place index for each key
+    hash.npy        open-addressing table: crc32(key) -> first key index
+    grid_start.npy  1-degree lat/lon cells -> slice of grid_places.npy, the
+                    places in that cell (for nearest-place and timezone lookups)
+
+Exact names resolve through the hash table, prefixes through binary search on
+the sorted keys, and misspellings through a bounded fuzzy scan of keys sharing
+the first letters.
+
+Build or rebuild an index from the command line:
+    python geocoder.py build data/gazetteer.tsv data/gazetteer.idx
+
+An index is compiled into a temporary sibling directory and swapped into
+place, holding an exclusive lock on <index_dir>.lock; readers open it under
+a shared lock. Workers that find the index stale at the same time build it
+once, and never see a half-written or replaced file. Processes that already
+mapped the old index keep reading it until they reopen.
+"""
+import argparse
+import contextlib
+import csv
+import difflib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unicodedata
+import zlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, build the index before starting workers
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# GeoNames column positions
+COL_NAME, COL_ASCII, COL_ALTERNATES = 1, 2, 3
+COL_LAT, COL_LON, COL_COUNTRY, COL_POPULATION, COL_TIMEZONE = 4, 5, 8, 14, 17
+
+PLACE_DTYPE = np.dtype([
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+    ('population', '<i8'),
+    ('tz', '<i4'),
+    ('country', 'S2'),
+])
+
+# Country names users commonly type after the city; ISO codes also work
+COUNTRY_ALIASES = {
+    'india': 'IN', 'bharat': 'IN', 'pakistan': 'PK', 'bangladesh': 'BD',
+    'nepal': 'NP', 'sri lanka': 'LK', 'usa': 'US', 'us': 'US', 'america': 'US',
+    'united states': 'US', 'united states of america': 'US', 'uk': 'GB',
+    'united kingdom': 'GB', 'england': 'GB', 'scotland': 'GB', 'great britain': 'GB',
+    'canada': 'CA', 'australia': 'AU', 'new zealand': 'NZ', 'uae': 'AE',
+    'united arab emirates': 'AE', 'singapore': 'SG', 'malaysia': 'MY',
+    'germany': 'DE', 'france': 'FR', 'italy': 'IT', 'spain': 'ES',
+    'netherlands': 'NL', 'ireland': 'IE', 'japan': 'JP', 'china': 'CN',
+    'south africa': 'ZA', 'kenya': 'KE', 'nigeria': 'NG', 'brazil': 'BR',
+    'mexico': 'MX', 'russia': 'RU', 'saudi arabia': 'SA', 'qatar': 'QA',
+}
+
+FUZZY_MIN_RATIO = 0.85
+FUZZY_SCAN_LIMIT = 300
+# Places sharing one exact name that are considered when ranking
+MAX_CANDIDATES = 64
+
+GRID_COLUMNS = 360
+GRID_ROWS = 180
+# Give up on nearest-place searches beyond this many cells (~2000 km)
+MAX_GRID_RINGS = 20
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+class LocationNotFoundError(ValueError):
+    """Raised when a location name has no match in the gazetteer."""
+
+
+def normalize_name(text):
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(_NON_ALNUM.sub(' ', text.lower()).split())
+
+
+def _source_fingerprint(tsv_path):
+    stat = os.stat(tsv_path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+@contextlib.contextmanager
+def _index_lock(index_dir, exclusive):
+    """Hold the index's lock file, exclusively for building or shared for opening."""
+    if fcntl is None:
+        yield
+        return
+    parent = os.path.dirname(os.path.abspath(index_dir))
+    os.makedirs(parent, exist_ok=True)
+    with open(os.path.abspath(index_dir) + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _is_stale(tsv_path, index_dir):
+    """True if the index is missing, from another version, or older than the TSV."""
+    try:
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return True
+    return meta.get("version") != INDEX_VERSION or meta.get("source") != _source_fingerprint(tsv_path)
+
+
+def build_index(tsv_path, index_dir):
+    """Compile a GeoNames-style TSV into a memory-mappable index directory."""
+    with _index_lock(index_dir, exclusive=True):
+        return _rebuild(tsv_path, index_dir)
+
+
+def _rebuild(tsv_path, index_dir):
+    """Compile into a temporary directory and swap it in; the caller holds the exclusive lock."""
+    index_dir = os.path.abspath(index_dir)
+    parent, base = os.path.split(index_dir)
+    temporary = tempfile.mkdtemp(prefix=base + '.', suffix='.tmp', dir=parent)
+    try:
+        meta = _compile(tsv_path, temporary)
+        os.chmod(temporary, 0o755)
+        if os.path.exists(index_dir):
+            # Directories cannot be replaced in one rename: move the old one aside first
+            retired = tempfile.mkdtemp(prefix=base + '.', suffix='.old', dir=parent)
+            os.rename(index_dir, os.path.join(retired, base))
+            os.rename(temporary, index_dir)
+            shutil.rmtree(retired)
+        else:
+            os.rename(temporary, index_dir)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+    return meta
+
+
+def _compile(tsv_path, index_dir):
+    """Write the index files for a TSV into an existing, empty directory."""
+    places = []
+    names = []
+    timezones = {}
+    entries = []  # (key, -population, place index)
+
+    with open(tsv_path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if not row or row[0].startswith('#') or len(row) <= COL_TIMEZONE:
+                continue
+            index = len(places)
+            population = int(row[COL_POPULATION] or 0)
+            tz_index = timezones.setdefault(row[COL_TIMEZONE], len(timezones))
+            places.append((float(row[COL_LAT]), float(row[COL_LON]), population,
+                           tz_index, row[COL_COUNTRY].encode('ascii')))
+            names.append(row[COL_NAME])
+
+            keys = {normalize_name(row[COL_NAME]), normalize_name(row[COL_ASCII])}
+            keys.update(normalize_name(alt) for alt in row[COL_ALTERNATES].split(','))
+            keys.discard('')
+            entries.extend((key, -population, index) for key in keys)
+
+    if not places:
+        raise ValueError(f"No places found in {tsv_path}")
+
+    entries.sort()
+    encoded_keys = [key.encode('utf-8') for key, _, _ in entries]
+
+    # Hash table over distinct keys, pointing at the first (most populous) entry
+    slot_count = 1 << max(4, (2 * len(encoded_keys)).bit_length())
+    slots = np.full(slot_count, -1, dtype='<i4')
+    mask = slot_count - 1
+    previous = None
+    for i, key in enumerate(encoded_keys):
+        if key == previous:
+            continue
+        previous = key
+        slot = zlib.crc32(key) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = i
+
+    np.save(os.path.join(index_dir, 'places.npy'), np.array(places, dtype=PLACE_DTYPE))
+    _write_strings(index_dir, 'names', [name.encode('utf-8') for name in names])
+    _write_strings(index_dir, 'keys', encoded_keys)
+    np.save(os.path.join(index_dir, 'key_place.npy'),
+            np.array([index for _, _, index in entries], dtype='<i4'))
+    np.save(os.path.join(index_dir, 'hash.npy'), slots)
+
+    # Spatial grid in CSR form: places sorted by cell, with per-cell start offsets
+    place_array = np.array(places, dtype=PLACE_DTYPE)
+    cells = _grid_cell(place_array['lat'], place_array['lon'])
+    np.save(os.path.join(index_dir, 'grid_places.npy'), np.argsort(cells, kind='stable').astype('<i4'))
+    np.save(os.path.join(index_dir, 'grid_start.npy'),
+            np.searchsorted(np.sort(cells), np.arange(GRID_ROWS * GRID_COLUMNS + 1)).astype('<i4'))
+
+    meta = {
+        "version": INDEX_VERSION,
+        "places": len(places),
+        "keys": len(encoded_keys),
+        "timezones": sorted(timezones, key=timezones.get),
+        "source": _source_fingerprint(tsv_path),
+    }
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _grid_cell(lat, lon):
+    row = np.clip(np.floor(np.asarray(lat) + 90), 0, GRID_ROWS - 1).astype(np.int64)
+    column = np.floor(np.asarray(lon) + 180).astype(np.int64) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def _write_strings(index_dir, name, values):
+    offsets = np.zeros(len(values) + 1, dtype='<i8')
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    with open(os.path.join(index_dir, name + '.bin'), 'wb') as f:
+        f.write(b''.join(values))
+    np.save(os.path.join(index_dir, name + '_off.npy'), offsets)
+
+
+class Gazetteer:
+    """Read-only view over a compiled gazetteer index."""
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported gazetteer index version in {index_dir}")
+
+        def load(name):
+            # Plain ndarray views skip np.memmap's per-access bookkeeping
+            return np.load(os.path.join(index_dir, name), mmap_mode='r').view(np.ndarray)
+
+        self.timezones = self.meta["timezones"]
+        self._places = load('places.npy')
+        self._population = self._places['population']
+        self._country = self._places['country']
+        self._names, self._names_off = self._map_strings(index_dir, 'names')
+        self._keys, self._keys_off = self._map_strings(index_dir, 'keys')
+        self._key_place = load('key_place.npy')
+        slots = load('hash.npy')
+        self._mask = len(slots) - 1
+        self._key_count = self.meta["keys"]
+
+        # Scalar reads on the hot path go through memoryviews, which index
+        # several times faster than numpy scalars
+        self._names_off_view = self._int_view(self._names_off)
+        self._keys_off_view = self._int_view(self._keys_off)
+        self._key_place_view = self._int_view(self._key_place)
+        self._slots_view = self._int_view(slots)
+        self._grid_start = self._int_view(load('grid_start.npy'))
+        self._grid_places = load('grid_places.npy')
+
+    @staticmethod
+    def _map_strings(index_dir, name):
+        with open(os.path.join(index_dir, name + '.bin'), 'rb') as f:
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = np.load(os.path.join(index_dir, name + '_off.npy'), mmap_mode='r').view(np.ndarray)
+        return blob, offsets
+
+    @staticmethod
+    def _int_view(array):
+        return memoryview(array).cast('B').cast(array.dtype.char)
+
+    def __len__(self):
+        return self.meta["places"]
+
+    def _key(self, i):
+        offsets = self._keys_off_view
+        return self._keys[offsets[i]:offsets[i + 1]]
+
+    def place(self, index, confidence=None):
+        """Return a place record as a dict."""
+        record = self._places[index]
+        offsets = self._names_off_view
+        place = {
+            "name": self._names[offsets[index]:offsets[index + 1]].decode('utf-8'),
+            "country": record['country'].decode('ascii'),
+            "lat": float(record['lat']),
+            "lon": float(record['lon']),
+            "timezone": self.timezones[record['tz']],
+            "population": int(record['population']),
+        }
+        if confidence is not None:
+            place["confidence"] = round(confidence, 3)
+        return place
+
+    def _exact(self, encoded):
+        """Key range [lo, hi) equal to encoded, most populous place first."""
+        slot = zlib.crc32(encoded) & self._mask
+        while True:
+            first = self._slots_view[slot]
+            if first == -1:
+                return first, first
+            if self._key(first) == encoded:
+                break
+            slot = (slot + 1) & self._mask
+        last = first + 1
+        while last < self._key_count and last - first < MAX_CANDIDATES and self._key(last) == encoded:
+            last += 1
+        return first, last
+
+    def _lower_bound(self, encoded, lo=0, hi=None):
+        hi = self._key_count if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _prefix(self, encoded):
+        """Key range [lo, hi) of keys starting with encoded."""
+        lo = self._lower_bound(encoded)
+        # 0xff never occurs in UTF-8, so it sorts after every continuation
+        return lo, self._lower_bound(encoded + b'\xff', lo)
+
+    def lookup(self, query):
+        """
+        Resolve a free-text location such as "Pune, India" to the best place.
+        Returns a place dict with a confidence score in [0, 1], or None.
+        """
+        parts = [normalize_name(part) for part in query.split(',')]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None
+        name, qualifiers = parts[0], parts[1:]
+        encoded = name.encode('utf-8')
+        lo, hi = self._exact(encoded)
+
+        # "Pune India" without a comma: peel a trailing country name off
+        if lo == hi and not qualifiers:
+            words = name.split()
+            for cut in range(1, min(3, len(words) - 1) + 1):
+                tail = ' '.join(words[-cut:])
+                if tail in COUNTRY_ALIASES:
+                    name, qualifiers = ' '.join(words[:-cut]), [tail]
+                    encoded = name.encode('utf-8')
+                    lo, hi = self._exact(encoded)
+                    break
+
+        # Only country names and ISO codes narrow the match; states are ignored
+        countries = [COUNTRY_ALIASES.get(q, q.upper()).encode('ascii') for q in qualifiers
+                     if q in COUNTRY_ALIASES or len(q) == 2]
+
+        if lo < hi:
+            return self._rank(lo, hi, countries, base=1.0)
+
+        lo, hi = self._prefix(encoded)
+        if lo < hi:
+            shortest = int(np.diff(self._keys_off[lo:min(hi, lo + MAX_CANDIDATES) + 1]).min())
+            base = 0.5 + 0.3 * len(encoded) / shortest
+            return self._rank(lo, hi, countries, base=base)
+
+        return self._fuzzy(name, countries)
+
+    def _rank(self, lo, hi, countries, base):
+        # A place listed under several matching keys only skews the share
+        # estimate, so candidates are not deduplicated
+        candidates = self._key_place[lo:hi]
+        if countries:
+            qualified = candidates[np.isin(self._country[candidates], countries)]
+            if len(qualified):
+                candidates = qualified
+            else:
+                base *= 0.6
+        populations = self._population[candidates]
+        best = int(populations.argmax())
+        total = int(populations.sum())
+        if len(candidates) == 1:
+            confidence = base
+        else:
+            share = int(populations[best]) / total if total else 1.0 / len(candidates)
+            confidence = base * max(0.5, share)
+        return self.place(int(candidates[best]), confidence)
+
+    def _fuzzy(self, name, countries):
+        if len(name) < 3:
+            return None
+        lo, hi = self._prefix(name[:2].encode('utf-8'))
+        if lo == hi:
+            return None
+
+        # Only keys of similar length can reach the ratio threshold
+        lengths = np.diff(self._keys_off[lo:hi + 1])
+        positions = lo + np.flatnonzero(np.abs(lengths - len(name)) <= 2)
+        if len(positions) > FUZZY_SCAN_LIMIT:
+            populations = self._population[self._key_place[positions]]
+            positions = positions[np.argpartition(-populations, FUZZY_SCAN_LIMIT)[:FUZZY_SCAN_LIMIT]]
+
+        matcher = difflib.SequenceMatcher(b=name, autojunk=False)
+        best_ratio, best_index = 0.0, None
+        for position in positions.tolist():
+            matcher.set_seq1(self._key(position).decode('utf-8'))
+            if matcher.real_quick_ratio() < FUZZY_MIN_RATIO or matcher.quick_ratio() < FUZZY_MIN_RATIO:
+                continue
+            ratio = matcher.ratio()
+            index = self._key_place_view[position]
+            if countries and self._country[index] not in countries:
+                ratio *= 0.9
+            if ratio > best_ratio:
+                best_ratio, best_index = ratio, index
+        if best_index is None or best_ratio < FUZZY_MIN_RATIO:
+            return None
+        return self.place(best_index, 0.7 * best_ratio)
+
+    def _cell_places(self, row, column):
+        cell = row * GRID_COLUMNS + column % GRID_COLUMNS
+        return self._grid_places[self._grid_start[cell]:self._grid_start[cell + 1]]
+
+    def nearest(self, lat, lon):
+        """
+        Index of the place closest to (lat, lon), or None if nothing lies
+        within MAX_GRID_RINGS cells.
+        """
+        row0 = min(max(int(np.floor(lat + 90)), 0), GRID_ROWS - 1)
+        column0 = int(np.floor(lon + 180))
+        found, first_hit = [], None
+        for ring in range(MAX_GRID_RINGS + 1):
+            # A hit in ring r can still be beaten by a place in ring r + 1,
+            # so search one ring past the first hit
+            if first_hit is not None and ring > first_hit + 1:
+                break
+            for row in range(max(row0 - ring, 0), min(row0 + ring, GRID_ROWS - 1) + 1):
+                edge = row in (row0 - ring, row0 + ring)
+                columns = range(column0 - ring, column0 + ring + 1) if edge else (column0 - ring, column0 + ring)
+                for column in columns:
+                    cell_places = self._cell_places(row, column)
+                    if len(cell_places):
+                        found.append(cell_places)
+            if found and first_hit is None:
+                first_hit = ring
+        if not found:
+            return None
+        candidates = np.concatenate(found)
+        lats = self._places['lat'][candidates]
+        lons = self._places['lon'][candidates]
+        # Equirectangular distance is plenty for picking the closest place
+        dlon = (lons - lon + 180) % 360 - 180
+        distances = (lats - lat) ** 2 + (dlon * np.cos(np.radians(lat))) ** 2
+        return int(candidates[distances.argmin()])
+
+    def autocomplete(self, prefix, limit=10):
+        """Places whose names start with prefix, most populous first."""
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        lo, hi = self._prefix(key.encode('utf-8'))
+        candidates = self._key_place[lo:hi]
+        populations = self._population[candidates]
+        # Over-select so places matched by several keys still fill the limit
+        top = min(len(candidates), limit * 2)
+        if top < len(candidates):
+            chosen = np.argpartition(-populations, top)[:top]
+        else:
+            chosen = np.arange(len(candidates))
+        chosen = chosen[np.argsort(-populations[chosen], kind='stable')]
+        best = list(dict.fromkeys(candidates[chosen].tolist()))[:limit]
+        return [self.place(index) for index in best]
+
+
+def load_gazetteer(tsv_path, index_dir):
+    """
+    Open the compiled index, building it first if it is missing or older
+    than the source TSV.
+    """
+    with _index_lock(index_dir, exclusive=False):
+        if not _is_stale(tsv_path, index_dir):
+            return Gazetteer(index_dir)
+    with _index_lock(index_dir, exclusive=True):
+        # Another worker may have rebuilt it while this one waited for the lock
+        if _is_stale(tsv_path, index_dir):
+            logger.info("Building gazetteer index %s from %s", index_dir, tsv_path)
+            _rebuild(tsv_path, index_dir)
+        return Gazetteer(index_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline gazetteer tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="compile a GeoNames-style TSV")
+    build.add_argument('tsv')
+    build.add_argument('index_dir')
+
+    lookup = commands.add_parser('lookup', help="resolve a location name")
+    lookup.add_argument('index_dir')
+    lookup.add_argument('query')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        meta = build_index(args.tsv, args.index_dir)
+        print(f"Indexed {meta['places']} places under {meta['keys']} keys into {args.index_dir}")
+    else:
+        print(json.dumps(Gazetteer(args.index_dir).lookup(args.query)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
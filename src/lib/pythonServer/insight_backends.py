@@ -0,0 +1,463 @@
+"""
+Pluggable chat insight backends with streamed answers.
+
+    rules   (default) the rule-based responder (intent router and the
+            interpretation tables), streamed word by word. It is also the
+            fallback whenever another backend is busy or fails before its
+            first token, so chat keeps answering
+    stub    deterministic local stand-in for a language model: simulated
+            prefill and decode rates, with its own prompt prefix cache, so
+            time to first token and tokens/s can be benchmarked offline
+    http    an OpenAI-compatible chat completions server, streamed over SSE
+
+Every prompt starts with the same system text and the chart's context, and
+only then the question. InsightService keeps the context per chart in a
+prefix cache, so it is built once per chart and is byte-identical across
+questions (which is what lets a model server reuse its cached prefill), and
+streams answers as events:
+
+    {"type": "meta", "backend": ...}
+    {"type": "token", "text": ...}       one per token
+    {"type": "done", "content": ..., "tokens": ...}
+
+Concurrent identical questions about the same chart are coalesced: one
+generation runs, and every request replays its tokens. At most
+max_concurrent generations run at once (the client pool); a request that
+cannot get a slot within queue_wait seconds is answered by the rules backend.
+
+Configuration (environment variables):
+    INSIGHT_BACKEND            "rules" (default), "stub" or "http"
+    INSIGHT_MAX_CONCURRENT     generations in flight per process (default 8)
+    INSIGHT_QUEUE_WAIT         seconds to wait for a slot before falling back (default 0.25)
+    INSIGHT_MAX_TOKENS         longest answer in tokens (default 256)
+    INSIGHT_PREFIX_CACHE_SIZE  chart contexts kept (default 1024)
+    INSIGHT_STUB_PREFILL_RATE  stub prompt tokens/s (default 2000)
+    INSIGHT_STUB_TOKEN_RATE    stub generated tokens/s (default 50)
+    INSIGHT_BACKEND_URL        http server base URL, e.g. http://localhost:8000/v1
+    INSIGHT_MODEL              model name sent to the http server
+    INSIGHT_API_KEY            bearer token for the http server (optional)
+    INSIGHT_TIMEOUT            http connect/read timeout in seconds (default 30)
+"""
+import collections
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+
+from intent_router import ordinal
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a Vedic astrologer. Answer questions about the birth chart below in a few warm, "
+    "concrete sentences. Placements are sidereal (Lahiri) with whole-sign houses."
+)
+
+
+class InsightBackendError(RuntimeError):
+    """A backend failed to produce an answer."""
+
+
+def chart_fingerprint(session):
+    """
+    Content hash of a session's chart: equal charts share prompt prefixes and
+    cached answers. Kept on the session after the first call.
+    """
+    if session.fingerprint is None:
+        chart = session.chart
+        placements = [(p.get('planet'), p.get('sign'), p.get('house'), p.get('degrees'))
+                      for p in chart.get('planets', [])]
+        data = json.dumps([chart.get('ascendant'), chart.get('ascendantDegrees'), placements], separators=(',', ':'))
+        session.fingerprint = hashlib.blake2b(data.encode(), digest_size=12).hexdigest()
+    return session.fingerprint
+
+
+def normalize_message(message):
+    """Lower-cased with whitespace collapsed, so trivially different messages coalesce."""
+    return ' '.join((message or '').lower().split())
+
+
+def chart_context(session):
+    """The chart as prompt text: ascendant, then one line per planet with its dignity."""
+    lines = [SYSTEM_PROMPT, "", f"Ascendant: {session.ascendant or 'unknown'}"]
+    for name, planet in session.planets.items():
+        line = f"{name}: {planet['sign']}, {ordinal(planet['house'])} house, {float(planet.get('degrees', 0)):.1f} degrees"
+        if session.dignities.get(name):
+            line += f", {session.dignities[name]}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+class Prompt:
+    """A question with its chart context prefix, and the session it is about."""
+
+    __slots__ = ('prefix_key', 'prefix', 'message', 'session')
+
+    def __init__(self, prefix_key, prefix, message, session):
+        self.prefix_key = prefix_key
+        self.prefix = prefix
+        self.message = message
+        self.session = session
+
+
+class RuleBasedBackend:
+    """
+    The rule-based responder, streamed. responder(message, session) returns
+    the /chat response dict; its content is streamed as words and its other
+    fields (e.g. "planetaryData", and "type" as "insightType") are passed
+    through.
+    """
+
+    name = 'rules'
+
+    def __init__(self, responder):
+        self.responder = responder
+
+    def stream(self, prompt, max_tokens=None):
+        """Text chunks, then one dict of extra response fields."""
+        response = self.responder(prompt.message, prompt.session)
+        words = response['content'].split(' ')
+        for i, word in enumerate(words):
+            yield word if i == 0 else ' ' + word
+        extra = {key: value for key, value in response.items()
+                 if key not in ('id', 'content', 'sender', 'timestamp', 'type')}
+        if 'type' in response:
+            # "type" names the stream event, so the answer's type goes under another key
+            extra['insightType'] = response['type']
+        yield extra
+
+
+class StubBackend:
+    """
+    Deterministic fake model. Prompt tokens (words) are "prefilled" at
+    prefill_rate per second, except for a prefix it has seen recently, which
+    it keeps like a model server's prefix cache; the answer is then decoded
+    at token_rate per second. The answer is drawn from the prompt's words
+    with a generator seeded by the prompt, so it depends only on the prompt.
+    """
+
+    name = 'stub'
+
+    def __init__(self, prefill_rate=2000.0, token_rate=50.0, cache_size=1024, max_tokens=256):
+        self.prefill_rate = prefill_rate
+        self.token_rate = token_rate
+        self.cache_size = cache_size
+        self.max_tokens = max_tokens
+        self._prefixes = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(prefill_rate=float(os.environ.get('INSIGHT_STUB_PREFILL_RATE', 2000)),
+                   token_rate=float(os.environ.get('INSIGHT_STUB_TOKEN_RATE', 50)),
+                   max_tokens=int(os.environ.get('INSIGHT_MAX_TOKENS', 256)))
+
+    def _prefill_tokens(self, prompt):
+        prefix_tokens = len(prompt.prefix.split())
+        message_tokens = len(prompt.message.split())
+        with self._lock:
+            if prompt.prefix_key in self._prefixes:
+                self._prefixes.move_to_end(prompt.prefix_key)
+                self.prefix_hits += 1
+                return message_tokens
+            self.prefix_misses += 1
+            self._prefixes[prompt.prefix_key] = True
+            while len(self._prefixes) > self.cache_size:
+                self._prefixes.popitem(last=False)
+        return prefix_tokens + message_tokens
+
+    def stream(self, prompt, max_tokens=None):
+        max_tokens = min(max_tokens or self.max_tokens, self.max_tokens)
+        rng = random.Random(zlib.crc32((prompt.prefix + prompt.message).encode()))
+        vocabulary = prompt.prefix.split() + prompt.message.split()
+        length = rng.randint(max(1, max_tokens // 2), max_tokens)
+        deadline = time.perf_counter() + self._prefill_tokens(prompt) / self.prefill_rate
+        for i in range(length):
+            # Sleep to each token's due time, so the rate holds however slow the consumer
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield rng.choice(vocabulary) if i == 0 else ' ' + rng.choice(vocabulary)
+            deadline += 1 / self.token_rate
+
+    def stats(self):
+        with self._lock:
+            return {"prefixHits": self.prefix_hits, "prefixMisses": self.prefix_misses,
+                    "prefixSize": len(self._prefixes)}
+
+
+class HTTPBackend:
+    """
+    OpenAI-compatible /chat/completions with stream=true. Connections come
+    from one requests.Session sized to the service's concurrency, so they are
+    reused instead of reconnecting per question.
+    """
+
+    name = 'http'
+
+    def __init__(self, base_url, model, api_key=None, timeout=30.0, max_tokens=256, pool_size=8):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self._requests = requests
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if api_key:
+            self._session.headers['Authorization'] = f"Bearer {api_key}"
+
+    @classmethod
+    def from_env(cls):
+        base_url = os.environ.get('INSIGHT_BACKEND_URL')
+        if not base_url:
+            raise ValueError("INSIGHT_BACKEND=http needs INSIGHT_BACKEND_URL")
+        return cls(base_url, os.environ.get('INSIGHT_MODEL', 'default'), os.environ.get('INSIGHT_API_KEY'),
+                   timeout=float(os.environ.get('INSIGHT_TIMEOUT', 30)),
+                   max_tokens=int(os.environ.get('INSIGHT_MAX_TOKENS', 256)),
+                   pool_size=int(os.environ.get('INSIGHT_MAX_CONCURRENT', 8)))
+
+    def stream(self, prompt, max_tokens=None):
+        body = {
+            "model": self.model,
+            # The chart context is the whole system message, so it is the shared prompt prefix
+            "messages": [{"role": "system", "content": prompt.prefix},
+                         {"role": "user", "content": prompt.message}],
+            "max_tokens": min(max_tokens or self.max_tokens, self.max_tokens),
+            "stream": True,
+        }
+        try:
+            with self._session.post(self.url, json=body, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        return
+                    choices = json.loads(data).get('choices') or [{}]
+                    text = (choices[0].get('delta') or {}).get('content')
+                    if text:
+                        yield text
+        except (self._requests.RequestException, ValueError) as e:
+            raise InsightBackendError(str(e)) from e
+
+
+BACKENDS = {
+    'stub': StubBackend,
+    'http': HTTPBackend,
+}
+
+
+class _Generation:
+    """One running generation, replayed to every request coalesced onto it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.extra = {}
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def run(self, backend, prompt, max_tokens, release):
+        try:
+            for chunk in backend.stream(prompt, max_tokens):
+                with self.condition:
+                    if isinstance(chunk, dict):
+                        self.extra.update(chunk)
+                    else:
+                        self.chunks.append(chunk)
+                    self.condition.notify_all()
+        except Exception as e:
+            logger.warning("Insight backend %s failed: %s", backend.name, e)
+            self.error = e
+        finally:
+            release()
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def follow(self):
+        """Chunks as they arrive; raises the backend's error, if any, at the end."""
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.chunks) and not self.done:
+                    self.condition.wait()
+                chunks = self.chunks[position:]
+                finished = self.done
+            yield from chunks
+            position += len(chunks)
+            if finished and position == len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class InsightService:
+    """Streams answers from a backend, with the prefix cache, coalescing and fallback."""
+
+    def __init__(self, backend, fallback, max_concurrent=8, queue_wait=0.25, max_tokens=256,
+                 prefix_cache_size=1024):
+        self.backend = backend
+        self.fallback = fallback
+        self.queue_wait = queue_wait
+        self.max_tokens = max_tokens
+        self.prefix_cache_size = prefix_cache_size
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._prefixes = collections.OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.generations = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+        self.busy = 0
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+
+    @classmethod
+    def from_env(cls, responder):
+        """Service for INSIGHT_BACKEND, falling back to the rule-based responder."""
+        fallback = RuleBasedBackend(responder)
+        name = os.environ.get('INSIGHT_BACKEND', 'rules')
+        if name == 'rules':
+            backend = fallback
+        elif name in BACKENDS:
+            backend = BACKENDS[name].from_env()
+        else:
+            raise ValueError(f"Unknown insight backend {name!r}; expected rules or one of {sorted(BACKENDS)}")
+        return cls(backend, fallback,
+                   max_concurrent=int(os.environ.get('INSIGHT_MAX_CONCURRENT', 8)),
+                   queue_wait=float(os.environ.get('INSIGHT_QUEUE_WAIT', 0.25)),
+                   max_tokens=int(os.environ.get('INSIGHT_MAX_TOKENS', 256)),
+                   prefix_cache_size=int(os.environ.get('INSIGHT_PREFIX_CACHE_SIZE', 1024)))
+
+    def prompt(self, message, session):
+        """The Prompt for a question, with the chart context from the prefix cache."""
+        key = chart_fingerprint(session)
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is not None:
+                self._prefixes.move_to_end(key)
+                self.prefix_hits += 1
+        if prefix is None:
+            prefix = chart_context(session)
+            with self._lock:
+                self.prefix_misses += 1
+                self._prefixes[key] = prefix
+                while len(self._prefixes) > self.prefix_cache_size:
+                    self._prefixes.popitem(last=False)
+        return Prompt(key, prefix, message or '', session)
+
+    def _release(self, key):
+        with self._lock:
+            self._generations.pop(key, None)
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _generation(self, prompt):
+        """The running generation for this question, joining one or starting one; None when busy."""
+        key = (prompt.prefix_key, normalize_message(prompt.message))
+        with self._lock:
+            generation = self._generations.get(key)
+            if generation is not None:
+                self.coalesced += 1
+                return generation
+        if not self._slots.acquire(timeout=self.queue_wait):
+            with self._lock:
+                self.busy += 1
+            return None
+        with self._lock:
+            # Another request may have started it while this one waited for the slot
+            generation = self._generations.get(key)
+            if generation is not None:
+                self.coalesced += 1
+                self._slots.release()
+                return generation
+            generation = self._generations[key] = _Generation()
+            self.generations += 1
+            self.in_flight += 1
+        threading.Thread(target=generation.run, args=(self.backend, prompt, self.max_tokens,
+                                                      lambda: self._release(key)),
+                         name='insight-generation', daemon=True).start()
+        return generation
+
+    def _fallback_events(self, prompt):
+        with self._lock:
+            self.fallbacks += 1
+        yield {"type": "meta", "backend": self.fallback.name}
+        yield from self._answer_events(self.fallback.stream(prompt))
+
+    @staticmethod
+    def _answer_events(chunks, extra=None):
+        """Token events, then "done" with the content and extra fields (or "error")."""
+        content = []
+        done = {}
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, dict):
+                    done.update(chunk)
+                    continue
+                content.append(chunk)
+                yield {"type": "token", "text": chunk}
+        except Exception as e:
+            # Tokens were already sent, so report the failure in-stream
+            yield {"type": "error", "error": str(e)}
+            return
+        done.update(extra or {})
+        done.update(type="done", content=''.join(content), tokens=len(content))
+        yield done
+
+    def stream(self, message, session):
+        """Answer events for a question about a session's chart."""
+        prompt = self.prompt(message, session)
+        if self.backend is self.fallback:
+            yield {"type": "meta", "backend": self.backend.name}
+            yield from self._answer_events(self.fallback.stream(prompt))
+            return
+
+        generation = self._generation(prompt)
+        if generation is None:
+            yield from self._fallback_events(prompt)
+            return
+
+        chunks = generation.follow()
+        # Wait for the first token before committing to the backend, so a
+        # failure before it is still answered by the rules backend
+        try:
+            first = next(chunks, None)
+        except Exception:
+            yield from self._fallback_events(prompt)
+            return
+        yield {"type": "meta", "backend": self.backend.name}
+        yield from self._answer_events(itertools.chain([] if first is None else [first], chunks), generation.extra)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "backend": self.backend.name,
+                "maxConcurrent": self.max_concurrent,
+                "inFlight": self.in_flight,
+                "generations": self.generations,
+                "coalesced": self.coalesced,
+                "fallbacks": self.fallbacks,
+                "busy": self.busy,
+                "prefixHits": self.prefix_hits,
+                "prefixMisses": self.prefix_misses,
+                "prefixSize": len(self._prefixes),
+            }
+        if hasattr(self.backend, 'stats'):
+            stats["backendStats"] = self.backend.stats()
+        return stats
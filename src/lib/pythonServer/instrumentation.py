@@ -0,0 +1,306 @@
+"""
+Lightweight instrumentation: timing spans, histograms, Prometheus metrics,
+a per-request sampling profiler and structured logging.
+
+    with span("chart.houses"):
+        ...
+
+Every span is recorded in a per-stage latency histogram. Spans inside a
+request traced with start_trace/finish_trace are also collected for that
+request; the app returns them in the Server-Timing header. A span costs
+one to two microseconds, so spans belong around stages, not inner loops.
+
+REGISTRY.render() writes every histogram, counter and registered collector
+in the Prometheus text format, for the /metrics endpoint.
+
+Configuration (environment variables):
+    LOG_LEVEL    DEBUG, INFO (default), WARNING, ...
+    LOG_FORMAT   "text" (default) or "json", one object per line
+    PROFILE_DIR  directory for request profiles; when set, a request with
+                 ?profile=1 or an X-Profile: 1 header is sampled and its
+                 folded stacks are written there (see SamplingProfiler)
+"""
+import bisect
+import collections
+import contextvars
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# Latency buckets in seconds, 100 us to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and a locked increment."""
+
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """(cumulative bucket counts, sum, count)."""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+def _labels_text(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """Histograms and counters by name and labels, plus gauge collectors."""
+
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _metric(self, kind, name, help_text, labels):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        metric = family[2].get(key) if family else None
+        if metric is None:
+            with self._lock:
+                family = self._families.setdefault(name, (kind, help_text, {}))
+                metric = family[2].setdefault(key, Histogram() if kind == 'histogram' else Counter())
+        return metric
+
+    def histogram(self, name, help_text, **labels):
+        return self._metric('histogram', name, help_text, labels)
+
+    def counter(self, name, help_text, **labels):
+        return self._metric('counter', name, help_text, labels)
+
+    def register_collector(self, collector):
+        """
+        collector() returns (name, help, labels dict, value) gauge samples,
+        read on every render.
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            families = [(name, kind, help_text, list(metrics.items()))
+                        for name, (kind, help_text, metrics) in sorted(self._families.items())]
+        for name, kind, help_text, metrics in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in metrics:
+                if kind == 'counter':
+                    lines.append(f"{name}{_labels_text(labels)} {metric.value}")
+                    continue
+                cumulative, total, count = metric.snapshot()
+                for bound, running in zip(metric.bounds + (float('inf'),), cumulative):
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_labels_text(labels + (('le', le),))} {running}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {total!r}")
+                lines.append(f"{name}_count{_labels_text(labels)} {count}")
+
+        gauges = collections.OrderedDict()
+        for collector in self._collectors:
+            try:
+                for name, help_text, labels, value in collector():
+                    gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+            except Exception:
+                logging.getLogger(__name__).exception("Metrics collector failed")
+        for name, (help_text, samples) in gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels_text(tuple(sorted(labels.items())))} {float(value or 0)!r}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_trace = contextvars.ContextVar('trace', default=None)
+_stages = {}
+
+
+def _stage_histogram(name):
+    histogram = _stages.get(name)
+    if histogram is None:
+        histogram = _stages[name] = REGISTRY.histogram(
+            'astrology_stage_seconds', "Time spent in each request stage", stage=name)
+    return histogram
+
+
+class Span:
+    """Times a block; see span()."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _stage_histogram(self.name).observe(elapsed)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((self.name, elapsed))
+        return False
+
+
+def span(name):
+    """Context manager timing a stage into the stage histogram and the current trace."""
+    return Span(name)
+
+
+def start_trace():
+    """Begin collecting spans for the current request; returns a token for finish_trace."""
+    return _trace.set([])
+
+
+def finish_trace(token):
+    """Stop collecting and return the request's (stage, seconds) spans in completion order."""
+    trace = _trace.get() or []
+    _trace.reset(token)
+    return trace
+
+
+def server_timing(trace):
+    """
+    Server-Timing header value for a trace, durations in milliseconds.
+    Repeated stages (one per record in batch requests) are summed into one
+    entry, so the header stays small.
+    """
+    totals = {}
+    for name, seconds in trace:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every interval seconds from a helper
+    thread, and aggregates the stacks in the folded format read by
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.folded")
+        with open(path, 'w') as f:
+            f.write(self.folded())
+        return path
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed as extra={"fields": {...}} are merged in."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                    .isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text, with extra={"fields": {...}} appended as key=value pairs."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Set up the root logger from LOG_LEVEL and LOG_FORMAT, unless the host
+    (gunicorn, a test runner) has already configured logging.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if (fmt or os.environ.get('LOG_FORMAT', 'text')) == 'json'
+                         else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel((level or os.environ.get('LOG_LEVEL', 'INFO')).upper())
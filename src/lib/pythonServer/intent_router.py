@@ -0,0 +1,139 @@
+"""
+Compiled intent router for chat messages.
+
+Every keyword, planet name and house pattern is compiled once at import
+into a single alternation regex with one named group per intent or entity
+kind, so a message is scanned in one pass and each hit is classified by the
+name of the group that matched.
+
+route_message returns the matched intents ranked by the same precedence the
+chat has always used (planetary positions, then a specific planet, a house,
+remedies and the topics), together with the extracted entities: planets in
+order of mention, the house number and the topic.
+
+Usage:
+    python intent_router.py "What does my Saturn in the 10th house mean?"
+"""
+import re
+import sys
+
+from ephemeris import PLANETS
+
+# Intents in precedence order; the first matched one answers the message
+INTENTS = ['planetary', 'planet', 'house', 'remedy', 'career', 'relationship', 'health', 'finance']
+INTENT_RANK = {intent: rank for rank, intent in enumerate(INTENTS)}
+
+# Word stems; each matches at a word start, so "jobs" hits "job" but "Sunday" is not the Sun
+KEYWORDS = {
+    'planetary': ['planet', 'position', 'where'],
+    'remedy': ['remed', 'solution', 'fix', 'improve'],
+    'career': ['career', 'profession', 'job', 'work'],
+    'relationship': ['relationship', 'marriage', 'married', 'love', 'partner'],
+    'health': ['health', 'medical', 'wellbeing', 'well-being'],
+    'finance': ['financ', 'money', 'wealth'],
+}
+
+PLANET_ALIASES = {
+    'north node': 'Rahu',
+    'south node': 'Ketu',
+}
+
+ORDINAL_WORDS = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh',
+                 'eighth', 'ninth', 'tenth', 'eleventh', 'twelfth']
+
+# 1-12, longest first so "11th" is never read as "1" followed by junk
+HOUSE_NUMBER = r'(?:1[0-2]|[1-9])'
+HOUSE_ORDINAL = HOUSE_NUMBER + r'(?:st|nd|rd|th)?'
+
+ORDINAL_SUFFIXES = {1: 'st', 2: 'nd', 3: 'rd'}
+
+
+def ordinal(number):
+    """1 -> '1st', 2 -> '2nd', 11 -> '11th', 22 -> '22nd'."""
+    suffix = 'th' if 10 <= number % 100 <= 20 else ORDINAL_SUFFIXES.get(number % 10, 'th')
+    return f"{number}{suffix}"
+
+
+class IntentMatch:
+    """Ranked intents and entities extracted from one message."""
+
+    __slots__ = ('intents', 'hits', 'planets', 'house', 'topic')
+
+    def __init__(self, intents, hits, planets, house, topic):
+        self.intents = intents
+        self.hits = hits
+        self.planets = planets
+        self.house = house
+        self.topic = topic
+
+    @property
+    def intent(self):
+        """The winning intent, or 'general' when nothing matched."""
+        return self.intents[0] if self.intents else 'general'
+
+    @property
+    def planet(self):
+        return self.planets[0] if self.planets else None
+
+    def to_dict(self):
+        return {
+            "intent": self.intent,
+            "intents": self.intents,
+            "hits": self.hits,
+            "planets": self.planets,
+            "house": self.house,
+            "topic": self.topic,
+        }
+
+
+def _build_router():
+    """
+    Compile every pattern into one regex whose group names are the match kinds.
+    All alternatives sit behind a single leading word boundary, so positions
+    inside words are rejected with one check.
+    """
+    planet_names = list(PLANET_ALIASES) + [planet.lower() for planet in PLANETS]
+    alternatives = [
+        # House phrases first: "house 7" must not be taken apart by other alternatives
+        ('house_ordinal', rf'{HOUSE_ORDINAL}\s+house\b'),
+        ('house_number', rf'house\s+(?:no\.?\s*|number\s+)?{HOUSE_NUMBER}\b'),
+        ('house_word', r'(?:' + '|'.join(ORDINAL_WORDS) + r')\s+house\b'),
+        ('planet', r'(?:' + '|'.join(planet_names) + r')\b'),
+    ]
+    for intent, stems in KEYWORDS.items():
+        alternatives.append((intent, r'(?:' + '|'.join(re.escape(stem) for stem in stems) + r')\w*'))
+    return re.compile(r'\b(?:' + '|'.join(f"(?P<{kind}>{pattern})" for kind, pattern in alternatives) + ')')
+
+
+ROUTER = _build_router()
+DIGITS = re.compile(r'\d+')
+PLANET_NAMES = dict(PLANET_ALIASES, **{planet.lower(): planet for planet in PLANETS})
+ORDINAL_NUMBERS = {word: number for number, word in enumerate(ORDINAL_WORDS, 1)}
+
+
+def route_message(message):
+    """Match a chat message against every intent in one pass."""
+    hits = {}
+    planets = []
+    house = None
+    for match in ROUTER.finditer((message or '').lower()):
+        kind = match.lastgroup
+        if kind == 'planet':
+            planet = PLANET_NAMES[match.group()]
+            if planet not in planets:
+                planets.append(planet)
+        elif kind.startswith('house'):
+            if house is None:
+                text = match.group()
+                house = ORDINAL_NUMBERS[text.split()[0]] if kind == 'house_word' \
+                    else int(DIGITS.search(text).group())
+            kind = 'house'
+        hits[kind] = hits.get(kind, 0) + 1
+
+    intents = sorted(hits, key=INTENT_RANK.__getitem__)
+    topic = next((intent for intent in intents if INTENT_RANK[intent] >= INTENT_RANK['remedy']), None)
+    return IntentMatch(intents, hits, planets, house, topic)
+
+
+if __name__ == "__main__":
+    print(route_message(" ".join(sys.argv[1:])).to_dict())
@@ -0,0 +1,193 @@
+"""
+Data-driven interpretation engine for chat insights.
+
+Interpretation content (planet x sign x house readings, sign and dignity
+phrases, house meanings, ascendant traits, remedy rules and topic answers)
+lives in a versioned JSON file, data/interpretations.json by default. At
+startup it is compiled into flat tables indexed by planet, sign and house
+number, with every fixed sentence already rendered, so answering a message
+is a few list lookups; only text that depends on the rest of the chart (the
+planets in a house, the list of remedies, strength figures) is joined per
+request.
+
+Remedy rules and the career, finance and health answers can depend on chart
+strength (strength.ChartStrength): a rule with "weak" in its "when" block
+applies when the planet is weak in the chart, and topics listed under
+"topicStrength" report their houses' Sarvashtakavarga bindus and rank their
+planets by Shadbala.
+
+Editing the data file and restarting the server is enough to change the
+content. Set INTERPRETATIONS_PATH to load a different file.
+"""
+import json
+import os
+
+from ephemeris import PLANETS, SIGNS, dignity
+from intent_router import ordinal
+from strength import sarva_level
+
+INTERPRETATIONS_FORMAT = 1
+
+PLANET_INDEX = {planet: i for i, planet in enumerate(PLANETS)}
+SIGN_INDEX = {sign: i for i, sign in enumerate(SIGNS)}
+HOUSES = range(1, 13)
+
+
+class InterpretationTables:
+    """Compiled interpretation content; see the module docstring."""
+
+    def __init__(self, data):
+        if data.get("format") != INTERPRETATIONS_FORMAT:
+            raise ValueError(f"Unsupported interpretations format: {data.get('format')}")
+        self.revision = data.get("revision")
+        templates = data["templates"]
+
+        # planet_texts[planet][sign][house - 1]: the full planet reading
+        self.planet_texts = [
+            [[self._render_planet(data, templates, planet, sign, house) for house in HOUSES]
+             for sign in SIGNS]
+            for planet in PLANETS
+        ]
+
+        # house_heads[house - 1][sign] / house_tails[house - 1]: the house reading
+        # around the runtime list of planets in it
+        house_head, house_tail = templates["house"].split("{planets}")
+        self.house_heads = [[house_head.format(house=ordinal(house), sign=sign) for sign in SIGNS]
+                            for house in HOUSES]
+        self.house_tails = [house_tail.format(meaning=data["houses"][str(house)]) for house in HOUSES]
+        self.no_planets = templates["noPlanets"]
+        self.house_planets = templates["housePlanets"]
+
+        self.ascendant_texts = [templates["ascendant"].format(sign=sign, trait=data["ascendants"][sign])
+                                for sign in SIGNS]
+        # general_lines[planet][sign][house - 1], for the planets the overview mentions
+        self.general_lines = {
+            planet: [[template.format(sign=sign, house=ordinal(house)) for house in HOUSES] for sign in SIGNS]
+            for planet, template in data["generalPlanets"].items()
+        }
+
+        # remedy_rules[planet][sign][house - 1]: (rule order, text) for every matching rule;
+        # weak_remedy_rules[planet]: the rules that also apply when the planet is weak
+        self.remedy_rules = [[[() for _ in HOUSES] for _ in SIGNS] for _ in PLANETS]
+        self.weak_remedy_rules = [() for _ in PLANETS]
+        for order, rule in enumerate(data["remedies"]["rules"]):
+            planet = rule["planet"]
+            if rule.get("when", {}).get("weak"):
+                self.weak_remedy_rules[PLANET_INDEX[planet]] += ((order, rule["text"]),)
+            for s, sign in enumerate(SIGNS):
+                for house in HOUSES:
+                    if self._rule_applies(rule.get("when"), planet, sign, house):
+                        cell = self.remedy_rules[PLANET_INDEX[planet]][s]
+                        cell[house - 1] += ((order, rule["text"]),)
+        self.general_remedies = tuple(data["remedies"]["general"])
+        self.remedies_template = templates["remedies"]
+        self.remedy_separator = templates["remedySeparator"]
+
+        self.topics = dict(data["topics"])
+        self.planetary = templates["planetary"]
+
+        # topic_strength[topic]: (intro, [(house, ordinal)], planets) for strength-aware answers
+        self.topic_strength = {
+            topic: (entry["intro"], [(house, ordinal(house)) for house in entry["houses"]], entry["planets"])
+            for topic, entry in data.get("topicStrength", {}).items()
+        }
+        self.topic_house = templates.get("topicHouse")
+        self.bindus_levels = templates.get("bindusLevels", {})
+        self.topic_planets = templates.get("topicPlanets")
+        self.topic_weak = templates.get("topicWeak")
+        self.planet_names = templates.get("planetNames", {})
+
+    @staticmethod
+    def _render_planet(data, templates, planet, sign, house):
+        entry = data["planets"][planet]
+        text = templates["planet"].format(label=entry["label"], sign=sign, house=ordinal(house),
+                                          verb=entry["verb"], houseText=entry["houses"][str(house)])
+        text += templates["sign"].format(signText=data["signs"][sign])
+        dignity_text = data["dignities"][dignity(planet, sign)]
+        if dignity_text:
+            text += templates["dignity"].format(dignityText=dignity_text.format(planet=planet, sign=sign))
+        return text
+
+    @staticmethod
+    def _rule_applies(when, planet, sign, house):
+        """Rules without conditions always apply; otherwise any listed condition is enough."""
+        if not when:
+            return True
+        return (dignity(planet, sign) in when.get("dignities", ())
+                or house in when.get("houses", ())
+                or sign in when.get("signs", ()))
+
+    def planet_text(self, planet, sign, house):
+        """The reading for a planet placement, or None for an unknown placement."""
+        try:
+            return self.planet_texts[PLANET_INDEX[planet]][SIGN_INDEX[sign]][house - 1]
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    def house_text(self, house, sign, planet_names):
+        try:
+            head = self.house_heads[house - 1][SIGN_INDEX[sign]]
+            tail = self.house_tails[house - 1]
+        except (KeyError, IndexError, TypeError):
+            return None
+        if not planet_names:
+            return head + self.no_planets + tail
+        planets_text = ", ".join(planet_names)
+        return head + planets_text + tail + self.house_planets.format(planets=planets_text)
+
+    def ascendant_text(self, sign):
+        index = SIGN_INDEX.get(sign)
+        return self.ascendant_texts[index] if index is not None else None
+
+    def general_line(self, planet, sign, house):
+        lines = self.general_lines.get(planet)
+        try:
+            return lines[SIGN_INDEX[sign]][house - 1] if lines else None
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    def remedies_text(self, placements, weak=()):
+        """
+        Remedies for (planet, sign, house) placements, in rule order, then the
+        general ones; weak is the set of planets weak in the chart.
+        """
+        matched = set()
+        for planet, sign, house in placements:
+            try:
+                matched.update(self.remedy_rules[PLANET_INDEX[planet]][SIGN_INDEX[sign]][house - 1])
+            except (KeyError, IndexError, TypeError):
+                continue
+            if planet in weak:
+                matched.update(self.weak_remedy_rules[PLANET_INDEX[planet]])
+        matched = sorted(matched)
+        remedies = [text for _, text in matched]
+        remedies.extend(self.general_remedies)
+        return self.remedies_template.format(remedies=self.remedy_separator.join(remedies))
+
+    def topic_text(self, topic, strength=None):
+        """The answer for a topic, from the chart's ChartStrength when the topic uses it."""
+        if strength is None or topic not in self.topic_strength:
+            return self.topics[topic]
+        intro, houses, planets = self.topic_strength[topic]
+        text = intro
+        for house, house_ordinal in houses:
+            bindus = strength.house_bindus(house)
+            text += self.topic_house.format(house=house_ordinal, sign=SIGNS[(strength.ascendant_sign + house - 1) % 12],
+                                            bindus=bindus, level=self.bindus_levels.get(sarva_level(bindus), ""))
+        ranked = strength.ranked(planets)
+        names = [self.planet_names.get(planet, planet) for planet in planets]
+        if len(ranked) > 1:
+            text += self.topic_planets.format(strongest=self.planet_names.get(ranked[0], ranked[0]),
+                                              weakest=self.planet_names.get(ranked[-1], ranked[-1]),
+                                              planets=" and ".join([", ".join(names[:-1]), names[-1]]))
+        if ranked and ranked[-1] in strength.weak:
+            text += self.topic_weak.format(planet=self.planet_names.get(ranked[-1], ranked[-1]))
+        return text
+
+
+def load_interpretations(path=None):
+    """Load and compile the interpretation data file."""
+    path = path or os.environ.get('INTERPRETATIONS_PATH') or \
+        os.path.join(os.path.dirname(__file__), 'data', 'interpretations.json')
+    with open(path, encoding='utf-8') as f:
+        return InterpretationTables(json.load(f))
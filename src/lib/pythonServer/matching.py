@@ -0,0 +1,248 @@
+"""
+Compatibility matching: Ashtakoota guna milan and synastry aspects.
+
+All eight kootas depend only on the two Moons' nakshatra padas (each pada
+lies in a single nakshatra and a single sign), so they are compiled at import
+into lookup tables KOOTA_TABLES[koota, groom pada, bride pada] and their sum
+GUNA_TABLE, 108 x 108 each. Scoring a query chart against any number of
+candidates is then one floor division and one fancy-index into a table row.
+The top K are picked with np.argpartition, so only those K get sorted, and
+only they get a koota breakdown and synastry aspects.
+
+The dosha exceptions some traditions apply (Nadi or Bhakoot cancelled by
+shared sign lords, and the like) are not applied; scores are the plain
+Ashtakoota totals out of 36.
+
+    matches = match_candidates(query_longitudes, candidate_longitudes, k=10, role='groom')
+"""
+import numpy as np
+
+from ephemeris import NAKSHATRA_SPAN, NAKSHATRAS, PLANETS, SIGNS, sidereal_positions
+
+PADA_SPAN = NAKSHATRA_SPAN / 4
+PADA_COUNT = 108
+MOON = PLANETS.index('Moon')
+
+KOOTAS = ['varna', 'vashya', 'tara', 'yoni', 'grahaMaitri', 'gana', 'bhakoot', 'nadi']
+KOOTA_POINTS = {'varna': 1, 'vashya': 2, 'tara': 3, 'yoni': 4, 'grahaMaitri': 5, 'gana': 6,
+                'bhakoot': 7, 'nadi': 8}
+MAX_SCORE = sum(KOOTA_POINTS.values())
+ROLES = ('groom', 'bride')
+
+# Varna rank by element (fire, earth, air, water): Kshatriya, Vaishya, Shudra, Brahmin
+VARNA_RANK = [2, 1, 0, 3]
+
+# Vashya group per sign: 0 Chatushpada, 1 Manava, 2 Jalachara, 3 Vanachara, 4 Keeta
+VASHYA_GROUP = [0, 0, 1, 2, 3, 1, 1, 4, 1, 0, 1, 2]
+VASHYA_POINTS = [  # [groom group][bride group]
+    [2, 1, 1, 0.5, 1],
+    [1, 2, 0.5, 0, 1],
+    [1, 0.5, 2, 1, 1],
+    [0.5, 0, 1, 2, 0],
+    [1, 1, 1, 0, 2],
+]
+
+# Tara: counting from one nakshatra to the other, these remainders mod 9 are inauspicious
+BAD_TARAS = {3, 5, 7}
+
+# Yoni animal per nakshatra: 0 Horse, 1 Elephant, 2 Sheep, 3 Serpent, 4 Dog, 5 Cat, 6 Rat,
+# 7 Cow, 8 Buffalo, 9 Tiger, 10 Deer, 11 Monkey, 12 Mongoose, 13 Lion
+YONI = [0, 1, 2, 3, 3, 4, 5, 2, 5, 6, 6, 7, 8, 9, 8, 9, 10, 10, 4, 11, 12, 11, 13, 0, 13, 7, 1]
+YONI_POINTS = [
+    [4, 2, 2, 3, 2, 2, 2, 1, 0, 1, 3, 3, 2, 1],
+    [2, 4, 3, 3, 2, 2, 2, 2, 3, 1, 2, 3, 2, 0],
+    [2, 3, 4, 2, 1, 2, 1, 3, 3, 1, 2, 0, 3, 1],
+    [3, 3, 2, 4, 2, 1, 1, 1, 1, 2, 2, 2, 0, 2],
+    [2, 2, 1, 2, 4, 2, 1, 2, 2, 1, 0, 2, 1, 1],
+    [2, 2, 2, 1, 2, 4, 0, 2, 2, 1, 3, 3, 2, 1],
+    [2, 2, 1, 1, 1, 0, 4, 2, 2, 2, 2, 2, 1, 2],
+    [1, 2, 3, 1, 2, 2, 2, 4, 3, 0, 3, 2, 2, 1],
+    [0, 3, 3, 1, 2, 2, 2, 3, 4, 1, 2, 2, 2, 1],
+    [1, 1, 1, 2, 1, 1, 2, 0, 1, 4, 1, 1, 2, 1],
+    [3, 2, 2, 2, 0, 3, 2, 3, 2, 1, 4, 2, 2, 1],
+    [3, 3, 0, 2, 2, 3, 2, 2, 2, 1, 2, 4, 3, 2],
+    [2, 2, 3, 0, 1, 2, 1, 2, 2, 2, 2, 3, 4, 2],
+    [1, 0, 1, 2, 1, 1, 2, 1, 1, 1, 1, 2, 2, 4],
+]
+
+SIGN_LORDS = ['Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
+              'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter']
+# Natural friends and enemies; every other planet is neutral
+FRIENDS = {
+    'Sun': {'Moon', 'Mars', 'Jupiter'}, 'Moon': {'Sun', 'Mercury'},
+    'Mars': {'Sun', 'Moon', 'Jupiter'}, 'Mercury': {'Sun', 'Venus'},
+    'Jupiter': {'Sun', 'Moon', 'Mars'}, 'Venus': {'Mercury', 'Saturn'},
+    'Saturn': {'Mercury', 'Venus'},
+}
+ENEMIES = {
+    'Sun': {'Venus', 'Saturn'}, 'Moon': set(), 'Mars': {'Mercury'},
+    'Mercury': {'Moon'}, 'Jupiter': {'Mercury', 'Venus'}, 'Venus': {'Sun', 'Moon'},
+    'Saturn': {'Sun', 'Moon', 'Mars'},
+}
+# Graha Maitri by the two lords' attitudes to each other (2 friend, 1 neutral, 0 enemy)
+MAITRI_POINTS = {(2, 2): 5, (2, 1): 4, (1, 1): 3, (2, 0): 1, (1, 0): 0.5, (0, 0): 0}
+
+# Gana per nakshatra: 0 Deva, 1 Manushya, 2 Rakshasa
+GANA = [0, 1, 2, 1, 0, 1, 0, 0, 2, 2, 1, 1, 0, 2, 0, 2, 0, 2, 2, 1, 1, 0, 2, 2, 1, 1, 0]
+GANA_POINTS = [  # [groom gana][bride gana]
+    [6, 6, 1],
+    [5, 6, 0],
+    [1, 0, 6],
+]
+
+# Bhakoot: the sign of one counted from the other is 2/12, 5/9 or 6/8
+BAD_BHAKOOTS = {2, 12, 5, 9, 6, 8}
+
+# Nadi per nakshatra: Aadi, Madhya, Antya, zigzagging through the nakshatras
+NADI = [(0, 1, 2, 2, 1, 0)[n % 6] for n in range(27)]
+
+# Synastry aspects between the seven grahas (the nodes are left out)
+ASPECTS = [('conjunction', 0.0), ('sextile', 60.0), ('square', 90.0), ('trine', 120.0),
+           ('opposition', 180.0)]
+ASPECT_ORB = 6.0
+SYNASTRY_PLANETS = [i for i, planet in enumerate(PLANETS) if planet not in ('Rahu', 'Ketu')]
+
+
+def _attitude(planet, other):
+    return 2 if other in FRIENDS[planet] else 0 if other in ENEMIES[planet] else 1
+
+
+def _koota_points(groom_pada, bride_pada):
+    """The eight koota scores for a groom's and a bride's Moon pada."""
+    groom_nakshatra, bride_nakshatra = groom_pada // 4, bride_pada // 4
+    groom_sign, bride_sign = groom_pada // 9, bride_pada // 9
+
+    varna = 1 if VARNA_RANK[groom_sign % 4] >= VARNA_RANK[bride_sign % 4] else 0
+    vashya = VASHYA_POINTS[VASHYA_GROUP[groom_sign]][VASHYA_GROUP[bride_sign]]
+    tara = sum(1.5 for count in ((bride_nakshatra - groom_nakshatra) % 27 + 1,
+                                 (groom_nakshatra - bride_nakshatra) % 27 + 1)
+               if count % 9 not in BAD_TARAS)
+    yoni = YONI_POINTS[YONI[groom_nakshatra]][YONI[bride_nakshatra]]
+    groom_lord, bride_lord = SIGN_LORDS[groom_sign], SIGN_LORDS[bride_sign]
+    if groom_lord == bride_lord:
+        maitri = 5
+    else:
+        attitudes = sorted((_attitude(groom_lord, bride_lord), _attitude(bride_lord, groom_lord)), reverse=True)
+        maitri = MAITRI_POINTS[tuple(attitudes)]
+    gana = GANA_POINTS[GANA[groom_nakshatra]][GANA[bride_nakshatra]]
+    bhakoot = 0 if (bride_sign - groom_sign) % 12 + 1 in BAD_BHAKOOTS else 7
+    nadi = 0 if NADI[groom_nakshatra] == NADI[bride_nakshatra] else 8
+    return varna, vashya, tara, yoni, maitri, gana, bhakoot, nadi
+
+
+def _compile_tables():
+    tables = np.empty((len(KOOTAS), PADA_COUNT, PADA_COUNT), dtype=np.float32)
+    for groom in range(PADA_COUNT):
+        for bride in range(PADA_COUNT):
+            tables[:, groom, bride] = _koota_points(groom, bride)
+    return tables
+
+
+KOOTA_TABLES = _compile_tables()
+GUNA_TABLE = KOOTA_TABLES.sum(axis=0)
+
+
+def moon_padas(moon_longitudes):
+    """Nakshatra pada index (0..107) of sidereal Moon longitudes."""
+    longitudes = np.asarray(moon_longitudes, dtype=float) % 360
+    return np.minimum((longitudes // PADA_SPAN).astype(np.intp), PADA_COUNT - 1)
+
+
+def _table_row(table, query_pada, role):
+    """The table entries for a query pada against every pada, for the query's role."""
+    if role not in ROLES:
+        raise ValueError(f"Unknown role: {role} (choose from {', '.join(ROLES)})")
+    return table[query_pada] if role == 'groom' else table[:, query_pada]
+
+
+def guna_scores(query_moon, candidate_moons, role='groom'):
+    """Ashtakoota totals (out of 36) of one Moon longitude against an array of them."""
+    return _table_row(GUNA_TABLE, int(moon_padas(query_moon)), role)[moon_padas(candidate_moons)]
+
+
+def koota_scores(query_moon, candidate_moons, role='groom'):
+    """{koota: scores array} of one Moon longitude against an array of them."""
+    padas = moon_padas(candidate_moons)
+    query_pada = int(moon_padas(query_moon))
+    return {koota: _table_row(table, query_pada, role)[padas] for koota, table in zip(KOOTAS, KOOTA_TABLES)}
+
+
+def top_k(scores, k, min_score=None):
+    """
+    Indices of the k highest scores, best first, ties going to the lower
+    index. Only the selected k are sorted.
+    """
+    scores = np.asarray(scores)
+    # Scores are multiples of 0.5, so one integer key ranks by score, then index
+    keys = np.rint(scores * 2).astype(np.int64) * len(scores) + (len(scores) - 1 - np.arange(len(scores)))
+    if min_score is not None:
+        keys[scores < min_score] = -1
+    k = min(k, int((keys >= 0).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    chosen = np.argpartition(keys, len(keys) - k)[len(keys) - k:]
+    return chosen[np.argsort(-keys[chosen])]
+
+
+def synastry_aspects(query_longitudes, candidate_longitudes, orb=ASPECT_ORB):
+    """
+    Aspects between a query chart's grahas and each candidate's, for
+    (n, 9) candidate longitudes: one list per candidate of
+    {"planet", "otherPlanet", "aspect", "orb"}, tightest first.
+    """
+    query = np.asarray(query_longitudes, dtype=float)[SYNASTRY_PLANETS]
+    others = np.atleast_2d(np.asarray(candidate_longitudes, dtype=float))[:, SYNASTRY_PLANETS]
+    # Angular separation 0..180 for every (candidate, query planet, candidate planet)
+    separation = np.abs((others[:, None, :] - query[None, :, None] + 180) % 360 - 180)
+    results = [[] for _ in range(len(others))]
+    for name, angle in ASPECTS:
+        deviation = np.abs(separation - angle)
+        for candidate, mine, theirs in zip(*np.nonzero(deviation <= orb)):
+            results[candidate].append({
+                "planet": PLANETS[SYNASTRY_PLANETS[mine]],
+                "otherPlanet": PLANETS[SYNASTRY_PLANETS[theirs]],
+                "aspect": name,
+                "orb": round(float(deviation[candidate, mine, theirs]), 2),
+            })
+    for aspects in results:
+        aspects.sort(key=lambda aspect: aspect["orb"])
+    return results
+
+
+def match_candidates(query_longitudes, candidate_longitudes, k=10, role='groom', min_score=None,
+                     aspects=True, orb=ASPECT_ORB):
+    """
+    The k best candidates for a query chart, best first.
+
+    query_longitudes holds the query chart's nine sidereal longitudes in
+    PLANETS order, candidate_longitudes an (n, 9) array of the candidates';
+    role is the query person's. Each match is {"index", "score", "kootas",
+    "moonSign", "moonNakshatra"} plus "aspects" when asked for.
+    """
+    candidate_longitudes = np.atleast_2d(np.asarray(candidate_longitudes, dtype=float))
+    query_moon = np.asarray(query_longitudes, dtype=float)[MOON]
+    candidate_moons = candidate_longitudes[:, MOON]
+    chosen = top_k(guna_scores(query_moon, candidate_moons, role), k, min_score)
+
+    kootas = koota_scores(query_moon, candidate_moons[chosen], role)
+    padas = moon_padas(candidate_moons[chosen])
+    synastry = synastry_aspects(query_longitudes, candidate_longitudes[chosen], orb) if aspects else None
+    matches = []
+    for row, index in enumerate(chosen.tolist()):
+        breakdown = {koota: float(kootas[koota][row]) for koota in KOOTAS}
+        match = {
+            "index": index,
+            "score": sum(breakdown.values()),
+            "kootas": breakdown,
+            "moonSign": SIGNS[padas[row] // 9],
+            "moonNakshatra": NAKSHATRAS[padas[row] // 4],
+        }
+        if synastry is not None:
+            match["aspects"] = synastry[row]
+        matches.append(match)
+    return matches
+
+
+def planet_longitudes(julian_days):
+    """Sidereal longitudes of all grahas as one row per Julian day, for chart_pool.map_chunks."""
+    return list(sidereal_positions(julian_days)[0])
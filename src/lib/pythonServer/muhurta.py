@@ -0,0 +1,436 @@
+"""
+Muhurta search: find the time intervals in which planetary conditions hold.
+
+Conditions are written in a small language over sign, nakshatra, house and
+tithi, combined with and, or, not and parentheses. A comma means "and",
+case is ignored and the word "the" is skipped:
+
+    Moon in Rohini, Jupiter in Kendra from the lagna
+    (Moon in Taurus or Moon in Cancer) and not tithi 8
+    lagna in Leo and Venus in house 11 from natal lagna
+    shukla paksha and tithi ekadashi and Moon in Pushya
+
+    <body> in <sign> | <nakshatra> | house <n> | <house group> [from <reference>]
+    tithi <n> | tithi <n>-<m> | tithi [shukla|krishna] <name> | shukla paksha | krishna paksha
+
+A body is a planet or "lagna", the ascendant at the search location. House
+groups are kendra (1, 4, 7, 10), trikona (1, 5, 9), dusthana (6, 8, 12) and
+upachaya (3, 6, 10, 11). Houses are whole-sign houses counted from the
+reference: "lagna" (the default), "natal lagna" (the natal ascendant sign),
+or a planet, e.g. "from Moon".
+
+The range is sampled on a grid: the longitudes of just the planets the
+condition mentions are computed for a chunk of samples at a time, and the
+condition is evaluated on whole arrays. Wherever its value
+changes between neighbouring samples the boundary is refined by bisection to
+about a minute. An interval shorter than the sampling step can fall between
+two samples and be missed, so the default step is an hour, or ten minutes
+when the lagna is involved. Samples closer than PLANET_STEP get planet
+longitudes interpolated from samples PLANET_STEP apart (ascendants are
+always computed), which only matters within arcseconds of a boundary, and
+boundaries are refined with exact positions. Long ranges are split into chunks that run in
+parallel in the chart pool.
+"""
+import re
+
+import numpy as np
+
+from birth_instant import datetime_from_julian_day
+from ephemeris import NAKSHATRA_SPAN, NAKSHATRAS, PLANETS, SIGNS, sidereal_ascendant, sidereal_longitudes
+from transits import EVENT_PRECISION, MAX_SAMPLES
+
+DEFAULT_STEP = 1.0 / 24
+LAGNA_STEP = 10.0 / 1440
+PLANET_STEP = 1.0 / 24
+CHUNK_SIZE = 256
+
+LAGNA = 'lagna'
+SUN, MOON = PLANETS.index('Sun'), PLANETS.index('Moon')
+
+HOUSE_GROUPS = {
+    'kendra': {1, 4, 7, 10},
+    'trikona': {1, 5, 9},
+    'dusthana': {6, 8, 12},
+    'upachaya': {3, 6, 10, 11},
+}
+
+TITHI_NAMES = ['Pratipada', 'Dwitiya', 'Tritiya', 'Chaturthi', 'Panchami', 'Shashthi', 'Saptami',
+               'Ashtami', 'Navami', 'Dashami', 'Ekadashi', 'Dwadashi', 'Trayodashi', 'Chaturdashi',
+               'Purnima']
+PAKSHAS = {'shukla': range(1, 16), 'krishna': range(16, 31)}
+
+
+def tithis(sun_longitudes, moon_longitudes):
+    """Tithi numbers, 1..30 (16..30 are Krishna paksha, 30 is Amavasya)."""
+    elongation = (np.asarray(moon_longitudes) - np.asarray(sun_longitudes)) % 360
+    return np.minimum((elongation // 12).astype(np.int64), 29) + 1
+
+
+class Sky:
+    """
+    Longitudes of the given planets (the others are NaN), and ascendants
+    when a location is given, at a set of Julian days. Planets are computed
+    at samples planet_step apart and interpolated in between; 0 computes
+    every sample.
+    """
+
+    __slots__ = ('julian_days', 'longitudes', 'ascendants', 'natal_ascendant')
+
+    def __init__(self, julian_days, planets=range(len(PLANETS)), location=None, natal_ascendant=None,
+                 planet_step=PLANET_STEP):
+        self.julian_days = np.atleast_1d(np.asarray(julian_days, dtype=float))
+        self.longitudes = np.full((len(self.julian_days), len(PLANETS)), np.nan)
+        planets = sorted(planets)
+        if planets:
+            self.longitudes[:, planets] = self._planet_longitudes(planets, planet_step)
+        self.ascendants = None
+        if location is not None:
+            lat, lon = location
+            self.ascendants = np.array([sidereal_ascendant(jd, lat, lon) for jd in self.julian_days.tolist()])
+        self.natal_ascendant = natal_ascendant
+
+    def _planet_longitudes(self, planets, planet_step):
+        julian_days = self.julian_days
+        stride = int(planet_step // (julian_days[1] - julian_days[0])) if len(julian_days) > 2 else 1
+        if stride <= 1:
+            return sidereal_longitudes(julian_days, planets)
+        knots = np.unique(np.append(np.arange(0, len(julian_days), stride), len(julian_days) - 1))
+        coarse = np.unwrap(sidereal_longitudes(julian_days[knots], planets), period=360, axis=0)
+        return np.column_stack([np.interp(julian_days, julian_days[knots], column) for column in coarse.T]) % 360
+
+    def longitude(self, body):
+        if body == LAGNA:
+            if self.ascendants is None:
+                raise ValueError("Conditions on the lagna need a location")
+            return self.ascendants
+        return self.longitudes[:, body]
+
+    def sign(self, body):
+        return (self.longitude(body) // 30).astype(np.int64)
+
+
+class Condition:
+    """
+    A node of a parsed condition; evaluate(sky) returns a boolean array.
+    planets holds the PLANETS indices it reads, uses_lagna whether it needs
+    the ascendant.
+    """
+
+    planets = frozenset()
+    uses_lagna = False
+
+    def evaluate(self, sky):
+        raise NotImplementedError
+
+
+def _planets(*bodies):
+    return frozenset(body for body in bodies if isinstance(body, int))
+
+
+class SignCondition(Condition):
+    def __init__(self, body, sign):
+        self.body, self.sign = body, sign
+        self.planets = _planets(body)
+        self.uses_lagna = body == LAGNA
+
+    def evaluate(self, sky):
+        return sky.sign(self.body) == self.sign
+
+
+class NakshatraCondition(Condition):
+    def __init__(self, body, nakshatra):
+        self.body, self.nakshatra = body, nakshatra
+        self.planets = _planets(body)
+        self.uses_lagna = body == LAGNA
+
+    def evaluate(self, sky):
+        return (sky.longitude(self.body) // NAKSHATRA_SPAN).astype(np.int64) % 27 == self.nakshatra
+
+
+class HouseCondition(Condition):
+    def __init__(self, body, houses, reference=LAGNA):
+        self.body, self.houses, self.reference = body, sorted(houses), reference
+        self.planets = _planets(body, reference)
+        self.uses_lagna = LAGNA in (body, reference)
+
+    def evaluate(self, sky):
+        if self.reference == 'natal':
+            if sky.natal_ascendant is None:
+                raise ValueError("Conditions on the natal lagna need a natal chart")
+            reference_sign = sky.natal_ascendant
+        else:
+            reference_sign = sky.sign(self.reference)
+        return np.isin((sky.sign(self.body) - reference_sign) % 12 + 1, self.houses)
+
+
+class TithiCondition(Condition):
+    planets = frozenset((SUN, MOON))
+
+    def __init__(self, numbers):
+        self.numbers = sorted(numbers)
+
+    def evaluate(self, sky):
+        return np.isin(tithis(sky.longitudes[:, SUN], sky.longitudes[:, MOON]), self.numbers)
+
+
+class AllOf(Condition):
+    def __init__(self, parts):
+        self.parts = parts
+        self.planets = frozenset().union(*(part.planets for part in parts))
+        self.uses_lagna = any(part.uses_lagna for part in parts)
+
+    def evaluate(self, sky):
+        return np.logical_and.reduce([part.evaluate(sky) for part in self.parts])
+
+
+class AnyOf(AllOf):
+    def evaluate(self, sky):
+        return np.logical_or.reduce([part.evaluate(sky) for part in self.parts])
+
+
+class Not(Condition):
+    def __init__(self, part):
+        self.part = part
+        self.planets = part.planets
+        self.uses_lagna = part.uses_lagna
+
+    def evaluate(self, sky):
+        return ~self.part.evaluate(sky)
+
+
+_TOKEN = re.compile(r'\s*(?:(\d+)|([a-z]+)|([(),\-]))')
+# Words that read naturally but carry no meaning, as in "from the lagna"
+_FILLER = {'the'}
+_BODIES = {name.lower(): i for i, name in enumerate(PLANETS)}
+_BODIES[LAGNA] = _BODIES['ascendant'] = LAGNA
+_SIGNS = {name.lower(): i for i, name in enumerate(SIGNS)}
+_NAKSHATRAS = {name.lower(): i for i, name in enumerate(NAKSHATRAS)}
+_TITHIS = {name.lower(): i for i, name in enumerate(TITHI_NAMES, 1)}
+
+
+class _Parser:
+    """Recursive descent over the tokens of a condition."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = []
+        position, lowered = 0, text.lower().strip()
+        while position < len(lowered):
+            match = _TOKEN.match(lowered, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Unexpected character in condition at {position}: {text[position:]!r}")
+            token = match.group(1) or match.group(2) or match.group(3)
+            if token not in _FILLER:
+                self.tokens.append(token)
+            position = match.end()
+        # A comma joins like "and", unless an "and" or "or" follows it anyway
+        self.tokens = [token for i, token in enumerate(self.tokens)
+                       if token != ',' or self.tokens[i + 1:i + 2] not in (['and'], ['or'])]
+        self.tokens = ['and' if token == ',' else token for token in self.tokens]
+        self.index = 0
+
+    def peek(self, offset=0):
+        index = self.index + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"Expected {expected or 'more'} in condition {self.text!r}, found {token or 'the end'}")
+        self.index += 1
+        return token
+
+    def name(self, names):
+        """The longest one- or two-word name at the cursor, or None."""
+        for length in (2, 1):
+            words = [self.peek(i) for i in range(length)]
+            key = ' '.join(word for word in words if word)
+            if None not in words and key in names:
+                self.index += length
+                return names[key]
+        return None
+
+    def parse(self):
+        condition = self.any_of()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()!r} in condition {self.text!r}")
+        return condition
+
+    def any_of(self):
+        parts = [self.all_of()]
+        while self.peek() == 'or':
+            self.take()
+            parts.append(self.all_of())
+        return parts[0] if len(parts) == 1 else AnyOf(parts)
+
+    def all_of(self):
+        parts = [self.factor()]
+        while self.peek() == 'and':
+            self.take()
+            parts.append(self.factor())
+        return parts[0] if len(parts) == 1 else AllOf(parts)
+
+    def factor(self):
+        token = self.peek()
+        if token == 'not':
+            self.take()
+            return Not(self.factor())
+        if token == '(':
+            self.take()
+            condition = self.any_of()
+            self.take(')')
+            return condition
+        if token == 'tithi':
+            return self.tithi()
+        if token in PAKSHAS and self.peek(1) == 'paksha':
+            self.index += 2
+            return TithiCondition(PAKSHAS[token])
+        return self.placement()
+
+    def number(self, low, high):
+        token = self.take()
+        if not token.isdigit() or not low <= int(token) <= high:
+            raise ValueError(f"Expected a number from {low} to {high} in condition {self.text!r}, found {token}")
+        return int(token)
+
+    def tithi(self):
+        self.take('tithi')
+        if self.peek() and self.peek().isdigit():
+            first = self.number(1, 30)
+            last = first
+            if self.peek() == '-':
+                self.take()
+                last = self.number(first, 30)
+            return TithiCondition(range(first, last + 1))
+        pakshas = [PAKSHAS[self.take()]] if self.peek() in PAKSHAS else list(PAKSHAS.values())
+        if self.peek() == 'amavasya':
+            self.take()
+            return TithiCondition([30])
+        number = _TITHIS.get(self.take())
+        if number is None:
+            raise ValueError(f"Unknown tithi in condition {self.text!r}")
+        # Purnima closes Shukla paksha only; the other names occur in both
+        numbers = [paksha[number - 1] for paksha in pakshas if number < 15 or paksha[0] == 1]
+        if not numbers:
+            raise ValueError("Purnima falls in Shukla paksha")
+        return TithiCondition(numbers)
+
+    def placement(self):
+        body = self.name(_BODIES)
+        if body is None:
+            raise ValueError(f"Expected a planet, lagna or tithi in condition {self.text!r}, "
+                             f"found {self.peek() or 'the end'}")
+        self.take('in')
+        sign = self.name(_SIGNS)
+        if sign is not None:
+            return SignCondition(body, sign)
+        nakshatra = self.name(_NAKSHATRAS)
+        if nakshatra is not None:
+            return NakshatraCondition(body, nakshatra)
+        if self.peek() == 'house':
+            self.take()
+            houses = {self.number(1, 12)}
+        elif self.peek() in HOUSE_GROUPS:
+            houses = HOUSE_GROUPS[self.take()]
+        else:
+            raise ValueError(f"Expected a sign, nakshatra or house after 'in' in condition {self.text!r}")
+        return HouseCondition(body, houses, self.reference())
+
+    def reference(self):
+        if self.peek() != 'from':
+            return LAGNA
+        self.take()
+        if self.peek() == 'natal':
+            self.take()
+            self.take(LAGNA)
+            return 'natal'
+        reference = self.name(_BODIES)
+        if reference is None:
+            raise ValueError(f"Expected lagna, natal lagna or a planet after 'from' in condition {self.text!r}")
+        return reference
+
+
+def parse_condition(text):
+    """Parse a condition string into a Condition; raises ValueError with the problem."""
+    return _Parser(text).parse()
+
+
+def _refine(condition, jd_a, jd_b, value_after, location, natal_ascendant):
+    """Bisect the moment the condition becomes value_after between two samples."""
+    lo, hi = jd_a, jd_b
+    while hi - lo > EVENT_PRECISION:
+        mid = (lo + hi) / 2
+        if bool(condition.evaluate(Sky([mid], condition.planets, location, natal_ascendant))[0]) == value_after:
+            hi = mid
+        else:
+            lo = mid
+    return float(hi)
+
+
+def search_samples(condition, julian_days, location=None, natal_ascendant=None, chunk_size=CHUNK_SIZE):
+    """
+    (start, end) Julian days of the intervals in which the condition holds,
+    sampled at julian_days; intervals still open at either end are clipped
+    to the first or last sample.
+    """
+    julian_days = np.asarray(julian_days, dtype=float)
+    if not condition.uses_lagna:
+        location = None
+    elif location is None:
+        raise ValueError("Conditions on the lagna need a location")
+    mask = np.concatenate([condition.evaluate(Sky(julian_days[offset:offset + chunk_size], condition.planets,
+                                                  location, natal_ascendant))
+                           for offset in range(0, len(julian_days), chunk_size)])
+    if not len(mask):
+        return []
+
+    changes = np.flatnonzero(mask[1:] != mask[:-1])
+    boundaries = [_refine(condition, julian_days[k], julian_days[k + 1], bool(mask[k + 1]), location,
+                          natal_ascendant) for k in changes.tolist()]
+    edges = ([float(julian_days[0])] if mask[0] else []) + boundaries + \
+        ([float(julian_days[-1])] if mask[-1] else [])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def _iso(julian_day):
+    return datetime_from_julian_day(julian_day).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+def search(condition, start_jd, end_jd, step_days=None, location=None, natal_ascendant=None, pool=None):
+    """
+    Intervals between start_jd and end_jd in which a condition (a string or
+    a parsed Condition) holds, as {"start", "end", "startJd", "endJd",
+    "hours"} dicts in time order. location is (lat, lon) for the lagna;
+    natal_ascendant the natal ascendant's sign index. With a ChartPool, the
+    range is split into time chunks searched in parallel.
+    """
+    if isinstance(condition, str):
+        condition = parse_condition(condition)
+    step_days = step_days or (LAGNA_STEP if condition.uses_lagna else DEFAULT_STEP)
+    julian_days = np.arange(start_jd, end_jd, step_days)
+    julian_days = np.append(julian_days, end_jd) if len(julian_days) else np.array([start_jd, end_jd])
+    if len(julian_days) > MAX_SAMPLES:
+        raise ValueError(f"Range needs {len(julian_days)} samples; the limit is {MAX_SAMPLES}")
+
+    if pool is not None and len(julian_days) > pool.chunk_size:
+        # Neighbouring chunks share their boundary sample, so no change falls between chunks
+        arguments = [(condition, julian_days[start:stop + 1], location, natal_ascendant)
+                     for start, stop in pool.chunk_bounds(len(julian_days) - 1)]
+        chunks = pool.map_calls(search_samples, arguments)
+    else:
+        chunks = [search_samples(condition, julian_days, location, natal_ascendant)]
+
+    intervals = []
+    for chunk in chunks:
+        for start, end in chunk:
+            if intervals and intervals[-1][1] == start:
+                intervals[-1] = (intervals[-1][0], end)
+            else:
+                intervals.append((start, end))
+    return [{
+        "start": _iso(start),
+        "end": _iso(end),
+        "startJd": start,
+        "endJd": end,
+        "hours": round(float(end - start) * 24, 3),
+    } for start, end in intervals]
@@ -0,0 +1,507 @@
+"""
+Panchang (daily almanac): tithi, nakshatra, yoga and karana at sunrise with
+the times they end, sunrise, sunset and Rahu kalam, per place and local date.
+
+Places are snapped to a grid of cell_size-degree cells and computed at the
+cell centre, so everyone in a city shares one row (with 0.25 degree cells,
+sunrise moves by about a minute at most). Rows are precomputed ahead of time,
+typically by a nightly job, for the cells holding gazetteer places, into one
+columnar file:
+
+    magic, header length, JSON header   start date, days, cell size, epoch,
+                                        timezones, column dtypes and offsets
+    cell, cellTimezone                  sorted cell ids and each cell's zone
+    sunrise, sunset, tithi, tithiEnd,   one array per field, rows ordered by
+    nakshatra, ..., karanaEnd           cell, then date; times are int32
+                                        seconds from the epoch
+
+The file is memory-mapped, so reading a day is a dozen scalar reads, and it
+is swapped in atomically, so a running server picks up a rebuilt file.
+PanchangStore serves days from an in-memory LRU (the hot tier), then the
+file, and computes exactly only the cells and dates the file does not hold.
+
+Tithi, nakshatra, yoga and karana change at the same instant everywhere, so
+their boundaries are found once for a whole date range: the Sun and Moon are
+sampled every three hours, and all the changes of a limb are refined together
+with a few secant steps. Sunrise and sunset come from swisseph's rise_trans
+(upper limb, with refraction); near the poles, where the Sun may not rise,
+the limbs are given for local midnight.
+
+Configuration (environment variables):
+    PANCHANG_FILE        precomputed file (default data/panchang.bin; optional)
+    PANCHANG_CACHE_SIZE  days kept in the hot tier (default 4096)
+
+Usage:
+    python panchang.py build data/panchang.bin --start 2026-01-01 --days 400 [--workers 4]
+    python panchang.py show data/panchang.bin --lat 18.52 --lon 73.86 --date 2026-01-01
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import datetime
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+import swisseph as swe
+
+from birth_instant import UNIX_EPOCH, UNIX_EPOCH_JD, julian_day_ut, offset_at_utc, offset_for_local
+from ephemeris import NAKSHATRA_SPAN, NAKSHATRAS, init_swisseph, sidereal_longitudes
+from muhurta import MOON, SUN, TITHI_NAMES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PANCHNG1'
+FILE_VERSION = 1
+CELL_SIZE = 0.25
+ALIGN = 64
+NO_TIME = np.iinfo(np.int32).min
+# Karanas, the shortest limb, last at least about nine hours
+BOUNDARY_STEP = 0.125
+SECANT_STEPS = 4
+RELOAD_INTERVAL = 60.0
+
+# GeoNames column positions (see geocoder.py)
+COL_LAT, COL_LON, COL_POPULATION, COL_TIMEZONE = 4, 5, 14, 17
+
+YOGA_NAMES = ['Vishkambha', 'Priti', 'Ayushman', 'Saubhagya', 'Shobhana', 'Atiganda', 'Sukarma',
+              'Dhriti', 'Shula', 'Ganda', 'Vriddhi', 'Dhruva', 'Vyaghata', 'Harshana', 'Vajra',
+              'Siddhi', 'Vyatipata', 'Variyan', 'Parigha', 'Shiva', 'Siddha', 'Sadhya', 'Shubha',
+              'Shukla', 'Brahma', 'Indra', 'Vaidhriti']
+# Sixty half-tithis: Kimstughna, the seven movable karanas eight times, then the fixed three
+KARANA_NAMES = (['Kimstughna'] + ['Bava', 'Balava', 'Kaulava', 'Taitila', 'Gara', 'Vanija', 'Vishti'] * 8
+                + ['Shakuni', 'Chatushpada', 'Naga'])
+# Rahu kalam's eighth of the daytime, by weekday from Monday
+RAHU_KALAM_PART = [2, 7, 5, 6, 4, 3, 8]
+
+# Limb -> degrees of its angle per segment
+LIMBS = {'tithi': 12.0, 'nakshatra': NAKSHATRA_SPAN, 'yoga': NAKSHATRA_SPAN, 'karana': 6.0}
+
+COLUMNS = [('sunrise', '<i4'), ('sunset', '<i4')] + \
+    [column for limb in LIMBS for column in ((limb, 'u1'), (limb + 'End', '<i4'))]
+TIME_COLUMNS = {'sunrise', 'sunset'} | {limb + 'End' for limb in LIMBS}
+
+
+def _sun_moon(julian_days):
+    longitudes = sidereal_longitudes(julian_days, [SUN, MOON])
+    return longitudes[:, 0], longitudes[:, 1]
+
+
+def limb_angles(sun, moon):
+    """Each limb's angle; all of them only ever increase."""
+    elongation = (moon - sun) % 360
+    return {'tithi': elongation, 'nakshatra': moon % 360, 'yoga': (moon + sun) % 360, 'karana': elongation}
+
+
+def limb_boundaries(start_jd, end_jd):
+    """{limb: sorted Julian days (UT) at which it changes} between start_jd and end_jd."""
+    grid = np.arange(start_jd, end_jd + BOUNDARY_STEP, BOUNDARY_STEP)
+    angles = limb_angles(*_sun_moon(grid))
+    boundaries = {}
+    for limb, span in LIMBS.items():
+        angle = angles[limb]
+        index = (angle // span).astype(np.int64)
+        k = np.flatnonzero(index[1:] != index[:-1])
+        target = (index[k + 1] * span) % 360
+        # Degrees per day over each bracket, then secant steps from the linear guess
+        rate = ((angle[k + 1] - angle[k]) % 360) / BOUNDARY_STEP
+        estimate = grid[k] + ((target - angle[k]) % 360) / rate
+        for _ in range(SECANT_STEPS):
+            if not len(estimate):
+                break
+            current = limb_angles(*_sun_moon(estimate))[limb]
+            estimate = estimate - ((current - target + 180) % 360 - 180) / rate
+        boundaries[limb] = estimate
+    return boundaries
+
+
+def local_midnight(day, timezone_id):
+    """Julian day (UT) of the local midnight that starts a date."""
+    local_seconds = (datetime.datetime.combine(day, datetime.time()) - UNIX_EPOCH).total_seconds()
+    return (local_seconds - offset_for_local(timezone_id, local_seconds)) / 86400 + UNIX_EPOCH_JD
+
+
+def sun_times(midnight_jd, lat, lon):
+    """(sunrise, sunset) Julian days for the day starting at midnight_jd; NaN where there is none."""
+    geopos = (lon, lat, 0.0)
+    result, times = swe.rise_trans(midnight_jd, swe.SUN, swe.CALC_RISE, geopos)
+    sunrise = times[0] if result == 0 and times[0] < midnight_jd + 1 else np.nan
+    result, times = swe.rise_trans(sunrise if sunrise == sunrise else midnight_jd, swe.SUN, swe.CALC_SET, geopos)
+    sunset = times[0] if result == 0 and times[0] < midnight_jd + 1 else np.nan
+    return sunrise, sunset
+
+
+def compute_days(lat, lon, timezone_id, days, boundaries=None):
+    """
+    {column: array} for a list of local dates at one place: sunrise and
+    sunset, and each limb at sunrise with the time it ends, all as Julian
+    days (NaN for no sunrise or sunset). boundaries from limb_boundaries
+    must cover the dates; by default they are computed.
+    """
+    midnights = np.array([local_midnight(day, timezone_id) for day in days])
+    sunrise, sunset = np.array([sun_times(jd, lat, lon) for jd in midnights.tolist()]).reshape(-1, 2).T
+    reference = np.where(np.isnan(sunrise), midnights, sunrise)
+    if boundaries is None:
+        boundaries = limb_boundaries(reference.min() - 1, reference.max() + 3)
+
+    angles = limb_angles(*_sun_moon(reference))
+    columns = {'sunrise': sunrise, 'sunset': sunset}
+    for limb, span in LIMBS.items():
+        ends = boundaries[limb]
+        columns[limb] = (angles[limb] // span).astype(np.int64)
+        columns[limb + 'End'] = ends[np.minimum(np.searchsorted(ends, reference, side='right'), len(ends) - 1)]
+    return columns
+
+
+def cell_of(lat, lon, cell_size=CELL_SIZE):
+    """Grid cell id of a coordinate."""
+    rows, columns = int(round(180 / cell_size)), int(round(360 / cell_size))
+    row = min(max(int((lat + 90) // cell_size), 0), rows - 1)
+    return row * columns + int((lon + 180) // cell_size) % columns
+
+
+def cell_center(cell, cell_size=CELL_SIZE):
+    row, column = divmod(cell, int(round(360 / cell_size)))
+    return (row + 0.5) * cell_size - 90, (column + 0.5) * cell_size - 180
+
+
+def gazetteer_cells(tsv_path, cell_size=CELL_SIZE, min_population=0):
+    """{cell id: timezone} for cells holding gazetteer places, each with its most populous place's zone."""
+    best = {}
+    with open(tsv_path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if not row or row[0].startswith('#') or len(row) <= COL_TIMEZONE:
+                continue
+            population = int(row[COL_POPULATION] or 0)
+            if population < min_population:
+                continue
+            cell = cell_of(float(row[COL_LAT]), float(row[COL_LON]), cell_size)
+            if cell not in best or population > best[cell][0]:
+                best[cell] = (population, row[COL_TIMEZONE])
+    return {cell: timezone_id for cell, (_, timezone_id) in best.items()}
+
+
+def _compute_cell(cell, cell_size, timezone_id, days, boundaries):
+    lat, lon = cell_center(cell, cell_size)
+    return compute_days(lat, lon, timezone_id, days, boundaries)
+
+
+def build_file(path, start, day_count, cells, cell_size=CELL_SIZE, workers=1):
+    """
+    Precompute day_count days from start for cells ({cell id: timezone}) and
+    write the file, replacing any existing one atomically. Returns the header.
+    """
+    days = [start + datetime.timedelta(days=i) for i in range(day_count)]
+    cell_ids = sorted(cells)
+    timezones = sorted(set(cells.values()))
+    epoch_jd = julian_day_ut(datetime.datetime.combine(start, datetime.time())) - 1
+    boundaries = limb_boundaries(epoch_jd - 1, epoch_jd + day_count + 4)
+
+    arguments = [(cell, cell_size, cells[cell], days, boundaries) for cell in cell_ids]
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=init_swisseph) as pool:
+            results = list(pool.map(_compute_cell, *zip(*arguments)))
+    else:
+        results = [_compute_cell(*call) for call in arguments]
+
+    arrays = {
+        'cell': np.array(cell_ids, dtype='<i4'),
+        'cellTimezone': np.array([timezones.index(cells[cell]) for cell in cell_ids], dtype='<u2'),
+    }
+    for name, dtype in COLUMNS:
+        values = np.concatenate([result[name] for result in results]) if results else np.empty(0)
+        if name in TIME_COLUMNS:
+            seconds = np.round((values - epoch_jd) * 86400)
+            arrays[name] = np.where(np.isnan(values), NO_TIME, seconds).astype(dtype)
+        else:
+            arrays[name] = values.astype(dtype)
+
+    header = {
+        "version": FILE_VERSION,
+        "startDate": start.isoformat(),
+        "days": day_count,
+        "cellSize": cell_size,
+        "epochJd": epoch_jd,
+        "timezones": timezones,
+        "built": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "columns": {},
+    }
+    # Offsets depend on the header's length, so lay the columns out after a padded header
+    header_bytes = json.dumps(header).encode()
+    layout_start = ALIGN * (-(-(len(MAGIC) + 4 + len(header_bytes) + 64 * len(arrays)) // ALIGN) + 4)
+    offset = layout_start
+    for name, array in arrays.items():
+        header["columns"][name] = [array.dtype.str, offset, len(array)]
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode()
+    if len(MAGIC) + 4 + len(header_bytes) > layout_start:
+        raise ValueError("Panchang header does not fit its reserved space")
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(header["columns"][name][1])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(temporary, path)
+    return header
+
+
+class PanchangFile:
+    """Read-only memory-mapped view of a precomputed panchang file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.identity = self._identity(os.fstat(f.fileno()))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a panchang file")
+        length = struct.unpack_from('<I', self._mmap, len(MAGIC))[0]
+        header = json.loads(self._mmap[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+        if header.get("version") != FILE_VERSION:
+            raise ValueError(f"Unsupported panchang file version in {path}")
+        self.header = header
+        self.start = datetime.date.fromisoformat(header["startDate"])
+        self.days = header["days"]
+        self.cell_size = header["cellSize"]
+        self.epoch_jd = header["epochJd"]
+        self.timezones = header["timezones"]
+        self.columns = {name: np.frombuffer(self._mmap, dtype, count, offset)
+                        for name, (dtype, offset, count) in header["columns"].items()}
+        self._cells = self.columns.pop('cell')
+        self._cell_timezones = self.columns.pop('cellTimezone')
+
+    @staticmethod
+    def _identity(stat):
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        """Whether the path now holds a different file (e.g. a nightly rebuild)."""
+        try:
+            return self._identity(os.stat(self.path)) != self.identity
+        except OSError:
+            return False
+
+    def __len__(self):
+        return len(self._cells)
+
+    def day(self, cell, day):
+        """(timezone, {column: value}) for a cell and local date, or None if the file lacks it."""
+        offset = (day - self.start).days
+        if not 0 <= offset < self.days:
+            return None
+        position = int(np.searchsorted(self._cells, cell))
+        if position == len(self._cells) or self._cells[position] != cell:
+            return None
+        row = position * self.days + offset
+        values = {}
+        for name, column in self.columns.items():
+            value = int(column[row])
+            if name in TIME_COLUMNS:
+                value = None if value == NO_TIME else self.epoch_jd + value / 86400
+            values[name] = value
+        return self.timezones[self._cell_timezones[position]], values
+
+
+def _utc_seconds(julian_day):
+    """Whole Unix seconds of a Julian day, or None for a missing time."""
+    if julian_day is None or julian_day != julian_day:
+        return None
+    return round((julian_day - UNIX_EPOCH_JD) * 86400)
+
+
+def _local_iso(utc_seconds, timezone_id):
+    if utc_seconds is None:
+        return None
+    zone = datetime.timezone(datetime.timedelta(seconds=offset_at_utc(timezone_id, utc_seconds)))
+    return (UNIX_EPOCH.replace(tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=utc_seconds)) \
+        .astimezone(zone).isoformat(timespec='seconds')
+
+
+def format_day(day, lat, lon, timezone_id, values):
+    """The JSON-ready panchang for one day from its column values."""
+    def time_of(name):
+        return _local_iso(_utc_seconds(values[name]), timezone_id)
+
+    tithi = int(values['tithi']) + 1
+    # From whole seconds, so file rows and computed days give the same times
+    sunrise, sunset = _utc_seconds(values['sunrise']), _utc_seconds(values['sunset'])
+    rahu_kalam = None
+    if sunrise is not None and sunset is not None:
+        part = RAHU_KALAM_PART[day.weekday()]
+        rahu_kalam = {"start": _local_iso(sunrise + (sunset - sunrise) * (part - 1) // 8, timezone_id),
+                      "end": _local_iso(sunrise + (sunset - sunrise) * part // 8, timezone_id)}
+    return {
+        "date": day.isoformat(),
+        "timezone": timezone_id,
+        "location": {"lat": lat, "lon": lon},
+        "sunrise": time_of('sunrise'),
+        "sunset": time_of('sunset'),
+        "tithi": {
+            "number": tithi,
+            "name": 'Amavasya' if tithi == 30 else TITHI_NAMES[(tithi - 1) % 15],
+            "paksha": 'Shukla' if tithi <= 15 else 'Krishna',
+            "endsAt": time_of('tithiEnd'),
+        },
+        "nakshatra": {"name": NAKSHATRAS[int(values['nakshatra'])], "endsAt": time_of('nakshatraEnd')},
+        "yoga": {"name": YOGA_NAMES[int(values['yoga'])], "endsAt": time_of('yogaEnd')},
+        "karana": {"name": KARANA_NAMES[int(values['karana'])], "endsAt": time_of('karanaEnd')},
+        "rahuKalam": rahu_kalam,
+    }
+
+
+class PanchangStore:
+    """
+    Panchang days from the hot tier, the precomputed file, or computed.
+    Returned dicts are shared with the hot tier; treat them as read-only.
+    """
+
+    def __init__(self, path=None, cache_size=4096, cell_size=CELL_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.cell_size = cell_size
+        self._file = None
+        self._checked = 0.0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hot_hits = 0
+        self.file_hits = 0
+        self.computed = 0
+        self.evictions = 0
+        self._open()
+
+    @classmethod
+    def from_env(cls, default_path=None):
+        return cls(os.environ.get('PANCHANG_FILE', default_path),
+                   cache_size=int(os.environ.get('PANCHANG_CACHE_SIZE', 4096)))
+
+    def _open(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            self._file = PanchangFile(self.path)
+        except (OSError, ValueError) as e:
+            logger.error("Cannot open panchang file %s: %s", self.path, e)
+            return
+        # Cells are keyed by the file's grid, and its rows may differ from computed ones
+        self.cell_size = self._file.cell_size
+        self._entries.clear()
+        logger.info("Opened panchang file", extra={"fields": {
+            "path": self.path, "cells": len(self._file), "start": self._file.header["startDate"],
+            "days": self._file.days}})
+
+    def _current_file(self):
+        now = time.monotonic()
+        if self.path and now - self._checked > RELOAD_INTERVAL:
+            self._checked = now
+            if self._file is None or self._file.changed():
+                with self._lock:
+                    self._open()
+        return self._file
+
+    def get(self, lat, lon, day, timezone_id):
+        """
+        The panchang for the cell holding (lat, lon) on a local date.
+        timezone_id is used for cells the file does not hold; file rows keep
+        their cell's zone. The hot tier keys file rows by (cell, day) and
+        computed rows by (cell, day, timezone_id), so callers asking for
+        different zones in the same cell never get each other's times.
+        """
+        panchang_file = self._current_file()
+        cell = cell_of(lat, lon, self.cell_size)
+        with self._lock:
+            for key in ((cell, day), (cell, day, timezone_id)):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hot_hits += 1
+                    return entry
+
+        center_lat, center_lon = cell_center(cell, self.cell_size)
+        found = panchang_file.day(cell, day) if panchang_file is not None else None
+        if found is not None:
+            timezone_id, values = found
+            key = (cell, day)
+        else:
+            key = (cell, day, timezone_id)
+            columns = compute_days(center_lat, center_lon, timezone_id, [day])
+            values = {name: float(column[0]) if name in TIME_COLUMNS else int(column[0])
+                      for name, column in columns.items()}
+        result = format_day(day, center_lat, center_lon, timezone_id, values)
+
+        with self._lock:
+            if found is not None:
+                self.file_hits += 1
+            else:
+                self.computed += 1
+            if self.cache_size > 0:
+                self._entries[key] = result
+                while len(self._entries) > self.cache_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hot_hits + self.file_hits + self.computed
+            return {
+                "size": len(self._entries),
+                "maxSize": self.cache_size,
+                "hotHits": self.hot_hits,
+                "fileHits": self.file_hits,
+                "computed": self.computed,
+                "evictions": self.evictions,
+                "precomputedRatio": (self.hot_hits + self.file_hits) / lookups if lookups else 0.0,
+                "fileStart": self._file.header["startDate"] if self._file is not None else None,
+                "fileDays": self._file.days if self._file is not None else 0,
+                "fileCells": len(self._file) if self._file is not None else 0,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute or inspect panchang files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="precompute days for the gazetteer's cells")
+    build.add_argument('path')
+    build.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date.today())
+    build.add_argument('--days', type=int, default=400)
+    build.add_argument('--gazetteer', default=os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.tsv'))
+    build.add_argument('--min-population', type=int, default=0)
+    build.add_argument('--cell-size', type=float, default=CELL_SIZE)
+    build.add_argument('--workers', type=int, default=1)
+    show = commands.add_parser('show', help="print one day from a file")
+    show.add_argument('path')
+    show.add_argument('--lat', type=float, required=True)
+    show.add_argument('--lon', type=float, required=True)
+    show.add_argument('--date', type=datetime.date.fromisoformat, default=datetime.date.today())
+    args = parser.parse_args(argv)
+
+    init_swisseph()
+    if args.command == 'build':
+        cells = gazetteer_cells(args.gazetteer, args.cell_size, args.min_population)
+        started = time.perf_counter()
+        header = build_file(args.path, args.start, args.days, cells, args.cell_size, args.workers)
+        print(f"{len(cells)} cells x {args.days} days -> {args.path} "
+              f"({os.path.getsize(args.path) / 1024:.0f} KiB, {time.perf_counter() - started:.1f}s)")
+        return header
+    panchang_file = PanchangFile(args.path)
+    found = panchang_file.day(cell_of(args.lat, args.lon, panchang_file.cell_size), args.date)
+    if found is None:
+        sys.exit("That cell and date are not in the file")
+    lat, lon = cell_center(cell_of(args.lat, args.lon, panchang_file.cell_size), panchang_file.cell_size)
+    print(json.dumps(format_day(args.date, lat, lon, *found), indent=2))
+
+
+if __name__ == "__main__":
+    main()
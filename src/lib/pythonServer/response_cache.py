@@ -0,0 +1,140 @@
+"""
+Response cache for rule-based chat answers.
+
+Answers depend only on the routed intent (the ranked intents, the planets
+and the house asked about) and on the chart, so the UI's quick-reply
+questions about the same chart always get the same body. Bodies are cached
+under a content hash of the two, without "id" and "timestamp"; those are
+stamped on every response after the lookup.
+
+Concurrent requests for the same key are coalesced (single-flight): one
+computes the body and the others wait for it. Every hit and coalesced
+request adds the CPU time the body took to compute to savedCpuSeconds.
+
+Configuration (environment variables):
+    CHAT_CACHE_SIZE       max answers kept (default 4096, 0 disables)
+    CHAT_CACHE_MAX_BYTES  max approximate bytes kept (default 16 MiB)
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+from insight_backends import chart_fingerprint
+
+# Dict and string overhead of a cached body beyond its JSON size
+ENTRY_OVERHEAD_BYTES = 512
+
+
+def response_key(match, session):
+    """Content hash of a routed message (an IntentMatch) and the session's chart."""
+    intent = json.dumps([match.intents, match.planets, match.house], separators=(',', ':'))
+    return hashlib.blake2b(f"{intent}|{chart_fingerprint(session)}".encode(), digest_size=16).hexdigest()
+
+
+class _Flight:
+    """A body being computed, awaited by the requests coalesced onto it."""
+
+    __slots__ = ('done', 'body', 'error', 'cpu_seconds')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body = None
+        self.error = None
+        self.cpu_seconds = 0.0
+
+
+class ResponseCache:
+    """LRU of response bodies bounded by count and approximate bytes, with single-flight misses."""
+
+    def __init__(self, max_size=4096, max_bytes=16 << 20):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.saved_cpu_seconds = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_size=int(os.environ.get('CHAT_CACHE_SIZE', 4096)),
+                   max_bytes=int(os.environ.get('CHAT_CACHE_MAX_BYTES', 16 << 20)))
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key, compute):
+        """
+        The body for key, calling compute() on a miss. Bodies are shared
+        between requests, so callers must copy before changing one.
+        """
+        if not self.enabled:
+            return compute()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                body, _, cpu_seconds = entry
+                self.hits += 1
+                self.saved_cpu_seconds += cpu_seconds
+                return body
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            self._compute(key, flight, compute)
+        else:
+            flight.done.wait()
+            with self._lock:
+                self.saved_cpu_seconds += flight.cpu_seconds
+        if flight.error is not None:
+            raise flight.error
+        return flight.body
+
+    def _compute(self, key, flight, compute):
+        started = time.thread_time()
+        try:
+            flight.body = compute()
+        except Exception as e:
+            flight.error = e
+        flight.cpu_seconds = time.thread_time() - started
+        size = len(json.dumps(flight.body, default=str)) + ENTRY_OVERHEAD_BYTES if flight.error is None else 0
+        with self._lock:
+            del self._flights[key]
+            if flight.error is None and size <= self.max_bytes:
+                self._store(key, flight.body, size, flight.cpu_seconds)
+        flight.done.set()
+
+    def _store(self, key, body, size, cpu_seconds):
+        self._entries[key] = (body, size, cpu_seconds)
+        self.bytes += size
+        while len(self._entries) > self.max_size or self.bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self.bytes,
+                "hitRatio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "savedCpuSeconds": round(self.saved_cpu_seconds, 6),
+            }
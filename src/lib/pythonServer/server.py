@@ -0,0 +1,69 @@
+"""
+Production server for the Vedic astrology API.
+
+Runs the Flask app on a multi-threaded WSGI server and offloads chart
+computation to a bounded process pool (see chart_pool.py), so CPU-heavy
+chart bursts run on every core without stalling chat requests. Services are
+warmed up (app.warm_up) before serving. Uses waitress when installed,
+otherwise werkzeug's threaded server.
+
+Usage:
+    python server.py [--host 0.0.0.0] [--port 5000] [--threads 32]
+                     [--chart-workers N] [--max-queue M] [--queue-wait 0.5]
+                     [--chart-backend swisseph|jyotishyam]
+"""
+import argparse
+import atexit
+import logging
+import os
+
+from chart_backends import BACKENDS
+from chart_pool import ChartPool
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vedic astrology API server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=32, help="request handler threads")
+    parser.add_argument('--chart-workers', type=int, default=os.cpu_count() or 1,
+                        help="chart worker processes (0 computes in the request threads)")
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help="chart jobs allowed to wait beyond the busy workers (default 4 x workers)")
+    parser.add_argument('--queue-wait', type=float, default=0.5,
+                        help="seconds a request waits for a queue slot before a 503")
+    parser.add_argument('--chart-backend', choices=sorted(BACKENDS), default=None,
+                        help="chart calculation backend (default $CHART_BACKEND or swisseph)")
+    args = parser.parse_args(argv)
+
+    # Through the environment, so spawned chart workers pick it up too
+    if args.chart_backend:
+        os.environ['CHART_BACKEND'] = args.chart_backend
+
+    import app as api
+    if args.chart_workers > 0:
+        api.services.chart_pool = ChartPool(args.chart_workers, max_queue=args.max_queue,
+                                            queue_wait=args.queue_wait,
+                                            chunk_size=int(os.environ.get('CHART_POOL_CHUNK', 256)))
+        api.services.chart_pool.start()
+        atexit.register(api.services.chart_pool.shutdown)
+    # Load the lazily imported modules and services now, not on the first requests
+    api.warm_up()
+
+    try:
+        import waitress
+    except ImportError:
+        waitress = None
+
+    logging.getLogger(__name__).info(
+        "Serving on %s:%s with %s threads, %s chart workers (%s)", args.host, args.port, args.threads,
+        args.chart_workers, 'waitress' if waitress else 'werkzeug')
+    if waitress is not None:
+        waitress.serve(api.app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        from werkzeug.serving import run_simple
+        run_simple(args.host, args.port, api.app, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Planetary strength from a chart's sidereal longitudes: Ashtakavarga bindus
+and Shadbala.
+
+Ashtakavarga: each of the seven grahas gets a bindu in a sign when that
+sign is a benefic place counted from each of eight references (the seven
+grahas and the ascendant). The classical benefic places are compiled at
+import into BINDU_TABLE[reference, reference sign, graha, sign], so the
+Bhinnashtakavarga of any number of charts is eight fancy-index additions;
+the Sarvashtakavarga is its sum over the grahas (337 bindus per chart).
+
+Shadbala (in virupas, 60 to a rupa) is computed for the components that
+follow from longitudes alone:
+    sthana      exaltation (uchcha), saptavargaja dignity in D1, D2, D3, D7,
+                D9, D12 and D30, odd/even sign and navamsa, kendra and
+                drekkana strength
+    dig         distance from each graha's powerless cusp
+    kala        paksha (Moon-Sun elongation), nathonnata and tribhaga, with
+                the time of day read from the Sun's distance to the ascendant
+    naisargika  the fixed natural strengths
+    drik        aspects received, benefic minus malefic, with the special
+                aspects of Mars, Jupiter and Saturn
+Cheshta bala and the calendar parts of kala bala (year, month, weekday and
+hora lords, ayana) need planet speeds and the birth date, which charts do
+not carry, so totals run below a full Shadbala; "ratio" is the total over
+the classical minimum and is best read relative to the other grahas.
+
+Configuration (environment variables):
+    STRENGTH_CACHE_SIZE  charts whose strengths are kept (default 4096, 0 disables)
+"""
+import collections
+import os
+import threading
+
+import numpy as np
+
+from chart_model import as_record
+from ephemeris import PLANETS
+from matching import ENEMIES, FRIENDS, SIGN_LORDS
+from vargas import varga_positions
+
+# The seven grahas, in PLANETS order; the nodes have no Ashtakavarga or Shadbala
+GRAHAS = PLANETS[:7]
+GRAHA_INDEX = {planet: i for i, planet in enumerate(GRAHAS)}
+REFERENCES = GRAHAS + ['Ascendant']
+NODES = [PLANETS.index('Rahu'), PLANETS.index('Ketu')]
+
+# Benefic places (houses counted from the reference) per graha, per reference
+BENEFIC_PLACES = {
+    'Sun': {'Sun': [1, 2, 4, 7, 8, 9, 10, 11], 'Moon': [3, 6, 10, 11], 'Mars': [1, 2, 4, 7, 8, 9, 10, 11],
+            'Mercury': [3, 5, 6, 9, 10, 11, 12], 'Jupiter': [5, 6, 9, 11], 'Venus': [6, 7, 12],
+            'Saturn': [1, 2, 4, 7, 8, 9, 10, 11], 'Ascendant': [3, 4, 6, 10, 11, 12]},
+    'Moon': {'Sun': [3, 6, 7, 8, 10, 11], 'Moon': [1, 3, 6, 7, 10, 11], 'Mars': [2, 3, 5, 6, 9, 10, 11],
+             'Mercury': [1, 3, 4, 5, 7, 8, 10, 11], 'Jupiter': [1, 4, 7, 8, 10, 11, 12],
+             'Venus': [3, 4, 5, 7, 9, 10, 11], 'Saturn': [3, 5, 6, 11], 'Ascendant': [3, 6, 10, 11]},
+    'Mercury': {'Sun': [5, 6, 9, 11, 12], 'Moon': [2, 4, 6, 8, 10, 11], 'Mars': [1, 2, 4, 7, 8, 9, 10, 11],
+                'Mercury': [1, 3, 5, 6, 9, 10, 11, 12], 'Jupiter': [6, 8, 11, 12],
+                'Venus': [1, 2, 3, 4, 5, 8, 9, 11], 'Saturn': [1, 2, 4, 7, 8, 9, 10, 11],
+                'Ascendant': [1, 2, 4, 6, 8, 10, 11]},
+    'Venus': {'Sun': [8, 11, 12], 'Moon': [1, 2, 3, 4, 5, 8, 9, 11, 12], 'Mars': [3, 5, 6, 9, 11, 12],
+              'Mercury': [3, 5, 6, 9, 11], 'Jupiter': [5, 8, 9, 10, 11], 'Venus': [1, 2, 3, 4, 5, 8, 9, 10, 11],
+              'Saturn': [3, 4, 5, 8, 9, 10, 11], 'Ascendant': [1, 2, 3, 4, 5, 8, 9, 11]},
+    'Mars': {'Sun': [3, 5, 6, 10, 11], 'Moon': [3, 6, 11], 'Mars': [1, 2, 4, 7, 8, 10, 11],
+             'Mercury': [3, 5, 6, 11], 'Jupiter': [6, 10, 11, 12], 'Venus': [6, 8, 11, 12],
+             'Saturn': [1, 4, 7, 8, 9, 10, 11], 'Ascendant': [1, 3, 6, 10, 11]},
+    'Jupiter': {'Sun': [1, 2, 3, 4, 7, 8, 9, 10, 11], 'Moon': [2, 5, 7, 9, 11], 'Mars': [1, 2, 4, 7, 8, 10, 11],
+                'Mercury': [1, 2, 4, 5, 6, 9, 10, 11], 'Jupiter': [1, 2, 3, 4, 7, 8, 10, 11],
+                'Venus': [2, 5, 6, 9, 10, 11], 'Saturn': [3, 5, 6, 12], 'Ascendant': [1, 2, 4, 5, 6, 7, 9, 10, 11]},
+    'Saturn': {'Sun': [1, 2, 4, 7, 8, 10, 11], 'Moon': [3, 6, 11], 'Mars': [3, 5, 6, 10, 11, 12],
+               'Mercury': [6, 8, 9, 10, 11, 12], 'Jupiter': [5, 6, 11, 12], 'Venus': [6, 11, 12],
+               'Saturn': [3, 5, 6, 11], 'Ascendant': [1, 3, 4, 6, 10, 11]},
+}
+# Sarvashtakavarga bindus per sign: 337 / 12 is about 28 on average
+SARVA_STRONG = 30
+SARVA_WEAK = 25
+# A graha with fewer bindus than this in its own Bhinnashtakavarga sign is weak there
+BHINNA_WEAK = 4
+
+# Shadbala constants, per graha in GRAHAS order
+DEEP_EXALTATION = np.array([10.0, 33.0, 165.0, 357.0, 298.0, 95.0, 200.0])
+# Moolatrikona sign, and the degree span within it
+MOOLATRIKONA_SIGN = np.array([4, 1, 5, 6, 0, 8, 10])
+MOOLATRIKONA_START = np.array([0.0, 3.0, 15.0, 0.0, 0.0, 0.0, 0.0])
+MOOLATRIKONA_END = np.array([20.0, 30.0, 20.0, 15.0, 12.0, 10.0, 20.0])
+SAPTAVARGAS = [1, 2, 3, 7, 9, 12, 30]
+# Saptavargaja virupas by compound relationship with the sign lord (-2 bitter enemy .. 2 great friend)
+RELATION_VIRUPAS = np.array([1.875, 3.75, 7.5, 15.0, 22.5])
+OWN_SIGN_VIRUPAS = 30.0
+MOOLATRIKONA_VIRUPAS = 45.0
+# Houses 2, 3, 4, 10, 11 and 12 from a graha hold its temporary friends
+TEMPORARY_FRIEND = np.array([-1, 1, 1, 1, -1, -1, -1, -1, -1, 1, 1, 1])
+FEMININE = np.array([planet in ('Moon', 'Venus') for planet in GRAHAS])
+# Drekkana strength: the decanate (0, 1, 2) giving 15 virupas; male, neuter, female grahas
+DREKKANA = np.array([0, 2, 1, 2, 0, 0, 1])
+KENDRADI_VIRUPAS = np.array([60.0, 30.0, 15.0])
+# Dig bala: the cusp, counted from the ascendant, where each graha is strongest
+STRONGEST_CUSP = np.array([270.0, 90.0, 0.0, 90.0, 270.0, 0.0, 180.0])
+# Nathonnata: 1 strongest at noon, -1 at midnight, 0 always full (Mercury)
+DAY_STRONG = np.array([1, -1, 0, 1, -1, 1, -1])
+NATHONNATA_BASE = np.where(DAY_STRONG > 0, 0.0, 60.0)
+# Tribhaga lords of the three parts of the day and of the night; Jupiter always gets 60
+DAY_THIRDS = [GRAHA_INDEX['Mercury'], GRAHA_INDEX['Sun'], GRAHA_INDEX['Saturn']]
+NIGHT_THIRDS = [GRAHA_INDEX['Moon'], GRAHA_INDEX['Venus'], GRAHA_INDEX['Mars']]
+NAISARGIKA = np.array([60.0, 51.43, 25.71, 42.86, 17.14, 34.29, 8.57])
+# Natural benefics; the Moon counts as one while waxing
+NATURAL_BENEFIC = np.array([False, True, True, True, False, True, False])
+# Drishti value by angular distance from the aspecting graha, piecewise linear
+DRISHTI_ANGLES = [0, 30, 60, 90, 120, 150, 180, 300, 360]
+DRISHTI_VALUES = [0, 0, 15, 45, 30, 0, 60, 0, 0]
+# Extra drishti for the special aspects, by house counted from the aspecting graha
+SPECIAL_DRISHTI = np.zeros((7, 12))
+SPECIAL_DRISHTI[GRAHA_INDEX['Mars'], [3, 7]] = 15
+SPECIAL_DRISHTI[GRAHA_INDEX['Jupiter'], [4, 8]] = 30
+SPECIAL_DRISHTI[GRAHA_INDEX['Saturn'], [2, 9]] = 45
+REQUIRED_VIRUPAS = np.array([390.0, 360.0, 420.0, 330.0, 300.0, 390.0, 300.0])
+
+COMPONENTS = ['sthana', 'dig', 'kala', 'naisargika', 'drik']
+
+
+def _bindu_table():
+    """BINDU_TABLE[reference, reference sign, graha, sign]: 1 where the graha gets a bindu."""
+    table = np.zeros((len(REFERENCES), 12, len(GRAHAS), 12), dtype=np.uint8)
+    for g, graha in enumerate(GRAHAS):
+        for r, reference in enumerate(REFERENCES):
+            for reference_sign in range(12):
+                for place in BENEFIC_PLACES[graha][reference]:
+                    table[r, reference_sign, g, (reference_sign + place - 1) % 12] = 1
+    return table
+
+
+def _relations():
+    """RELATIONS[graha, lord]: natural relationship, 1 friend, 0 neutral, -1 enemy."""
+    relations = np.zeros((len(GRAHAS), len(GRAHAS)), dtype=np.int8)
+    for g, graha in enumerate(GRAHAS):
+        for l, lord in enumerate(GRAHAS):
+            relations[g, l] = 1 if lord in FRIENDS[graha] else -1 if lord in ENEMIES[graha] else 0
+    return relations
+
+
+BINDU_TABLE = _bindu_table()
+RELATIONS = _relations()
+LORDS = np.array([GRAHA_INDEX[lord] for lord in SIGN_LORDS])
+
+
+def _arc(angles):
+    """Angular distance folded into 0..180."""
+    return np.abs((np.asarray(angles) + 180) % 360 - 180)
+
+
+def _inputs(longitudes, ascendants):
+    longitudes = np.atleast_2d(np.asarray(longitudes, dtype=float))[:, :len(GRAHAS)] % 360
+    ascendants = np.atleast_1d(np.asarray(ascendants, dtype=float)) % 360
+    return longitudes, ascendants
+
+
+def ashtakavarga(longitudes, ascendants):
+    """
+    Bhinnashtakavarga (n, 7, 12) and Sarvashtakavarga (n, 12) bindus for
+    (n, 7+) sidereal longitudes in PLANETS order and n ascendant longitudes.
+    """
+    longitudes, ascendants = _inputs(longitudes, ascendants)
+    reference_signs = np.empty((len(longitudes), len(REFERENCES)), dtype=np.intp)
+    reference_signs[:, :len(GRAHAS)] = longitudes // 30
+    reference_signs[:, -1] = ascendants // 30
+    bhinna = np.zeros((len(longitudes), len(GRAHAS), 12), dtype=np.uint8)
+    for r in range(len(REFERENCES)):
+        bhinna += BINDU_TABLE[r, reference_signs[:, r]]
+    return bhinna, bhinna.sum(axis=1, dtype=np.int16)
+
+
+def shadbala(longitudes, ascendants):
+    """
+    Shadbala components in virupas for (n, 7+) sidereal longitudes and n
+    ascendant longitudes: {component: (n, 7)} for COMPONENTS, plus "total"
+    and "ratio" (total over the classical minimum).
+    """
+    longitudes, ascendants = _inputs(longitudes, ascendants)
+    n = len(longitudes)
+    graha = np.arange(len(GRAHAS))
+    signs = (longitudes // 30).astype(np.intp)
+    degrees = longitudes % 30
+    houses = (signs - (ascendants // 30).astype(np.intp)[:, None]) % 12
+
+    # Sthana bala
+    uchcha = _arc(longitudes - DEEP_EXALTATION - 180) / 3
+    varga_signs, _ = varga_positions(longitudes, SAPTAVARGAS)
+    lords = LORDS[varga_signs]
+    lord_signs = signs[np.arange(n)[None, :, None], lords]
+    compound = RELATIONS[graha, lords] + TEMPORARY_FRIEND[(lord_signs - signs) % 12]
+    saptavargaja = np.where(lords == graha, OWN_SIGN_VIRUPAS, RELATION_VIRUPAS[compound + 2])
+    in_moolatrikona = (signs == MOOLATRIKONA_SIGN) & (degrees >= MOOLATRIKONA_START) & (degrees < MOOLATRIKONA_END)
+    saptavargaja[0][in_moolatrikona] = MOOLATRIKONA_VIRUPAS
+    # Sign index 0 (Aries) is an odd sign
+    odd_sign = varga_signs[[0, SAPTAVARGAS.index(9)]] % 2 == 0
+    ojayugma = 15.0 * (odd_sign != FEMININE).sum(axis=0)
+    kendradi = KENDRADI_VIRUPAS[houses % 3]
+    drekkana = np.where((degrees // 10).astype(np.intp) == DREKKANA, 15.0, 0.0)
+    sthana = uchcha + saptavargaja.sum(axis=0) + ojayugma + kendradi + drekkana
+
+    dig = _arc(longitudes - ascendants[:, None] - STRONGEST_CUSP - 180) / 3
+
+    # Kala bala; the Sun's arc below the ascendant gives the time of day
+    sun, moon = longitudes[:, GRAHA_INDEX['Sun']], longitudes[:, GRAHA_INDEX['Moon']]
+    elongation = (moon - sun) % 360
+    waxing = elongation < 180
+    paksha_benefic = _arc(elongation) / 3
+    benefic = NATURAL_BENEFIC & ((graha != GRAHA_INDEX['Moon']) | waxing[:, None])
+    paksha = np.where(NATURAL_BENEFIC, paksha_benefic[:, None], 60 - paksha_benefic[:, None])
+    since_sunrise = (ascendants - sun) % 360
+    from_midnight = _arc(since_sunrise - 270) / 3
+    nathonnata = NATHONNATA_BASE + DAY_STRONG * from_midnight[:, None]
+    daytime = since_sunrise < 180
+    third = (since_sunrise % 180 // 60).astype(np.intp)
+    tribhaga_lord = np.where(daytime, np.array(DAY_THIRDS)[third], np.array(NIGHT_THIRDS)[third])
+    tribhaga = np.where((graha == tribhaga_lord[:, None]) | (graha == GRAHA_INDEX['Jupiter']), 60.0, 0.0)
+    kala = paksha + nathonnata + tribhaga
+
+    naisargika = np.broadcast_to(NAISARGIKA, (n, len(GRAHAS)))
+
+    # Drik bala: distance[n, aspecting, aspected]
+    distance = (longitudes[:, None, :] - longitudes[:, :, None]) % 360
+    drishti = np.interp(distance, DRISHTI_ANGLES, DRISHTI_VALUES)
+    drishti += SPECIAL_DRISHTI[graha[:, None], (signs[:, None, :] - signs[:, :, None]) % 12]
+    drishti = np.minimum(drishti, 60.0)
+    drishti[:, graha, graha] = 0
+    drik = np.einsum('nas,na->ns', drishti, np.where(benefic, 1.0, -1.0)) / 4
+
+    components = {'sthana': sthana, 'dig': dig, 'kala': kala, 'naisargika': naisargika, 'drik': drik}
+    total = sum(components.values())
+    components['total'] = total
+    components['ratio'] = total / REQUIRED_VIRUPAS
+    return components
+
+
+def sarva_level(bindus):
+    """'strong', 'average' or 'weak' for a sign's Sarvashtakavarga bindus."""
+    return 'strong' if bindus >= SARVA_STRONG else 'weak' if bindus <= SARVA_WEAK else 'average'
+
+
+class ChartStrength:
+    """Ashtakavarga and Shadbala of one chart; treat it as read-only."""
+
+    __slots__ = ('signs', 'ascendant_sign', 'bhinna', 'sarva', 'shadbala', 'ratios', 'weak')
+
+    def __init__(self, longitudes, ascendant):
+        longitudes = np.asarray(longitudes, dtype=float) % 360
+        self.signs = (longitudes // 30).astype(int).tolist()
+        self.ascendant_sign = int(ascendant % 360 // 30)
+        bhinna, sarva = ashtakavarga(longitudes, ascendant)
+        self.bhinna = bhinna[0].tolist()
+        self.sarva = sarva[0].tolist()
+        components = shadbala(longitudes, ascendant)
+        self.shadbala = {name: values[0].tolist() for name, values in components.items()}
+        self.ratios = dict(zip(GRAHAS, self.shadbala['ratio']))
+        self.weak = frozenset(self._weak_planets())
+
+    def _weak_planets(self):
+        """
+        The graha with the lowest Shadbala ratio, grahas short of both their
+        minimum Shadbala and BHINNA_WEAK bindus in their sign, and nodes in a
+        weak Sarvashtakavarga sign.
+        """
+        weakest = min(self.ratios, key=self.ratios.get)
+        for g, graha in enumerate(GRAHAS):
+            if graha == weakest or (self.ratios[graha] < 1 and self.bhinna[g][self.signs[g]] < BHINNA_WEAK):
+                yield graha
+        for node in NODES:
+            if sarva_level(self.sarva[self.signs[node]]) == 'weak':
+                yield PLANETS[node]
+
+    def bindus(self, planet):
+        """Bindus of a graha in the sign it occupies."""
+        g = GRAHA_INDEX[planet]
+        return self.bhinna[g][self.signs[g]]
+
+    def house_bindus(self, house):
+        """Sarvashtakavarga bindus of a house (whole-sign, from the ascendant)."""
+        return self.sarva[(self.ascendant_sign + house - 1) % 12]
+
+    def ranked(self, planets):
+        """The grahas among planets, strongest Shadbala ratio first."""
+        return sorted((p for p in planets if p in self.ratios), key=self.ratios.get, reverse=True)
+
+    def to_dict(self):
+        return {
+            "bhinnashtakavarga": {graha: self.bhinna[g] for g, graha in enumerate(GRAHAS)},
+            "sarvashtakavarga": self.sarva,
+            "shadbala": {graha: {name: round(values[g], 2) for name, values in self.shadbala.items()}
+                         for g, graha in enumerate(GRAHAS)},
+            "weak": [planet for planet in PLANETS if planet in self.weak],
+        }
+
+
+def chart_longitudes(chart):
+    """(nine sidereal longitudes in PLANETS order, ascendant longitude) of a ChartRecord or chart dict."""
+    record = as_record(chart)
+    longitudes = [record.longitude(i) for i in range(len(PLANETS))]
+    return longitudes, record.ascendant_sign * 30 + (record.ascendant_degrees or 0.0)
+
+
+class StrengthCache:
+    """LRU of ChartStrengths keyed on the chart's longitudes."""
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(int(os.environ.get('STRENGTH_CACHE_SIZE', 4096)))
+
+    def get(self, chart):
+        """The ChartStrength of a ChartRecord or chart dict, computed on a miss."""
+        longitudes, ascendant = chart_longitudes(chart)
+        key = (ascendant, *longitudes)
+        with self._lock:
+            strength = self._entries.get(key)
+            if strength is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return strength
+            self.misses += 1
+        strength = ChartStrength(longitudes, ascendant)
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[key] = strength
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return strength
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from synthetic import SyntheticWorkload
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 42
+    chart = SyntheticWorkload(seed).mock_chart()
+    print(json.dumps(ChartStrength(*chart_longitudes(chart)).to_dict(), indent=2))
@@ -0,0 +1,166 @@
+"""
+Seeded synthetic workloads for benchmarks and mock data.
+
+SyntheticWorkload(seed) produces the same sequence every time for the same
+seed:
+    birth_records   generate-birth-chart bodies as the frontend sends them,
+                    with places drawn from the gazetteer weighted by
+                    population, and optionally explicit coordinates
+    mock_chart      chart-consistent ChartRecords: houses follow from the
+                    signs (whole-sign houses), Ketu is opposite Rahu, and
+                    Mercury and Venus stay within their elongation from the Sun
+    chat_messages   (intent, message) pairs drawn from a weighted intent mix
+
+Usage:
+    python synthetic.py records 5 --seed 42
+    python synthetic.py chat 10 --seed 42
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+
+from chart_model import ChartRecord
+from ephemeris import PLANETS
+from intent_router import ORDINAL_WORDS, ordinal
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.tsv')
+
+# Greatest elongation from the Sun, in degrees
+ELONGATION = {'Mercury': 28.0, 'Venus': 47.0}
+
+# Intent -> relative frequency in a chat mix; roughly what the chat UI sees
+DEFAULT_CHAT_MIX = {
+    'planet': 30, 'house': 20, 'career': 10, 'relationship': 10, 'general': 10,
+    'planetary': 8, 'remedy': 6, 'health': 3, 'finance': 3,
+}
+
+CHAT_TEMPLATES = {
+    'planetary': ["Where are my planets?", "Show me my planetary positions",
+                  "Where is each planet placed in my chart?"],
+    'planet': ["What does my {planet} mean?", "Tell me about my {planet}",
+               "How does {planet} affect me?", "Explain my {planet} placement"],
+    'house': ["What does my {house} house say?", "Tell me about the {house} house",
+              "What is in my {house_word} house?", "Explain house {number}"],
+    'remedy': ["What remedies do you suggest?", "How can I improve my chart?",
+               "Any remedies for my chart?"],
+    'career': ["What about my career?", "Will I change jobs soon?", "Which profession suits me?"],
+    'relationship': ["When will I get married?", "Tell me about my love life",
+                     "Is my relationship going well?"],
+    'health': ["How is my health?", "Any health concerns I should know about?"],
+    'finance': ["How are my finances looking?", "Will I gain wealth this year?"],
+    'general': ["Tell me about my chart", "What does my birth chart say?", "Give me an overview"],
+}
+
+
+def load_places(tsv_path=DEFAULT_GAZETTEER):
+    """(location text, population) for every place in a gazetteer TSV."""
+    places = []
+    with open(tsv_path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) > 14 and not row[0].startswith('#'):
+                places.append((f"{row[1]}, {row[8]}", int(row[14] or 0)))
+    return places
+
+
+class SyntheticWorkload:
+    """Deterministic birth records, mock charts and chat messages."""
+
+    def __init__(self, seed=0, places=None, chat_mix=None):
+        self.rng = random.Random(seed)
+        self._places = places
+        self.chat_mix = chat_mix or DEFAULT_CHAT_MIX
+
+    @property
+    def places(self):
+        # Read lazily so mock charts never touch the gazetteer
+        if self._places is None:
+            self._places = load_places()
+        return self._places
+
+    def birth_record(self, coordinate_share=0.0):
+        """
+        One birth details body. With probability coordinate_share it carries
+        "lat"/"lon" (and the timezone) instead of a location name.
+        """
+        rng = self.rng
+        day = datetime.date(1940, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 75))
+        record = {
+            "name": f"Person {rng.randrange(10 ** 6)}",
+            "date": f"{day.isoformat()}T00:00:00.000Z",
+            "time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+        }
+        if rng.random() < coordinate_share:
+            record.update(lat=round(rng.uniform(-55, 65), 4), lon=round(rng.uniform(-180, 180), 4),
+                          timezone="UTC")
+        else:
+            names, weights = zip(*self.places)
+            record["location"] = rng.choices(names, weights)[0]
+        return record
+
+    def birth_records(self, count, coordinate_share=0.0):
+        return [self.birth_record(coordinate_share) for _ in range(count)]
+
+    def mock_chart(self):
+        """A random but chart-consistent ChartRecord."""
+        rng = self.rng
+        ascendant = rng.uniform(0, 360)
+        sun = rng.uniform(0, 360)
+        rahu = rng.uniform(0, 360)
+        longitudes = []
+        for planet in PLANETS:
+            if planet == 'Sun':
+                longitude = sun
+            elif planet in ELONGATION:
+                longitude = sun + rng.uniform(-ELONGATION[planet], ELONGATION[planet])
+            elif planet == 'Rahu':
+                longitude = rahu
+            elif planet == 'Ketu':
+                longitude = rahu + 180
+            else:
+                longitude = rng.uniform(0, 360)
+            longitudes.append(longitude % 360)
+
+        ascendant_sign = int(ascendant // 30)
+        signs = [int(longitude // 30) for longitude in longitudes]
+        houses = [(sign - ascendant_sign) % 12 + 1 for sign in signs]
+        return ChartRecord(ascendant_sign, signs, houses, [longitude % 30 for longitude in longitudes],
+                           ascendant % 30)
+
+    def chat_message(self):
+        """One (intent, message) pair from the chat mix."""
+        rng = self.rng
+        intents, weights = zip(*self.chat_mix.items())
+        intent = rng.choices(intents, weights)[0]
+        number = rng.randrange(1, 13)
+        message = rng.choice(CHAT_TEMPLATES[intent]).format(
+            planet=rng.choice(PLANETS), house=ordinal(number),
+            house_word=ORDINAL_WORDS[number - 1], number=number)
+        return intent, message
+
+    def chat_messages(self, count):
+        return [self.chat_message() for _ in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a synthetic workload as JSON lines")
+    parser.add_argument('kind', choices=['records', 'charts', 'chat'])
+    parser.add_argument('count', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workload = SyntheticWorkload(args.seed)
+    for _ in range(args.count):
+        if args.kind == 'records':
+            print(json.dumps(workload.birth_record()))
+        elif args.kind == 'charts':
+            print(json.dumps(workload.mock_chart().to_dict()))
+        else:
+            intent, message = workload.chat_message()
+            print(json.dumps({"intent": intent, "message": message}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Transit and Vimshottari dasha time series.
+
+Transits are sampled on a precomputed Julian-day grid, one chunk of dates at a
+time: each chunk's sidereal longitudes and speeds come from a single
+sidereal_positions call, and sign/house changes and retrograde stations are
+found with array comparisons between neighbouring samples. Each event is then
+refined by bisection, so its time is accurate to about a minute regardless
+of the sampling step.
+
+Houses are whole-sign houses counted from the natal ascendant, so a house
+ingress always coincides with a sign ingress.
+"""
+import re
+
+import numpy as np
+
+from birth_instant import datetime_from_julian_day
+from ephemeris import (NAKSHATRA_SPAN, PLANETS, PLANET_DICT, PLANET_IDS, SIGNS, sidereal_longitude,
+                       sidereal_positions)
+
+# Bisection stops once the bracket is shorter than this (days)
+EVENT_PRECISION = 1.0 / 1440
+DEFAULT_CHUNK_SIZE = 256
+MAX_SAMPLES = 200000
+# Each dasha level multiplies the periods per mahadasha by nine
+MAX_DASHA_LEVELS = 3
+
+# The mean nodes never station, so skip them when looking for stations
+STATION_COLUMNS = [col for col, name in enumerate(PLANET_DICT) if name not in ('Rahu', 'Ketu')]
+
+VIMSHOTTARI_LORDS = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury']
+VIMSHOTTARI_YEARS = [7, 20, 6, 10, 7, 18, 16, 19, 17]
+VIMSHOTTARI_TOTAL = sum(VIMSHOTTARI_YEARS)
+DASHA_YEAR_DAYS = 365.25
+
+_STEP = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([mhd]?)\s*$')
+_STEP_UNITS = {'m': 1.0 / 1440, 'h': 1.0 / 24, 'd': 1.0, '': 1.0}
+
+
+def parse_step(step):
+    """Parse a step such as 1, "1d", "6h" or "30m" into days."""
+    if isinstance(step, (int, float)):
+        days = float(step)
+    else:
+        match = _STEP.match(str(step))
+        if not match:
+            raise ValueError(f"Invalid step: {step}")
+        days = float(match.group(1)) * _STEP_UNITS[match.group(2)]
+    if days <= 0:
+        raise ValueError("Step must be positive")
+    return days
+
+
+def parse_dasha_levels(levels):
+    """Parse the number of nested dasha levels, 1 (mahadashas) to MAX_DASHA_LEVELS."""
+    if isinstance(levels, bool) or not isinstance(levels, (int, str)) or not str(levels).strip().isdigit():
+        raise ValueError(f"Invalid dashaLevels: {levels}")
+    levels = int(levels)
+    if not 1 <= levels <= MAX_DASHA_LEVELS:
+        raise ValueError(f"dashaLevels must be between 1 and {MAX_DASHA_LEVELS}")
+    return levels
+
+
+def _iso(julian_day):
+    return datetime_from_julian_day(julian_day).isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+
+def _sign_at(julian_day, planet_id):
+    return int(sidereal_longitude(julian_day, planet_id)[0] // 30)
+
+
+def _refine_ingresses(col, jd_a, jd_b, sign_a, sign_b, ascendant_sign):
+    """Bisect every sign boundary crossed by one planet between two samples."""
+    planet_id = PLANET_IDS[col]
+    events = []
+    current = sign_a
+    # A fast body can cross more than one boundary within a coarse step
+    for _ in range(12):
+        if current == sign_b:
+            break
+        lo, hi = jd_a, jd_b
+        while hi - lo > EVENT_PRECISION:
+            mid = (lo + hi) / 2
+            if _sign_at(mid, planet_id) == current:
+                lo = mid
+            else:
+                hi = mid
+        lon, speed = sidereal_longitude(hi, planet_id)
+        new_sign = int(lon // 30)
+        events.append({
+            "type": "ingress",
+            "planet": PLANETS[col],
+            "date": _iso(hi),
+            "jd": hi,
+            "fromSign": SIGNS[current],
+            "toSign": SIGNS[new_sign],
+            "house": (new_sign - ascendant_sign) % 12 + 1,
+            "retrograde": speed < 0,
+        })
+        current, jd_a = new_sign, hi
+    return events
+
+
+def _refine_station(col, jd_a, jd_b, retrograde_after):
+    """Bisect the moment a planet's speed changes sign."""
+    planet_id = PLANET_IDS[col]
+    lo, hi = jd_a, jd_b
+    while hi - lo > EVENT_PRECISION:
+        mid = (lo + hi) / 2
+        if (sidereal_longitude(mid, planet_id)[1] < 0) == retrograde_after:
+            hi = mid
+        else:
+            lo = mid
+    return {
+        "type": "station",
+        "planet": PLANETS[col],
+        "date": _iso(hi),
+        "jd": hi,
+        "station": "retrograde" if retrograde_after else "direct",
+        "sign": SIGNS[_sign_at(hi, planet_id)],
+    }
+
+
+def transit_series(start_jd, end_jd, step_days, ascendant_sign, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Transit records in time order: a "position" record per sample
+    (longitudes, signs, houses and retrograde flags in PLANETS order), with
+    "ingress" and "station" events interleaved at their refined times.
+
+    The range is checked here, so a ValueError is raised before any record
+    is produced; the records themselves are generated lazily.
+    """
+    julian_days = np.arange(start_jd, end_jd + step_days / 2, step_days)
+    if len(julian_days) > MAX_SAMPLES:
+        raise ValueError(f"Range needs {len(julian_days)} samples; the limit is {MAX_SAMPLES}")
+    return _transit_records(julian_days, ascendant_sign, chunk_size)
+
+
+def _transit_records(julian_days, ascendant_sign, chunk_size):
+    previous = None  # last sample of the previous chunk: (jd, signs, retrograde)
+    for offset in range(0, len(julian_days), chunk_size):
+        jds = julian_days[offset:offset + chunk_size]
+        lons, speeds = sidereal_positions(jds)
+        signs = (lons // 30).astype(np.int64)
+        houses = (signs - ascendant_sign) % 12 + 1
+        retrograde = speeds < 0
+
+        records = []
+        for k, jd in enumerate(jds.tolist()):
+            records.append((jd, 0, {
+                "type": "position",
+                "date": _iso(jd),
+                "jd": jd,
+                "longitude": np.round(lons[k], 4).tolist(),
+                "sign": [SIGNS[s] for s in signs[k].tolist()],
+                "house": houses[k].tolist(),
+                "retrograde": retrograde[k].tolist(),
+            }))
+
+        # Compare each sample with the one before it, across chunk boundaries
+        if previous is not None:
+            edge_jds = np.concatenate(([previous[0]], jds))
+            edge_signs = np.vstack((previous[1], signs))
+            edge_retrograde = np.vstack((previous[2], retrograde))
+        else:
+            edge_jds, edge_signs, edge_retrograde = jds, signs, retrograde
+
+        for k, col in zip(*np.nonzero(edge_signs[1:] != edge_signs[:-1])):
+            for event in _refine_ingresses(col, edge_jds[k], edge_jds[k + 1],
+                                           int(edge_signs[k, col]), int(edge_signs[k + 1, col]),
+                                           ascendant_sign):
+                records.append((event["jd"], 1, event))
+
+        stations = edge_retrograde[1:] != edge_retrograde[:-1]
+        for k, col in zip(*np.nonzero(stations[:, STATION_COLUMNS])):
+            col = STATION_COLUMNS[col]
+            event = _refine_station(col, edge_jds[k], edge_jds[k + 1], bool(edge_retrograde[k + 1, col]))
+            records.append((event["jd"], 1, event))
+
+        records.sort(key=lambda record: (record[0], record[1]))
+        for _, _, record in records:
+            yield record
+
+        previous = (jds[-1], signs[-1], retrograde[-1])
+
+
+def _dasha_periods(lord_index, start_jd, length_days, levels):
+    """The nine sub-periods of a period, starting with its own lord."""
+    periods = []
+    jd = start_jd
+    for i in range(9):
+        index = (lord_index + i) % 9
+        days = length_days * VIMSHOTTARI_YEARS[index] / VIMSHOTTARI_TOTAL
+        period = {"lord": VIMSHOTTARI_LORDS[index], "start": _iso(jd), "end": _iso(jd + days),
+                  "startJd": jd, "endJd": jd + days}
+        if levels > 1:
+            period["periods"] = _dasha_periods(index, jd, days, levels - 1)
+        periods.append(period)
+        jd += days
+    return periods
+
+
+def vimshottari_dasha(moon_lon, birth_jd, levels=2, start_jd=None, end_jd=None):
+    """
+    Vimshottari mahadashas from the natal sidereal Moon longitude, covering
+    120 years from birth, with `levels` nested levels (2 = antardashas).
+    If start_jd/end_jd are given, only mahadashas overlapping that range are
+    returned. Years are 365.25 days.
+    """
+    nakshatra = int(moon_lon // NAKSHATRA_SPAN) % 27
+    lord_index = nakshatra % 9
+    elapsed = (moon_lon % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    # The first mahadasha began before birth by the elapsed share of its length
+    jd = birth_jd - elapsed * VIMSHOTTARI_YEARS[lord_index] * DASHA_YEAR_DAYS
+
+    mahadashas = []
+    while jd < birth_jd + VIMSHOTTARI_TOTAL * DASHA_YEAR_DAYS:
+        days = VIMSHOTTARI_YEARS[lord_index] * DASHA_YEAR_DAYS
+        if (start_jd is None or jd + days > start_jd) and (end_jd is None or jd < end_jd):
+            period = {"lord": VIMSHOTTARI_LORDS[lord_index], "start": _iso(jd), "end": _iso(jd + days),
+                      "startJd": jd, "endJd": jd + days}
+            if levels > 1:
+                period["periods"] = _dasha_periods(lord_index, jd, days, levels - 1)
+            mahadashas.append(period)
+        jd += days
+        lord_index = (lord_index + 1) % 9
+    return mahadashas
@@ -0,0 +1,151 @@
+"""
+Divisional charts (vargas) derived from a chart's sidereal longitudes.
+
+Each of the sixteen Parashari vargas splits a sign into N parts and maps
+(sign, part) to a varga sign. All of them are compiled at import into one
+padded lookup table VARGA_TABLE[varga, sign, part]; D30's unequal spans all
+fall on whole degrees, so it is tabulated as 30 one-degree parts. Deriving
+any set of vargas for any number of longitudes is then a single broadcast
+division and one fancy-index into the table, with no ephemeris calls.
+"""
+import re
+
+import numpy as np
+
+from chart_model import ChartRecord, as_record
+from ephemeris import PLANETS
+
+VARGA_NAMES = {
+    1: 'Rasi', 2: 'Hora', 3: 'Drekkana', 4: 'Chaturthamsa', 7: 'Saptamsa',
+    9: 'Navamsa', 10: 'Dasamsa', 12: 'Dwadasamsa', 16: 'Shodasamsa',
+    20: 'Vimsamsa', 24: 'Chaturvimsamsa', 27: 'Bhamsa', 30: 'Trimsamsa',
+    40: 'Khavedamsa', 45: 'Akshavedamsa', 60: 'Shashtiamsa',
+}
+DIVISIONS = list(VARGA_NAMES)
+VARGA_ROW = {division: row for row, division in enumerate(DIVISIONS)}
+
+# Trimsamsa: (end degree, varga sign) for odd and for even signs
+TRIMSAMSA_ODD = [(5, 0), (10, 10), (18, 8), (25, 2), (30, 6)]   # Mars, Saturn, Jupiter, Mercury, Venus
+TRIMSAMSA_EVEN = [(5, 1), (12, 5), (20, 11), (25, 9), (30, 7)]  # Venus, Mercury, Jupiter, Saturn, Mars
+
+
+def _varga_sign(division, sign, part):
+    """Varga sign index for a part of a sign (sign 0 = Aries, an odd sign)."""
+    odd = sign % 2 == 0
+    modality = sign % 3          # 0 movable, 1 fixed, 2 dual
+    element = sign % 4           # 0 fire, 1 earth, 2 air, 3 water
+    if division == 1:
+        return sign
+    if division == 2:
+        # Sun's hora is Leo, Moon's is Cancer; odd signs start with the Sun
+        return (4 if part == 0 else 3) if odd else (3 if part == 0 else 4)
+    if division == 3:
+        return (sign + 4 * part) % 12
+    if division == 4:
+        return (sign + 3 * part) % 12
+    if division == 7:
+        return (sign + (0 if odd else 6) + part) % 12
+    if division == 9:
+        return (sign * 9 + part) % 12
+    if division == 10:
+        return (sign + (0 if odd else 8) + part) % 12
+    if division == 12:
+        return (sign + part) % 12
+    if division == 16:
+        return ([0, 4, 8][modality] + part) % 12
+    if division == 20:
+        return ([0, 8, 4][modality] + part) % 12
+    if division == 24:
+        return ((4 if odd else 3) + part) % 12
+    if division == 27:
+        return ([0, 3, 6, 9][element] + part) % 12
+    if division == 30:
+        spans = TRIMSAMSA_ODD if odd else TRIMSAMSA_EVEN
+        return next(varga for end, varga in spans if part < end)
+    if division == 40:
+        return ((0 if odd else 6) + part) % 12
+    if division == 45:
+        return ([0, 4, 8][modality] + part) % 12
+    if division == 60:
+        return (sign + part) % 12
+    raise ValueError(f"Unknown varga D{division}")
+
+
+def _build_table():
+    width = max(DIVISIONS)
+    table = np.zeros((len(DIVISIONS), 12, width), dtype=np.int8)
+    for row, division in enumerate(DIVISIONS):
+        for sign in range(12):
+            for part in range(division):
+                table[row, sign, part] = _varga_sign(division, sign, part)
+    return table
+
+
+VARGA_TABLE = _build_table()
+PARTS = np.array(DIVISIONS, dtype=float)
+
+
+def parse_vargas(values):
+    """
+    Normalize a vargas parameter ("D9", "d10", 9, "navamsa", or a
+    comma-separated string of those) to a list of divisions.
+    Raises ValueError for unknown vargas.
+    """
+    if isinstance(values, (str, int)):
+        values = [values]
+    names = {name.lower(): division for division, name in VARGA_NAMES.items()}
+    divisions = []
+    for value in values:
+        for item in (str(value).split(',') if isinstance(value, str) else [value]):
+            text = str(item).strip().lower()
+            if not text:
+                continue
+            match = re.fullmatch(r'd?(\d+)', text)
+            division = int(match.group(1)) if match else names.get(text)
+            if division not in VARGA_ROW:
+                raise ValueError(f"Unknown varga: {item}")
+            if division not in divisions:
+                divisions.append(division)
+    return divisions
+
+
+def varga_positions(longitudes, divisions):
+    """
+    Varga sign indices and in-sign degrees for sidereal longitudes.
+
+    longitudes may have any shape; the results have shape
+    (len(divisions),) + longitudes.shape.
+    """
+    longitudes = np.asarray(longitudes, dtype=float) % 360
+    rows = np.array([VARGA_ROW[division] for division in divisions])
+    parts = PARTS[rows].reshape((-1,) + (1,) * longitudes.ndim)
+    signs = (longitudes // 30).astype(np.int64)
+    scaled = (longitudes % 30) * parts / 30
+    # D30 is tabulated per degree, whatever the varga's nominal part count
+    part_index = np.minimum(scaled, parts - 1).astype(np.int64)
+    trimsamsa = rows == VARGA_ROW[30]
+    if trimsamsa.any():
+        part_index[trimsamsa] = np.minimum(longitudes % 30, 29).astype(np.int64)
+    varga_signs = VARGA_TABLE[rows.reshape(parts.shape), signs, part_index]
+    return varga_signs, (scaled % 1) * 30
+
+
+def varga_charts(chart, divisions):
+    """
+    Divisional charts for a D1 chart (a ChartRecord or chart dict), as named
+    ChartRecords keyed "D9", "D10", ... The ascendant uses the chart's
+    ascendant degrees when present.
+    """
+    chart = as_record(chart)
+    longitudes = np.empty(len(PLANETS) + 1)
+    longitudes[0] = chart.ascendant_sign * 30 + (chart.ascendant_degrees or 0.0)
+    longitudes[1:] = np.array(chart.signs) * 30 + np.array(chart.degrees)
+
+    signs, degrees = varga_positions(longitudes, divisions)
+    houses = (signs[:, 1:] - signs[:, :1]) % 12 + 1
+
+    return {
+        f"D{division}": ChartRecord(signs[k, 0], signs[k, 1:].tolist(), houses[k].tolist(),
+                                    degrees[k, 1:].tolist(), name=VARGA_NAMES[division])
+        for k, division in enumerate(divisions)
+    }
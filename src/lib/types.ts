@@ -26,6 +26,7 @@ export interface BirthChart {
   ascendant: string;
   houses: HouseData[];
   planets: PlanetaryPosition[];
+  chartId?: string; // server-side chat session, from generate-birth-chart
 }
 
 export interface HouseData {